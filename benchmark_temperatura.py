@@ -0,0 +1,290 @@
+"""
+Benchmark del ciclo de control de temperatura
+============================================
+
+Mide cómo escalan las 4 funciones de problema1_temperatura
+(leer, calcular, enviar y registrar) desde 10 hasta 1M de zonas.
+Reporta latencia por llamada, llamadas por segundo y memoria pico por
+etapa en un archivo JSON, y compara contra una línea base guardada
+para detectar regresiones.
+
+Uso:
+    python benchmark_temperatura.py
+    python benchmark_temperatura.py --zonas 10 1000 100000 --guardar-linea-base
+    python benchmark_temperatura.py --linea-base benchmark_temperatura_base.json
+"""
+
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import datetime
+import tracemalloc
+
+import problema1_temperatura as temperatura
+
+ZONAS_POR_DEFECTO = [10, 100, 1000, 10000, 100000, 1000000]
+ETAPAS = ["leer", "calcular", "enviar", "registrar"]
+SEMILLA = 42
+TEMPERATURA_EXTERIOR = 28.0
+LLAMADAS_MINIMAS = 20000  # Se repiten los tamaños pequeños hasta este total
+
+
+def generar_zonas(num_zonas, generador):
+    """
+    Función para generar zonas simuladas de forma reproducible
+
+    Args:
+        num_zonas (int): Número de zonas
+        generador (random.Random): Generador con semilla
+
+    Returns:
+        dict: Zonas con el formato de problema1_temperatura.zonas
+    """
+    return {
+        f"zona_{i}": {
+            "temperatura": round(generador.uniform(17.0, 28.0), 1),
+            "ocupacion": generador.randint(0, 30),
+            "objetivo": 22.0
+        }
+        for i in range(num_zonas)
+    }
+
+
+def _ejecutar_etapas(ids_zona, medir, instante=None):
+    """
+    Función auxiliar que ejecuta una vez el ciclo completo etapa por etapa
+
+    Args:
+        ids_zona (list): Zonas a procesar
+        medir (callable): Recibe (nombre_etapa, función) y ejecuta la función
+        instante (float): Marca de tiempo del ciclo para registros compactos
+    """
+    lecturas = []
+    optimas = []
+    comandos = []
+
+    def leer():
+        for zona_id in ids_zona:
+            lecturas.append(temperatura.leer_sensores_temperatura(zona_id, instante))
+
+    def calcular():
+        for datos in lecturas:
+            optimas.append(temperatura.calcular_temperatura_optima(datos, TEMPERATURA_EXTERIOR))
+
+    def enviar():
+        if instante is not None:
+            pares = ((datos.zona, datos.temperatura) for datos in lecturas)
+        else:
+            pares = ((datos["zona"], datos["temperatura"]) for datos in lecturas)
+        for (zona_id, temperatura_actual), temp_optima in zip(pares, optimas):
+            comando = temperatura.enviar_ajuste_temperatura(zona_id, temp_optima, temperatura_actual)
+            if comando is not None:
+                comandos.append((zona_id, comando))
+
+    def registrar():
+        for zona_id, (accion, intensidad) in comandos:
+            temperatura.registrar_consumo_energia(zona_id, accion, intensidad, 1 / 60, instante)
+
+    medir("leer", leer, len(ids_zona))
+    medir("calcular", calcular, len(ids_zona))
+    medir("enviar", enviar, len(ids_zona))
+    medir("registrar", registrar, len(comandos))
+
+
+def medir_tamano(num_zonas, con_memoria=True, compacto=False):
+    """
+    Función para medir todas las etapas con un número de zonas
+
+    Cada etapa se repite hasta sumar LLAMADAS_MINIMAS llamadas y se
+    conserva la repetición más rápida. La memoria pico se mide en una
+    pasada aparte con tracemalloc para no alterar los tiempos.
+
+    Args:
+        num_zonas (int): Número de zonas simuladas
+        con_memoria (bool): Medir memoria pico por etapa
+        compacto (bool): Usar registros Zona/LecturaSensor/RegistroEnergia
+            y una marca de tiempo por ciclo en lugar de diccionarios
+
+    Returns:
+        dict: Métricas por etapa
+    """
+    generador = random.Random(SEMILLA)
+    zonas_simuladas = generar_zonas(num_zonas, generador)
+    ids_zona = list(zonas_simuladas)
+    repeticiones = max(1, LLAMADAS_MINIMAS // num_zonas)
+
+    zonas_originales = temperatura.zonas
+    historial_original = temperatura.historial_energia
+    etapas = {nombre: {"tiempo_s": None, "llamadas": 0} for nombre in ETAPAS}
+
+    def medir_tiempo(nombre, funcion, llamadas):
+        inicio = time.perf_counter()
+        funcion()
+        tiempo = time.perf_counter() - inicio
+        if etapas[nombre]["tiempo_s"] is None or tiempo < etapas[nombre]["tiempo_s"]:
+            etapas[nombre]["tiempo_s"] = tiempo
+            etapas[nombre]["llamadas"] = llamadas
+
+    def copiar_zonas():
+        if compacto:
+            return {z: temperatura.Zona(d["temperatura"], d["ocupacion"], d["objetivo"])
+                    for z, d in zonas_simuladas.items()}
+        return {z: dict(datos) for z, datos in zonas_simuladas.items()}
+
+    def medir_memoria(nombre, funcion, llamadas):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        funcion()
+        etapas[nombre]["memoria_pico_bytes"] = tracemalloc.get_traced_memory()[1] - base
+
+    try:
+        with temperatura.salida_temporal(temperatura.MODO_SILENCIOSO):
+            for repeticion in range(repeticiones):
+                random.seed(SEMILLA + repeticion)
+                temperatura.zonas = copiar_zonas()
+                temperatura.historial_energia = temperatura.HistorialEnergia()
+                instante = temperatura.instante_ciclo() if compacto else None
+                _ejecutar_etapas(ids_zona, medir_tiempo, instante)
+
+            if con_memoria:
+                random.seed(SEMILLA)
+                temperatura.zonas = copiar_zonas()
+                temperatura.historial_energia = temperatura.HistorialEnergia()
+                instante = temperatura.instante_ciclo() if compacto else None
+                tracemalloc.start()
+                try:
+                    _ejecutar_etapas(ids_zona, medir_memoria, instante)
+                finally:
+                    tracemalloc.stop()
+    finally:
+        temperatura.zonas = zonas_originales
+        temperatura.historial_energia = historial_original
+
+    for metricas in etapas.values():
+        tiempo = metricas["tiempo_s"]
+        llamadas = metricas["llamadas"]
+        metricas["latencia_us"] = tiempo / llamadas * 1e6 if llamadas else 0.0
+        metricas["por_segundo"] = llamadas / tiempo if llamadas and tiempo else 0.0
+
+    return {"zonas": num_zonas, "repeticiones": repeticiones, "compacto": compacto, "etapas": etapas}
+
+
+def comparar_linea_base(resultados, linea_base, tolerancia):
+    """
+    Función para comparar el rendimiento contra una línea base
+
+    Args:
+        resultados (list): Mediciones actuales
+        linea_base (dict): Contenido de un JSON generado por este script
+        tolerancia (float): Caída relativa de llamadas/s permitida (0.2 = 20%)
+
+    Returns:
+        list: Regresiones detectadas
+    """
+    base_por_tamano = {r["zonas"]: r["etapas"] for r in linea_base.get("resultados", [])}
+    regresiones = []
+
+    for resultado in resultados:
+        etapas_base = base_por_tamano.get(resultado["zonas"])
+        if etapas_base is None:
+            continue
+        for nombre, metricas in resultado["etapas"].items():
+            base = etapas_base.get(nombre, {}).get("por_segundo")
+            if not base or not metricas["por_segundo"]:
+                continue
+            relacion = metricas["por_segundo"] / base
+            if relacion < 1 - tolerancia:
+                regresiones.append({
+                    "zonas": resultado["zonas"],
+                    "etapa": nombre,
+                    "por_segundo": metricas["por_segundo"],
+                    "por_segundo_base": base,
+                    "relacion": relacion
+                })
+
+    return regresiones
+
+
+def mostrar_resultado(resultado):
+    """Función auxiliar para imprimir la tabla de un tamaño"""
+    print(f"📊 {resultado['zonas']:>9} zonas ({resultado['repeticiones']} repeticiones)")
+    for nombre, metricas in resultado["etapas"].items():
+        memoria = metricas.get("memoria_pico_bytes")
+        texto_memoria = f" | pico {memoria / 1024:.0f} KiB" if memoria is not None else ""
+        print(f"   {nombre:<10} {metricas['latencia_us']:8.2f} µs/llamada | "
+              f"{metricas['por_segundo']:>12,.0f} llamadas/s{texto_memoria}")
+
+
+def main(argumentos=None):
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark del ciclo de control de temperatura")
+    parser.add_argument("--zonas", type=int, nargs="+", default=ZONAS_POR_DEFECTO,
+                        help="Números de zonas a medir")
+    parser.add_argument("--salida", default="benchmark_temperatura.json",
+                        help="Archivo JSON de resultados")
+    parser.add_argument("--linea-base", default="benchmark_temperatura_base.json",
+                        help="Archivo JSON de línea base para comparar")
+    parser.add_argument("--guardar-linea-base", action="store_true",
+                        help="Guardar estos resultados como nueva línea base")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Caída de rendimiento tolerada antes de reportar regresión")
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="No medir memoria pico (más rápido)")
+    parser.add_argument("--compacto", action="store_true",
+                        help="Usar registros compactos con __slots__ y una marca de tiempo por ciclo")
+    opciones = parser.parse_args(argumentos)
+
+    print("=== BENCHMARK DEL CONTROL DE TEMPERATURA ===\n")
+
+    resultados = []
+    for num_zonas in opciones.zonas:
+        resultado = medir_tamano(num_zonas, con_memoria=not opciones.sin_memoria,
+                                 compacto=opciones.compacto)
+        resultados.append(resultado)
+        mostrar_resultado(resultado)
+
+    informe = {
+        "metadatos": {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "semilla": SEMILLA
+        },
+        "resultados": resultados
+    }
+
+    with open(opciones.salida, "w", encoding="utf-8") as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {opciones.salida}")
+
+    if opciones.guardar_linea_base:
+        with open(opciones.linea_base, "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        print(f"💾 Línea base guardada en {opciones.linea_base}")
+        return 0
+
+    try:
+        with open(opciones.linea_base, encoding="utf-8") as archivo:
+            linea_base = json.load(archivo)
+    except FileNotFoundError:
+        print(f"ℹ️  Sin línea base ({opciones.linea_base}); use --guardar-linea-base para crearla")
+        return 0
+
+    regresiones = comparar_linea_base(resultados, linea_base, opciones.tolerancia)
+    if not regresiones:
+        print("✅ Sin regresiones respecto a la línea base")
+        return 0
+
+    print(f"🚨 Regresiones detectadas: {len(regresiones)}")
+    for regresion in regresiones:
+        print(f"   {regresion['zonas']} zonas / {regresion['etapa']}: "
+              f"{regresion['por_segundo']:,.0f} vs {regresion['por_segundo_base']:,.0f} llamadas/s "
+              f"({regresion['relacion']:.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,377 @@ Sistema básico que implementa las 4 funciones requeridas para
 demostrar programación modular.
 """
 
+import os
+import math
 import random
+import bisect
+import heapq
+import asyncio
+import time
+import contextlib
+import concurrent.futures
 import datetime
+from array import array
+
+try:
+    import numpy as np  # Opcional: solo requerido por la evaluación en lote
+except ImportError:
+    np = None
+
+
+class _RegistroCompacto:
+    """
+    Base de los registros compactos con __slots__
+    
+    Los atributos se leen directamente (registro.temperatura), pero
+    también se admite registro["temperatura"] y registro.get(...) para
+    que las funciones escritas para diccionarios sigan funcionando.
+    """
+    
+    __slots__ = ()
+    
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+    
+    def __setitem__(self, campo, valor):
+        setattr(self, campo, valor)
+    
+    def get(self, campo, defecto=None):
+        return getattr(self, campo, defecto)
+    
+    def keys(self):
+        return self.__slots__
+    
+    def __eq__(self, otro):
+        if type(otro) is not type(self):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(otro, c) for c in self.__slots__)
+    
+    def __repr__(self):
+        campos = ", ".join(f"{c}={getattr(self, c)!r}" for c in self.__slots__)
+        return f"{type(self).__name__}({campos})"
+
+
+class Zona(_RegistroCompacto):
+    """Estado de una zona (equivalente a los valores del diccionario `zonas`)"""
+    __slots__ = ("temperatura", "ocupacion", "objetivo")
+    
+    def __init__(self, temperatura, ocupacion, objetivo):
+        self.temperatura = temperatura
+        self.ocupacion = ocupacion
+        self.objetivo = objetivo
+
+
+class LecturaSensor(_RegistroCompacto):
+    """Lectura de sensor con timestamp en segundos desde la época"""
+    __slots__ = ("zona", "temperatura", "ocupacion", "hora", "timestamp")
+    
+    def __init__(self, zona, temperatura, ocupacion, hora, timestamp):
+        self.zona = zona
+        self.temperatura = temperatura
+        self.ocupacion = ocupacion
+        self.hora = hora
+        self.timestamp = timestamp
+
+
+class RegistroEnergia(_RegistroCompacto):
+    """Registro de consumo con timestamp en segundos desde la época"""
+    __slots__ = ("zona", "accion", "intensidad", "duracion", "consumo_kwh", "costo", "timestamp")
+    
+    def __init__(self, zona, accion, intensidad, duracion, consumo_kwh, costo, timestamp):
+        self.zona = zona
+        self.accion = accion
+        self.intensidad = intensidad
+        self.duracion = duracion
+        self.consumo_kwh = consumo_kwh
+        self.costo = costo
+        self.timestamp = timestamp
+
+
+_hora_cacheada = (None, 0)
+
+
+def instante_ciclo():
+    """
+    Función para capturar una única marca de tiempo por ciclo de control
+    
+    Returns:
+        float: Segundos desde la época, para pasar como `instante`
+    """
+    return time.time()
+
+
+def _hora_de(instante):
+    """Función auxiliar: hora local de un instante, calculada una vez por ciclo"""
+    global _hora_cacheada
+    if _hora_cacheada[0] != instante:
+        _hora_cacheada = (instante, time.localtime(instante).tm_hour)
+    return _hora_cacheada[1]
+
+
+class HistorialEnergia:
+    """
+    Historial de consumo energético almacenado por columnas
+    
+    Reemplaza la lista de diccionarios: cada campo vive en un arreglo
+    tipado y las zonas/acciones se guardan como códigos enteros. Mantiene
+    totales acumulados por zona y por acción, de modo que los resúmenes
+    no necesitan recorrer el historial.
+    
+    Sigue aceptando append(registro) e iteración de diccionarios, por lo
+    que puede usarse donde antes se usaba la lista.
+    """
+    
+    def __init__(self):
+        self._codigos_zona = {}
+        self._nombres_zona = []
+        self._codigos_accion = {}
+        self._nombres_accion = []
+        
+        self._zona = array("I")
+        self._accion = array("B")
+        self._intensidad = array("d")  # Admite intensidades fraccionarias
+        self._duracion = array("d")
+        self._consumo = array("d")
+        self._costo = array("d")
+        self._timestamp = array("d")  # Segundos desde la época
+        self._ordenado = True
+        
+        # Totales acumulados [kWh, costo] indexados por código
+        self._totales_zona = []
+        self._totales_accion = []
+        self.consumo_total = 0.0
+        self.costo_total = 0.0
+    
+    def _internar(self, valor, codigos, nombres, totales):
+        """Función auxiliar que devuelve el código entero de un nombre"""
+        codigo = codigos.get(valor)
+        if codigo is None:
+            codigo = len(nombres)
+            codigos[valor] = codigo
+            nombres.append(valor)
+            totales.append([0.0, 0.0])
+        return codigo
+    
+    def registrar(self, zona_id, accion, intensidad, duracion, consumo_kwh, costo, timestamp=None):
+        """
+        Agrega un registro de consumo al historial
+        
+        Args:
+            zona_id (str): Zona donde se aplicó la acción
+            accion (str): Tipo de acción (CALENTAR/ENFRIAR)
+            intensidad (int | float): Intensidad aplicada
+            duracion (float): Duración en horas
+            consumo_kwh (float): Consumo registrado
+            costo (float): Costo registrado
+            timestamp (datetime | float): Momento del registro (por defecto ahora)
+            
+        Rendimiento: O(1) amortizado
+        """
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        if isinstance(timestamp, datetime.datetime):
+            timestamp = timestamp.timestamp()
+        
+        codigo_zona = self._internar(zona_id, self._codigos_zona, self._nombres_zona, self._totales_zona)
+        codigo_accion = self._internar(accion, self._codigos_accion, self._nombres_accion, self._totales_accion)
+        
+        if self._timestamp and timestamp < self._timestamp[-1]:
+            self._ordenado = False
+        
+        self._zona.append(codigo_zona)
+        self._accion.append(codigo_accion)
+        self._intensidad.append(intensidad)
+        self._duracion.append(duracion)
+        self._consumo.append(consumo_kwh)
+        self._costo.append(costo)
+        self._timestamp.append(timestamp)
+        
+        # Actualizar totales acumulados
+        for totales in (self._totales_zona[codigo_zona], self._totales_accion[codigo_accion]):
+            totales[0] += consumo_kwh
+            totales[1] += costo
+        self.consumo_total += consumo_kwh
+        self.costo_total += costo
+    
+    def append(self, registro):
+        """Agrega un registro con el formato de registrar_consumo_energia"""
+        if type(registro) is RegistroEnergia:
+            self.registrar(registro.zona, registro.accion, registro.intensidad, registro.duracion,
+                           registro.consumo_kwh, registro.costo, registro.timestamp)
+            return
+        self.registrar(
+            registro["zona"], registro["accion"], registro["intensidad"],
+            registro["duracion"], registro["consumo_kwh"], registro["costo"],
+            registro.get("timestamp"),
+        )
+    
+    def _registro(self, indice):
+        """Función auxiliar que reconstruye el diccionario de un registro"""
+        intensidad = self._intensidad[indice]
+        return {
+            "zona": self._nombres_zona[self._zona[indice]],
+            "accion": self._nombres_accion[self._accion[indice]],
+            "intensidad": int(intensidad) if intensidad.is_integer() else intensidad,
+            "duracion": self._duracion[indice],
+            "consumo_kwh": self._consumo[indice],
+            "costo": self._costo[indice],
+            "timestamp": datetime.datetime.fromtimestamp(self._timestamp[indice])
+        }
+    
+    def __len__(self):
+        return len(self._consumo)
+    
+    def __iter__(self):
+        for indice in range(len(self)):
+            yield self._registro(indice)
+    
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._registro(i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice fuera del historial")
+        return self._registro(indice)
+    
+    def totales_zona(self, zona_id):
+        """
+        Totales acumulados de una zona
+        
+        Returns:
+            dict: consumo_kwh y costo de la zona (ceros si no existe)
+            
+        Rendimiento: O(1)
+        """
+        codigo = self._codigos_zona.get(zona_id)
+        consumo, costo = self._totales_zona[codigo] if codigo is not None else (0.0, 0.0)
+        return {"consumo_kwh": consumo, "costo": costo}
+    
+    def totales_accion(self, accion):
+        """
+        Totales acumulados de un tipo de acción
+        
+        Returns:
+            dict: consumo_kwh y costo de la acción (ceros si no existe)
+            
+        Rendimiento: O(1)
+        """
+        codigo = self._codigos_accion.get(accion)
+        consumo, costo = self._totales_accion[codigo] if codigo is not None else (0.0, 0.0)
+        return {"consumo_kwh": consumo, "costo": costo}
+    
+    def _indices_rango(self, desde, hasta):
+        """Función auxiliar que devuelve los índices con desde <= timestamp < hasta"""
+        if isinstance(desde, datetime.datetime):
+            desde = desde.timestamp()
+        if isinstance(hasta, datetime.datetime):
+            hasta = hasta.timestamp()
+        
+        if self._ordenado:
+            inicio = bisect.bisect_left(self._timestamp, desde)
+            fin = bisect.bisect_left(self._timestamp, hasta)
+            return range(inicio, fin)
+        # Registros fuera de orden: búsqueda lineal
+        return [i for i, t in enumerate(self._timestamp) if desde <= t < hasta]
+    
+    def rango(self, desde, hasta):
+        """
+        Registros entre dos instantes (desde inclusivo, hasta exclusivo)
+        
+        Args:
+            desde (datetime | float): Inicio del rango
+            hasta (datetime | float): Fin del rango
+            
+        Returns:
+            generator: Diccionarios de los registros del rango
+            
+        Rendimiento: O(log n + k) con búsqueda binaria
+        """
+        for indice in self._indices_rango(desde, hasta):
+            yield self._registro(indice)
+    
+    def totales_rango(self, desde, hasta):
+        """
+        Consumo y costo acumulados entre dos instantes
+        
+        Returns:
+            dict: consumo_kwh y costo del rango
+            
+        Rendimiento: O(log n + k)
+        """
+        indices = self._indices_rango(desde, hasta)
+        if isinstance(indices, range):
+            consumo = sum(self._consumo[indices.start:indices.stop])
+            costo = sum(self._costo[indices.start:indices.stop])
+        else:
+            consumo = sum(self._consumo[i] for i in indices)
+            costo = sum(self._costo[i] for i in indices)
+        return {"consumo_kwh": consumo, "costo": costo}
+    
+    def _reordenar(self, corte, orden):
+        """Función auxiliar que reescribe las columnas desde `corte` con el orden dado"""
+        for columna in (self._zona, self._accion, self._intensidad, self._duracion,
+                        self._consumo, self._costo, self._timestamp):
+            columna[corte:] = array(columna.typecode, (columna[i] for i in orden))
+    
+    def extender(self, otro):
+        """
+        Incorpora todos los registros de otro historial manteniendo el orden temporal
+        
+        Si los registros de `otro` se solapan en el tiempo con el final del
+        historial, solo la cola solapada se combina con ellos (fusión k-way
+        con heapq.merge), de modo que las consultas por rango siguen usando
+        búsqueda binaria.
+        
+        Args:
+            otro (HistorialEnergia): Historial a incorporar
+            
+        Rendimiento: O(m + k) donde m = registros de `otro` y k = registros
+        solapados; O(n log n) solo si alguno de los dos estaba desordenado
+        """
+        mapa_zona = [self._internar(nombre, self._codigos_zona, self._nombres_zona, self._totales_zona)
+                     for nombre in otro._nombres_zona]
+        mapa_accion = [self._internar(nombre, self._codigos_accion, self._nombres_accion, self._totales_accion)
+                       for nombre in otro._nombres_accion]
+        
+        registros_previos = len(self)
+        solapado = bool(otro._timestamp and self._timestamp and otro._timestamp[0] < self._timestamp[-1])
+        
+        self._zona.extend(array("I", (mapa_zona[codigo] for codigo in otro._zona)))
+        self._accion.extend(array("B", (mapa_accion[codigo] for codigo in otro._accion)))
+        self._intensidad.extend(otro._intensidad)
+        self._duracion.extend(otro._duracion)
+        self._consumo.extend(otro._consumo)
+        self._costo.extend(otro._costo)
+        self._timestamp.extend(otro._timestamp)
+        
+        # Los totales del otro historial se suman sin recorrer sus registros
+        for codigo, (consumo, costo) in enumerate(otro._totales_zona):
+            self._totales_zona[mapa_zona[codigo]][0] += consumo
+            self._totales_zona[mapa_zona[codigo]][1] += costo
+        for codigo, (consumo, costo) in enumerate(otro._totales_accion):
+            self._totales_accion[mapa_accion[codigo]][0] += consumo
+            self._totales_accion[mapa_accion[codigo]][1] += costo
+        self.consumo_total += otro.consumo_total
+        self.costo_total += otro.costo_total
+        
+        marcas = self._timestamp
+        if not (self._ordenado and otro._ordenado):
+            # Algún historial estaba desordenado: se ordena todo una sola vez
+            self._reordenar(0, sorted(range(len(marcas)), key=marcas.__getitem__))
+            self._ordenado = True
+        elif solapado:
+            corte = bisect.bisect_right(marcas, marcas[registros_previos], 0, registros_previos)
+            fusion = heapq.merge(
+                zip(marcas[corte:registros_previos], range(corte, registros_previos)),
+                zip(marcas[registros_previos:], range(registros_previos, len(marcas))),
+            )
+            self._reordenar(corte, [indice for _, indice in fusion])
+
 
 # Variables globales para simular el estado del sistema
 zonas = {
@@ -16,30 +385,119 @@ zonas = {
     "zona_3": {"temperatura": 20.0, "ocupacion": 0, "objetivo": 23.0}
 }
 
-historial_energia = []
+historial_energia = HistorialEnergia()  # Historial por columnas con totales acumulados
+receptores_consumo = []  # Funciones notificadas con cada registro de consumo
+
+# Parámetros del modelo de confort (la tabla de consignas se invalida si cambian)
+TEMPERATURA_BASE = 22.0         # Temperatura base de confort
+FACTOR_OCUPACION = 0.2          # °C menos por persona
+AJUSTE_NOCHE = -2.0             # 22h-6h
+AJUSTE_TRABAJO = 0.0            # 9h-17h
+AJUSTE_TRANSICION = -1.0        # Resto de horas
+UMBRAL_EXTERIOR = 15            # Diferencia exterior que activa la compensación
+AJUSTE_EXTERIOR = 1.0
+TEMPERATURA_MINIMA = 18.0
+TEMPERATURA_MAXIMA = 26.0
+
+
+# Modo de salida de las funciones del módulo
+MODO_CONSOLA = "consola"          # Mensajes formateados con print (por defecto)
+MODO_EVENTOS = "eventos"          # Eventos estructurados en lista o callback
+MODO_SILENCIOSO = "silencioso"    # Sin salida: las funciones solo devuelven datos
+
+_PLANTILLAS_SALIDA = {
+    "lectura_sensor": "📊 Sensor {zona}: {temperatura}°C, {ocupacion} personas",
+    "temperatura_optima": "🎯 Temperatura óptima para {zona}: {temperatura}°C",
+    "temperatura_estable": "✅ {zona}: Temperatura estable ({temperatura}°C)",
+    "comando_hvac": "🔧 COMANDO: {zona} - {accion} intensidad {intensidad}\n"
+                    "   Objetivo: {actual}°C → {objetivo}°C",
+    "consumo_registrado": "⚡ Consumo registrado: {consumo_kwh} kWh - ${costo}",
+    "despacho_bus": "🔧 BUS HVAC: {comandos} comandos",
+    "comando_bus": "   {zona} - {accion} intensidad {intensidad}",
+    "benchmark_consignas": "⏱️  Consignas para {zonas} zonas:\n"
+                           "   Original: {original_s:.3f} s\n"
+                           "   Tabla: {tabla_s:.3f} s (x{aceleracion:.1f}, {entradas_tabla} entradas)",
+    "benchmark_campus": "⏱️  Campus de {zonas} zonas con {procesos} procesos: "
+                        "{tiempo_s:.2f} s ({zonas_por_s:,.0f} zonas/s, x{escalado:.1f})",
+    "benchmark_sondeo": "⏱️  Sondeo de {zonas} zonas ({latencia_ms:.0f} ms por lectura):\n"
+                        "   Secuencial: {secuencial_s:.3f} s\n"
+                        "   Asíncrono: {asincrono_s:.3f} s (x{aceleracion:.1f})",
+}
+
+_modo_salida = MODO_CONSOLA
+_receptor_eventos = None
+eventos_salida = []  # Eventos acumulados en MODO_EVENTOS sin callback
 
 
-def leer_sensores_temperatura(zona_id):
+def configurar_salida(modo, receptor=None):
     """
-    Función para leer datos de sensores de temperatura
+    Procedimiento para seleccionar el modo de salida del módulo
     
     Args:
-        zona_id (str): Identificador de la zona
-        
-    Returns:
-        dict: Datos del sensor (temperatura, ocupación, hora)
-        
-    Rendimiento: O(1) - Acceso directo por clave
+        modo (str): MODO_CONSOLA, MODO_EVENTOS o MODO_SILENCIOSO
+        receptor (callable): En MODO_EVENTOS, función que recibe cada
+            evento; si es None los eventos se guardan en eventos_salida
+    """
+    global _modo_salida, _receptor_eventos
+    if modo not in (MODO_CONSOLA, MODO_EVENTOS, MODO_SILENCIOSO):
+        raise ValueError(f"Modo de salida desconocido: {modo}")
+    _modo_salida = modo
+    _receptor_eventos = receptor
+
+
+@contextlib.contextmanager
+def salida_temporal(modo, receptor=None):
+    """Cambia el modo de salida dentro de un bloque with y luego lo restaura"""
+    anterior = (_modo_salida, _receptor_eventos)
+    configurar_salida(modo, receptor)
+    try:
+        yield
+    finally:
+        configurar_salida(*anterior)
+
+
+def _emitir(tipo, **datos):
+    """
+    Función auxiliar que publica un evento según el modo de salida
+    
+    Las funciones comprueban `_modo_salida != MODO_SILENCIOSO` antes de
+    llamarla, de modo que en modo silencioso no se construye ningún dato.
+    """
+    if _modo_salida == MODO_CONSOLA:
+        print(_PLANTILLAS_SALIDA[tipo].format(**datos))
+    elif _modo_salida == MODO_EVENTOS:
+        datos["tipo"] = tipo
+        if _receptor_eventos is not None:
+            _receptor_eventos(datos)
+        else:
+            eventos_salida.append(datos)
+
+
+def _simular_lectura_sensor(zona_id, instante=None, estado_zonas=None, generador=random):
     """
-    if zona_id not in zonas:
+    Función auxiliar que genera una lectura simulada sin imprimir
+    
+    estado_zonas y generador permiten leer de un conjunto de zonas propio
+    (por defecto el diccionario global `zonas` y el módulo random).
+    """
+    zona = (zonas if estado_zonas is None else estado_zonas).get(zona_id)
+    if zona is None:
         return None
     
     # Simular lectura de sensores con variación aleatoria
-    zona = zonas[zona_id]
-    temperatura_actual = zona["temperatura"] + random.uniform(-1, 1)
-    ocupacion_actual = zona["ocupacion"] + random.randint(-2, 3)
+    if type(zona) is Zona:
+        temperatura_actual = zona.temperatura + generador.uniform(-1, 1)
+        ocupacion_actual = zona.ocupacion + generador.randint(-2, 3)
+    else:
+        temperatura_actual = zona["temperatura"] + generador.uniform(-1, 1)
+        ocupacion_actual = zona["ocupacion"] + generador.randint(-2, 3)
     ocupacion_actual = max(0, ocupacion_actual)  # No puede ser negativa
     
+    if instante is not None:
+        # Registro compacto con la marca de tiempo del ciclo
+        return LecturaSensor(zona_id, round(temperatura_actual, 1), ocupacion_actual,
+                             _hora_de(instante), instante)
+    
     datos_sensor = {
         "zona": zona_id,
         "temperatura": round(temperatura_actual, 1),
@@ -47,8 +505,30 @@ def leer_sensores_temperatura(zona_id):
         "hora": datetime.datetime.now().hour,
         "timestamp": datetime.datetime.now()
     }
+    return datos_sensor
+
+
+def leer_sensores_temperatura(zona_id, instante=None):
+    """
+    Función para leer datos de sensores de temperatura
+    
+    Args:
+        zona_id (str): Identificador de la zona
+        instante (float): Marca de tiempo del ciclo (instante_ciclo()); si
+            se indica, se devuelve un LecturaSensor compacto en lugar de dict
+        
+    Returns:
+        dict | LecturaSensor: Datos del sensor (temperatura, ocupación, hora)
+        
+    Rendimiento: O(1) - Acceso directo por clave
+    """
+    datos_sensor = _simular_lectura_sensor(zona_id, instante)
+    if datos_sensor is None:
+        return None
     
-    print(f"📊 Sensor {zona_id}: {datos_sensor['temperatura']}°C, {datos_sensor['ocupacion']} personas")
+    if _modo_salida != MODO_SILENCIOSO:
+        _emitir("lectura_sensor", zona=zona_id, temperatura=datos_sensor["temperatura"],
+                ocupacion=datos_sensor["ocupacion"])
     return datos_sensor
 
 
@@ -57,7 +537,7 @@ def calcular_temperatura_optima(datos_sensor, temperatura_exterior):
     Función para calcular la temperatura óptima en cada zona
     
     Args:
-        datos_sensor (dict): Datos del sensor de la zona
+        datos_sensor (dict | LecturaSensor): Datos del sensor de la zona
         temperatura_exterior (float): Temperatura exterior
         
     Returns:
@@ -65,35 +545,194 @@ def calcular_temperatura_optima(datos_sensor, temperatura_exterior):
         
     Rendimiento: O(1) - Cálculos aritméticos simples
     """
-    temperatura_base = 22.0  # Temperatura base de confort
+    temperatura_base = TEMPERATURA_BASE  # Temperatura base de confort
+    
+    if type(datos_sensor) is LecturaSensor:
+        ocupacion, hora = datos_sensor.ocupacion, datos_sensor.hora
+    else:
+        ocupacion, hora = datos_sensor["ocupacion"], datos_sensor["hora"]
     
     # Ajuste por ocupación (más personas = más calor)
-    ajuste_ocupacion = datos_sensor["ocupacion"] * 0.2
+    ajuste_ocupacion = ocupacion * FACTOR_OCUPACION
     
     # Ajuste por horario (reducir temperatura en horas de menor actividad)
-    hora = datos_sensor["hora"]
     if 22 <= hora or hora <= 6:  # Noche
-        ajuste_horario = -2.0
+        ajuste_horario = AJUSTE_NOCHE
     elif 9 <= hora <= 17:  # Horas de trabajo
-        ajuste_horario = 0.0
+        ajuste_horario = AJUSTE_TRABAJO
     else:  # Transición
-        ajuste_horario = -1.0
+        ajuste_horario = AJUSTE_TRANSICION
     
     # Ajuste por temperatura exterior
     diferencia_exterior = abs(temperatura_base - temperatura_exterior)
-    if diferencia_exterior > 15:
-        ajuste_exterior = 1.0 if temperatura_exterior < temperatura_base else -1.0
+    if diferencia_exterior > UMBRAL_EXTERIOR:
+        ajuste_exterior = AJUSTE_EXTERIOR if temperatura_exterior < temperatura_base else -AJUSTE_EXTERIOR
     else:
         ajuste_exterior = 0.0
     
     # Calcular temperatura óptima
     temp_optima = temperatura_base - ajuste_ocupacion + ajuste_horario + ajuste_exterior
-    temp_optima = max(18.0, min(26.0, temp_optima))  # Limitar rango
+    temp_optima = max(TEMPERATURA_MINIMA, min(TEMPERATURA_MAXIMA, temp_optima))  # Limitar rango
     
-    print(f"🎯 Temperatura óptima para {datos_sensor['zona']}: {temp_optima}°C")
+    if _modo_salida != MODO_SILENCIOSO:
+        _emitir("temperatura_optima", zona=datos_sensor["zona"], temperatura=temp_optima)
     return round(temp_optima, 1)
 
 
+# Tabla de consignas memorizada: (ocupación, franja horaria, compensación exterior) -> °C
+FRANJA_NOCHE, FRANJA_TRABAJO, FRANJA_TRANSICION = 0, 1, 2
+_FRANJA_POR_HORA = tuple(
+    FRANJA_NOCHE if (22 <= hora or hora <= 6)
+    else FRANJA_TRABAJO if 9 <= hora <= 17
+    else FRANJA_TRANSICION
+    for hora in range(24)
+)
+_tabla_consignas = {}
+_firma_tabla_consignas = None
+
+
+def _parametros_confort():
+    """Función auxiliar con los parámetros de los que depende la tabla"""
+    return (TEMPERATURA_BASE, FACTOR_OCUPACION, AJUSTE_NOCHE, AJUSTE_TRABAJO, AJUSTE_TRANSICION,
+            UMBRAL_EXTERIOR, AJUSTE_EXTERIOR, TEMPERATURA_MINIMA, TEMPERATURA_MAXIMA)
+
+
+def _validar_tabla_consignas():
+    """Función auxiliar que vacía la tabla si algún parámetro cambió"""
+    global _firma_tabla_consignas
+    firma = _parametros_confort()
+    if firma != _firma_tabla_consignas:
+        _tabla_consignas.clear()
+        _firma_tabla_consignas = firma
+
+
+def _compensacion_exterior(temperatura_exterior):
+    """Función auxiliar: -1, 0 o 1 según la compensación por clima exterior"""
+    if abs(TEMPERATURA_BASE - temperatura_exterior) > UMBRAL_EXTERIOR:
+        return 1 if temperatura_exterior < TEMPERATURA_BASE else -1
+    return 0
+
+
+def _consigna(ocupacion, franja, compensacion):
+    """Función auxiliar que consulta o calcula una entrada de la tabla"""
+    clave = (ocupacion, franja, compensacion)
+    valor = _tabla_consignas.get(clave)
+    if valor is None:
+        ajuste_horario = (AJUSTE_NOCHE, AJUSTE_TRABAJO, AJUSTE_TRANSICION)[franja]
+        temp_optima = TEMPERATURA_BASE - ocupacion * FACTOR_OCUPACION + ajuste_horario + compensacion * AJUSTE_EXTERIOR
+        valor = round(max(TEMPERATURA_MINIMA, min(TEMPERATURA_MAXIMA, temp_optima)), 1)
+        _tabla_consignas[clave] = valor
+    return valor
+
+
+def temperatura_optima_tabla(datos_sensor, temperatura_exterior):
+    """
+    Función equivalente a calcular_temperatura_optima usando la tabla memorizada
+    
+    Args:
+        datos_sensor (dict): Datos del sensor de la zona
+        temperatura_exterior (float): Temperatura exterior
+        
+    Returns:
+        float: Temperatura óptima (mismo valor que la función original)
+        
+    Rendimiento: O(1) - Consulta en diccionario
+    """
+    _validar_tabla_consignas()
+    return _consigna(datos_sensor["ocupacion"], _FRANJA_POR_HORA[datos_sensor["hora"]],
+                     _compensacion_exterior(temperatura_exterior))
+
+
+def temperaturas_optimas_tabla(lecturas, temperatura_exterior):
+    """
+    Función para calcular la consigna de muchas zonas con la tabla memorizada
+    
+    La validación de parámetros y la compensación exterior se calculan
+    una sola vez por ciclo; cada zona solo hace una consulta.
+    
+    Args:
+        lecturas (iterable): Datos de sensor de cada zona
+        temperatura_exterior (float): Temperatura exterior
+        
+    Returns:
+        dict: Temperatura óptima por zona
+        
+    Rendimiento: O(n) con una consulta O(1) por zona
+    """
+    _validar_tabla_consignas()
+    compensacion = _compensacion_exterior(temperatura_exterior)
+    franjas = _FRANJA_POR_HORA
+    return {
+        datos["zona"]: _consigna(datos["ocupacion"], franjas[datos["hora"]], compensacion)
+        for datos in lecturas
+    }
+
+
+def benchmark_tabla_consignas(num_zonas=100000, temperatura_exterior=28.0):
+    """
+    Compara calcular_temperatura_optima con la tabla memorizada
+    
+    Args:
+        num_zonas (int): Lecturas simuladas
+        temperatura_exterior (float): Temperatura exterior del ciclo
+        
+    Returns:
+        dict: Tiempos de ambos métodos y aceleración obtenida
+    """
+    generador = random.Random(42)
+    lecturas = [
+        {"zona": f"zona_{i}", "ocupacion": generador.randint(0, 40), "hora": generador.randint(0, 23)}
+        for i in range(num_zonas)
+    ]
+    
+    # Se mide solo el cálculo, sin la salida por consola de cada zona
+    with salida_temporal(MODO_SILENCIOSO):
+        inicio = time.perf_counter()
+        originales = {datos["zona"]: calcular_temperatura_optima(datos, temperatura_exterior) for datos in lecturas}
+        tiempo_original = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    tabla = temperaturas_optimas_tabla(lecturas, temperatura_exterior)
+    tiempo_tabla = time.perf_counter() - inicio
+    
+    resultado = {
+        "zonas": num_zonas,
+        "original_s": tiempo_original,
+        "tabla_s": tiempo_tabla,
+        "aceleracion": tiempo_original / tiempo_tabla if tiempo_tabla else float("inf"),
+        "resultados_iguales": originales == tabla,
+        "entradas_tabla": len(_tabla_consignas)
+    }
+    
+    if _modo_salida != MODO_SILENCIOSO:
+        _emitir("benchmark_consignas", **resultado)
+    return resultado
+
+
+def _comando_ajuste(temperatura_objetivo, temperatura_actual):
+    """Función auxiliar: (accion, intensidad) del ajuste, o None si la diferencia es menor a 0.5°C"""
+    diferencia = temperatura_objetivo - temperatura_actual
+    if abs(diferencia) < 0.5:
+        return None
+    if diferencia > 0:
+        return "CALENTAR", min(10, int(diferencia * 2))
+    return "ENFRIAR", min(10, int(abs(diferencia) * 2))
+
+
+def _calcular_consumo(accion, intensidad, duracion_horas):
+    """Función auxiliar: (kWh, costo) redondeados de una acción HVAC"""
+    # Calcular consumo basado en la acción
+    consumo_por_intensidad = {
+        "CALENTAR": 2.0,  # kW por intensidad
+        "ENFRIAR": 2.5    # kW por intensidad
+    }
+    
+    consumo_base = consumo_por_intensidad.get(accion, 1.0)
+    consumo_total_kwh = consumo_base * intensidad * duracion_horas
+    costo_energia = consumo_total_kwh * 0.15  # $0.15 por kWh
+    return round(consumo_total_kwh, 2), round(costo_energia, 2)
+
+
 def enviar_ajuste_temperatura(zona_id, temperatura_objetivo, temperatura_actual):
     """
     Procedimiento para enviar señales de ajuste al sistema de calefacción/refrigeración
@@ -103,32 +742,36 @@ def enviar_ajuste_temperatura(zona_id, temperatura_objetivo, temperatura_actual)
         temperatura_objetivo (float): Temperatura deseada
         temperatura_actual (float): Temperatura actual
         
+    Returns:
+        tuple: (accion, intensidad) del comando enviado, o None si la
+        temperatura está estable
+        
     Rendimiento: O(1) - Operación de envío simple
     """
-    diferencia = temperatura_objetivo - temperatura_actual
-    
     # Solo enviar comando si la diferencia es significativa
-    if abs(diferencia) < 0.5:
-        print(f"✅ {zona_id}: Temperatura estable ({temperatura_actual}°C)")
-        return
-    
-    if diferencia > 0:
-        accion = "CALENTAR"
-        intensidad = min(10, int(diferencia * 2))
-    else:
-        accion = "ENFRIAR"
-        intensidad = min(10, int(abs(diferencia) * 2))
+    comando = _comando_ajuste(temperatura_objetivo, temperatura_actual)
+    if comando is None:
+        if _modo_salida != MODO_SILENCIOSO:
+            _emitir("temperatura_estable", zona=zona_id, temperatura=temperatura_actual)
+        return None
+    accion, intensidad = comando
     
     # Simular envío de comando al sistema HVAC
-    print(f"🔧 COMANDO: {zona_id} - {accion} intensidad {intensidad}")
-    print(f"   Objetivo: {temperatura_actual}°C → {temperatura_objetivo}°C")
+    if _modo_salida != MODO_SILENCIOSO:
+        _emitir("comando_hvac", zona=zona_id, accion=accion, intensidad=intensidad,
+                actual=temperatura_actual, objetivo=temperatura_objetivo)
     
     # Actualizar temperatura de la zona (simulación)
-    if zona_id in zonas:
-        zonas[zona_id]["temperatura"] = temperatura_objetivo
+    zona = zonas.get(zona_id)
+    if type(zona) is Zona:
+        zona.temperatura = temperatura_objetivo
+    elif zona is not None:
+        zona["temperatura"] = temperatura_objetivo
+    
+    return accion, intensidad
 
 
-def registrar_consumo_energia(zona_id, accion, intensidad, duracion_horas):
+def registrar_consumo_energia(zona_id, accion, intensidad, duracion_horas, instante=None):
     """
     Función para registrar y analizar el consumo de energía
     
@@ -137,37 +780,780 @@ def registrar_consumo_energia(zona_id, accion, intensidad, duracion_horas):
         accion (str): Tipo de acción (CALENTAR/ENFRIAR)
         intensidad (int): Intensidad aplicada (1-10)
         duracion_horas (float): Duración en horas
+        instante (float): Marca de tiempo del ciclo; si se indica, se
+            devuelve un RegistroEnergia compacto en lugar de dict
         
     Returns:
-        dict: Registro del consumo de energía
+        dict | RegistroEnergia: Registro del consumo de energía
         
     Rendimiento: O(1) para registro individual
     """
-    # Calcular consumo basado en la acción
-    consumo_por_intensidad = {
-        "CALENTAR": 2.0,  # kW por intensidad
-        "ENFRIAR": 2.5    # kW por intensidad
-    }
+    consumo_kwh, costo = _calcular_consumo(accion, intensidad, duracion_horas)
     
-    consumo_base = consumo_por_intensidad.get(accion, 1.0)
-    consumo_total_kwh = consumo_base * intensidad * duracion_horas
-    costo_energia = consumo_total_kwh * 0.15  # $0.15 por kWh
+    if instante is not None:
+        registro = RegistroEnergia(zona_id, accion, intensidad, duracion_horas,
+                                   consumo_kwh, costo, instante)
+    else:
+        registro = {
+            "zona": zona_id,
+            "accion": accion,
+            "intensidad": intensidad,
+            "duracion": duracion_horas,
+            "consumo_kwh": consumo_kwh,
+            "costo": costo,
+            "timestamp": datetime.datetime.now()
+        }
     
-    registro = {
-        "zona": zona_id,
+    # Guardar en historial
+    historial_energia.append(registro)
+    for receptor in receptores_consumo:
+        receptor(registro)
+    
+    if _modo_salida != MODO_SILENCIOSO:
+        _emitir("consumo_registrado", zona=zona_id, consumo_kwh=registro["consumo_kwh"],
+                costo=registro["costo"])
+    return registro
+
+
+# Ventanas de analítica: nombre -> (duración en segundos, tamaño de cubeta en segundos)
+VENTANAS_ANALITICA = {
+    "15min": (900, 60),
+    "1h": (3600, 300),
+    "24h": (86400, 3600)
+}
+INTENSIDAD_MAXIMA = 10
+
+
+class _VentanaDeslizante:
+    """
+    Buffer circular de cubetas de tiempo para una zona y una ventana
+    
+    Cada cubeta acumula kWh, costo y un histograma de intensidades
+    (0-10, redondeadas al entero más cercano). La memoria es fija: duración / paso cubetas por ventana.
+    La resolución temporal es de una cubeta.
+    """
+    
+    __slots__ = ("paso", "num_cubetas", "cubetas", "consumo", "costo", "histograma")
+    
+    def __init__(self, duracion, paso):
+        self.paso = paso
+        self.num_cubetas = max(1, int(duracion // paso))
+        self.cubetas = array("q", [-1] * self.num_cubetas)  # Número absoluto de cada cubeta
+        self.consumo = array("d", [0.0] * self.num_cubetas)
+        self.costo = array("d", [0.0] * self.num_cubetas)
+        self.histograma = array("I", [0] * (self.num_cubetas * (INTENSIDAD_MAXIMA + 1)))
+    
+    def agregar(self, instante, consumo_kwh, costo, intensidad):
+        """Acumula un registro en la cubeta de su instante. O(1)"""
+        cubeta = int(instante // self.paso)
+        indice = cubeta % self.num_cubetas
+        base = indice * (INTENSIDAD_MAXIMA + 1)
+        
+        if self.cubetas[indice] != cubeta:
+            if cubeta < self.cubetas[indice]:
+                return  # Registro más antiguo que la ventana actual
+            # Reutilizar la cubeta vencida
+            self.cubetas[indice] = cubeta
+            self.consumo[indice] = 0.0
+            self.costo[indice] = 0.0
+            for posicion in range(base, base + INTENSIDAD_MAXIMA + 1):
+                self.histograma[posicion] = 0
+        
+        self.consumo[indice] += consumo_kwh
+        self.costo[indice] += costo
+        # Redondeo al más cercano (x.5 hacia arriba): truncar sesgaría p50/p95 hacia abajo
+        self.histograma[base + max(0, min(INTENSIDAD_MAXIMA, int(intensidad + 0.5)))] += 1
+    
+    def resumen(self, instante):
+        """Totales e histograma de las cubetas vigentes. O(cubetas)"""
+        cubeta_actual = int(instante // self.paso)
+        consumo = 0.0
+        costo = 0.0
+        histograma = [0] * (INTENSIDAD_MAXIMA + 1)
+        
+        for indice, cubeta in enumerate(self.cubetas):
+            if cubeta_actual - self.num_cubetas < cubeta <= cubeta_actual:
+                consumo += self.consumo[indice]
+                costo += self.costo[indice]
+                base = indice * (INTENSIDAD_MAXIMA + 1)
+                for intensidad in range(INTENSIDAD_MAXIMA + 1):
+                    histograma[intensidad] += self.histograma[base + intensidad]
+        return consumo, costo, histograma
+
+
+def _percentil_histograma(histograma, percentil):
+    """Función auxiliar: percentil por rango más cercano sobre un histograma"""
+    total = sum(histograma)
+    if total == 0:
+        return None
+    rango = max(1, math.ceil(percentil / 100 * total))
+    acumulado = 0
+    for valor, cantidad in enumerate(histograma):
+        acumulado += cantidad
+        if acumulado >= rango:
+            return valor
+    return len(histograma) - 1
+
+
+class AgregadorEnergia:
+    """
+    Analítica de energía en streaming por zona
+    
+    Recibe cada registro de registrar_consumo_energia (por ejemplo con
+    suscribir_agregador()) y mantiene, para cada zona, buffers circulares
+    por ventana (15 min, 1 h y 24 h por defecto). Las consultas de kWh,
+    costo y percentiles de intensidad no recorren historial_energia.
+    """
+    
+    def __init__(self, ventanas=None):
+        """
+        Args:
+            ventanas (dict): nombre -> (duración, paso) en segundos
+        """
+        self.ventanas = dict(ventanas or VENTANAS_ANALITICA)
+        self._zonas = {}
+        self.ultimo_instante = 0.0
+    
+    def registrar(self, registro):
+        """
+        Incorpora un registro de consumo
+        
+        Args:
+            registro (dict): Registro con zona, intensidad, consumo_kwh,
+                costo y timestamp
+                
+        Rendimiento: O(ventanas)
+        """
+        instante = registro["timestamp"]
+        if isinstance(instante, datetime.datetime):
+            instante = instante.timestamp()
+        
+        ventanas_zona = self._zonas.get(registro["zona"])
+        if ventanas_zona is None:
+            ventanas_zona = {
+                nombre: _VentanaDeslizante(duracion, paso)
+                for nombre, (duracion, paso) in self.ventanas.items()
+            }
+            self._zonas[registro["zona"]] = ventanas_zona
+        
+        for ventana in ventanas_zona.values():
+            ventana.agregar(instante, registro["consumo_kwh"], registro["costo"], registro["intensidad"])
+        self.ultimo_instante = max(self.ultimo_instante, instante)
+    
+    def consultar(self, zona_id, ventana="1h", instante=None):
+        """
+        Consumo de una zona en una ventana deslizante
+        
+        Args:
+            zona_id (str): Zona a consultar
+            ventana (str): Nombre de la ventana ("15min", "1h", "24h")
+            instante (datetime | float): Final de la ventana (por defecto el último registro)
+            
+        Returns:
+            dict: consumo_kwh, costo, registros, intensidad_p50 e intensidad_p95
+            
+        Rendimiento: O(cubetas de la ventana), independiente del historial
+        """
+        if ventana not in self.ventanas:
+            raise ValueError(f"Ventana desconocida: {ventana}")
+        if instante is None:
+            instante = self.ultimo_instante
+        elif isinstance(instante, datetime.datetime):
+            instante = instante.timestamp()
+        
+        ventanas_zona = self._zonas.get(zona_id)
+        if ventanas_zona is None:
+            consumo, costo, histograma = 0.0, 0.0, [0] * (INTENSIDAD_MAXIMA + 1)
+        else:
+            consumo, costo, histograma = ventanas_zona[ventana].resumen(instante)
+        
+        return {
+            "zona": zona_id,
+            "ventana": ventana,
+            "consumo_kwh": round(consumo, 2),
+            "costo": round(costo, 2),
+            "registros": sum(histograma),
+            "intensidad_p50": _percentil_histograma(histograma, 50),
+            "intensidad_p95": _percentil_histograma(histograma, 95)
+        }
+    
+    def resumen(self, ventana="1h", instante=None):
+        """
+        Consumo de todas las zonas en una ventana
+        
+        Returns:
+            list: Resultado de consultar() para cada zona con registros
+            
+        Rendimiento: O(zonas × cubetas)
+        """
+        return [self.consultar(zona_id, ventana, instante) for zona_id in self._zonas]
+
+
+def suscribir_agregador(agregador=None):
+    """
+    Función para conectar un AgregadorEnergia a registrar_consumo_energia
+    
+    Args:
+        agregador (AgregadorEnergia): Agregador existente o None para crear uno
+        
+    Returns:
+        AgregadorEnergia: Agregador que recibirá cada nuevo registro
+    """
+    agregador = agregador or AgregadorEnergia()
+    receptores_consumo.append(agregador.registrar)
+    return agregador
+
+
+# Códigos de acción HVAC usados por la evaluación en lote
+ACCIONES_HVAC = ("ESTABLE", "CALENTAR", "ENFRIAR")
+ACCION_ESTABLE, ACCION_CALENTAR, ACCION_ENFRIAR = 0, 1, 2
+
+
+def evaluar_zonas_lote(temperaturas, ocupaciones, horas, temperatura_exterior):
+    """
+    Función para evaluar muchas zonas a la vez con operaciones vectorizadas
+    
+    Aplica las mismas reglas que calcular_temperatura_optima y
+    enviar_ajuste_temperatura, pero sobre arreglos de N zonas y sin
+    imprimir ni modificar el estado global.
+    
+    Args:
+        temperaturas (array): Temperatura actual de cada zona
+        ocupaciones (array): Número de personas en cada zona
+        horas (array): Hora del día (0-23) de cada lectura
+        temperatura_exterior (float | array): Temperatura exterior
+        
+    Returns:
+        dict: Arreglos "temperatura_optima", "accion" (códigos de
+        ACCIONES_HVAC) e "intensidad" (0 cuando la zona está estable)
+        
+    Rendimiento: O(N) vectorizado con NumPy
+    """
+    if np is None:
+        raise ImportError("evaluar_zonas_lote requiere NumPy (pip install numpy)")
+    
+    temperatura_base = TEMPERATURA_BASE
+    temperaturas = np.asarray(temperaturas, dtype=np.float64)
+    ocupaciones = np.asarray(ocupaciones, dtype=np.float64)
+    horas = np.asarray(horas)
+    temperatura_exterior = np.asarray(temperatura_exterior, dtype=np.float64)
+    
+    # Ajuste por ocupación
+    ajuste_ocupacion = ocupaciones * FACTOR_OCUPACION
+    
+    # Ajuste por horario: noche, trabajo o transición
+    noche = (horas >= 22) | (horas <= 6)
+    trabajo = (horas >= 9) & (horas <= 17)
+    ajuste_horario = np.where(noche, AJUSTE_NOCHE, np.where(trabajo, AJUSTE_TRABAJO, AJUSTE_TRANSICION))
+    
+    # Ajuste por temperatura exterior
+    diferencia_exterior = np.abs(temperatura_base - temperatura_exterior)
+    ajuste_exterior = np.where(
+        diferencia_exterior > UMBRAL_EXTERIOR,
+        np.where(temperatura_exterior < temperatura_base, AJUSTE_EXTERIOR, -AJUSTE_EXTERIOR),
+        0.0,
+    )
+    
+    temp_optima = temperatura_base - ajuste_ocupacion + ajuste_horario + ajuste_exterior
+    temp_optima = np.round(np.clip(temp_optima, TEMPERATURA_MINIMA, TEMPERATURA_MAXIMA), 1)
+    
+    # Acción HVAC con la misma banda muerta de 0.5°C
+    diferencia = temp_optima - temperaturas
+    magnitud = np.abs(diferencia)
+    estable = magnitud < 0.5
+    accion = np.where(diferencia > 0, ACCION_CALENTAR, ACCION_ENFRIAR).astype(np.int8)
+    accion[estable] = ACCION_ESTABLE
+    intensidad = np.minimum(10, (magnitud * 2).astype(np.int64))
+    intensidad[estable] = 0
+    
+    return {
+        "temperatura_optima": temp_optima,
         "accion": accion,
         "intensidad": intensidad,
-        "duracion": duracion_horas,
-        "consumo_kwh": round(consumo_total_kwh, 2),
-        "costo": round(costo_energia, 2),
-        "timestamp": datetime.datetime.now()
     }
+
+
+class SensorSimulado:
+    """
+    Sensor de red simulado con latencia configurable
     
-    # Guardar en historial
-    historial_energia.append(registro)
+    Cada lectura tarda `latencia` segundos más una variación aleatoria
+    de hasta `variacion` segundos, imitando el viaje de ida y vuelta al
+    controlador de la zona. Permite medir el sondeo sin hardware real.
+    """
     
-    print(f"⚡ Consumo registrado: {registro['consumo_kwh']} kWh - ${registro['costo']}")
-    return registro
+    def __init__(self, latencia=0.05, variacion=0.0, estado_zonas=None):
+        """
+        Args:
+            latencia (float): Demora fija de cada lectura en segundos
+            variacion (float): Demora aleatoria adicional máxima en segundos
+            estado_zonas (dict): Zonas que lee el sensor (por defecto el global `zonas`)
+        """
+        self.latencia = latencia
+        self.variacion = variacion
+        self.estado_zonas = estado_zonas
+    
+    def _demora(self):
+        return self.latencia + random.uniform(0, self.variacion)
+    
+    async def leer(self, zona_id):
+        """Lectura asíncrona de una zona"""
+        await asyncio.sleep(self._demora())
+        return _simular_lectura_sensor(zona_id, estado_zonas=self.estado_zonas)
+    
+    def leer_bloqueante(self, zona_id):
+        """Lectura bloqueante de una zona (equivalente al bucle secuencial)"""
+        time.sleep(self._demora())
+        return _simular_lectura_sensor(zona_id, estado_zonas=self.estado_zonas)
+
+
+class MotorSondeoSensores:
+    """
+    Motor de sondeo asíncrono de sensores de temperatura
+    
+    Lee todas las zonas en paralelo con un límite de concurrencia y un
+    tiempo máximo por zona. La última lectura válida de cada zona queda
+    en caché, de modo que el optimizador siempre trabaja con la
+    instantánea más reciente aunque algún sensor no responda a tiempo.
+    """
+    
+    def __init__(self, sensor=None, concurrencia=64, timeout=1.0):
+        """
+        Args:
+            sensor: Objeto con un método asíncrono leer(zona_id)
+            concurrencia (int): Máximo de lecturas simultáneas
+            timeout (float): Tiempo máximo por lectura en segundos
+        """
+        self.sensor = sensor or SensorSimulado()
+        self.concurrencia = concurrencia
+        self.timeout = timeout
+        self.ultimas_lecturas = {}
+        self.lecturas_exitosas = 0
+        self.lecturas_vencidas = 0
+        self.lecturas_fallidas = 0
+    
+    async def _leer_zona(self, zona_id, semaforo):
+        """Función auxiliar que lee una zona respetando límite y timeout"""
+        async with semaforo:
+            try:
+                datos = await asyncio.wait_for(self.sensor.leer(zona_id), self.timeout)
+            except asyncio.TimeoutError:
+                self.lecturas_vencidas += 1
+                return
+            except Exception:
+                self.lecturas_fallidas += 1
+                return
+        
+        if datos is None:
+            self.lecturas_fallidas += 1
+            return
+        self.lecturas_exitosas += 1
+        self.ultimas_lecturas[zona_id] = datos
+    
+    async def sondear(self, zona_ids=None):
+        """
+        Lee todas las zonas de forma concurrente
+        
+        Args:
+            zona_ids (iterable): Zonas a leer (por defecto todas las de `zonas`)
+            
+        Returns:
+            dict: Instantánea con la última lectura conocida de cada zona
+            
+        Rendimiento: O(n / concurrencia) viajes de ida y vuelta
+        """
+        if zona_ids is None:
+            zona_ids = list(zonas)
+        semaforo = asyncio.Semaphore(self.concurrencia)
+        await asyncio.gather(*(self._leer_zona(zona_id, semaforo) for zona_id in zona_ids))
+        return self.instantanea()
+    
+    def instantanea(self):
+        """Copia de la caché con la última lectura de cada zona"""
+        return dict(self.ultimas_lecturas)
+
+
+def sondear_zonas(zona_ids=None, sensor=None, concurrencia=64, timeout=1.0):
+    """
+    Función para sondear zonas desde código síncrono
+    
+    Args:
+        zona_ids (iterable): Zonas a leer (por defecto todas)
+        sensor: Sensor con método asíncrono leer(zona_id)
+        concurrencia (int): Máximo de lecturas simultáneas
+        timeout (float): Tiempo máximo por lectura
+        
+    Returns:
+        dict: Última lectura conocida de cada zona
+    """
+    motor = MotorSondeoSensores(sensor, concurrencia, timeout)
+    return asyncio.run(motor.sondear(zona_ids))
+
+
+def benchmark_sondeo(num_zonas=200, latencia=0.01, concurrencia=64):
+    """
+    Compara el sondeo secuencial bloqueante con el motor asíncrono
+    
+    Las zonas simuladas viven en un diccionario propio del benchmark, así
+    que el diccionario global `zonas` nunca cambia (ni siquiera mientras
+    otro hilo lo recorre).
+    
+    Args:
+        num_zonas (int): Zonas simuladas
+        latencia (float): Latencia de cada lectura en segundos
+        concurrencia (int): Límite de concurrencia del motor
+        
+    Returns:
+        dict: Tiempos de ambos métodos y aceleración obtenida
+    """
+    zonas_benchmark = {f"bench_{i}": {"temperatura": 22.0, "ocupacion": 5, "objetivo": 22.0}
+                       for i in range(num_zonas)}
+    zona_ids = list(zonas_benchmark)
+    
+    sensor = SensorSimulado(latencia, estado_zonas=zonas_benchmark)
+    inicio = time.perf_counter()
+    for zona_id in zona_ids:
+        sensor.leer_bloqueante(zona_id)
+    tiempo_secuencial = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    sondear_zonas(zona_ids, sensor, concurrencia, timeout=latencia * 10 + 1)
+    tiempo_asincrono = time.perf_counter() - inicio
+    
+    resultado = {
+        "zonas": num_zonas,
+        "secuencial_s": tiempo_secuencial,
+        "asincrono_s": tiempo_asincrono,
+        "aceleracion": tiempo_secuencial / tiempo_asincrono if tiempo_asincrono else float("inf")
+    }
+    
+    if _modo_salida != MODO_SILENCIOSO:
+        _emitir("benchmark_sondeo", latencia_ms=latencia * 1000, **resultado)
+    return resultado
+
+
+def _bus_hvac_simulado(comandos):
+    """Función auxiliar que simula el envío de un lote de comandos al bus HVAC"""
+    if _modo_salida != MODO_SILENCIOSO:
+        _emitir("despacho_bus", comandos=len(comandos))
+    for comando in comandos:
+        if _modo_salida != MODO_SILENCIOSO:
+            _emitir("comando_bus", zona=comando["zona"], accion=comando["accion"],
+                    intensidad=comando["intensidad"])
+        if comando["zona"] in zonas:
+            zonas[comando["zona"]]["temperatura"] = comando["objetivo"]
+
+
+class ProgramadorComandosHVAC:
+    """
+    Programador que agrupa y filtra los comandos enviados al sistema HVAC
+    
+    - Histéresis: una zona estable solo se activa cuando la diferencia
+      supera banda_muerta + histeresis, y una zona activa solo vuelve a
+      estable cuando baja de banda_muerta - histeresis.
+    - Coalescencia: un comando con la misma acción e intensidad similar
+      al último enviado a la zona dentro de la ventana se descarta;
+      varias solicitudes de la misma zona en un ciclo se reducen a la
+      última.
+    - Lotes: los comandos pendientes se envían juntos en un único
+      despacho por ciclo mediante despachar().
+    """
+    
+    def __init__(self, bus=None, ventana=60.0, histeresis=0.2, banda_muerta=0.5,
+                 tolerancia_intensidad=1, reloj=time.monotonic):
+        """
+        Args:
+            bus (callable): Recibe la lista de comandos de cada despacho
+            ventana (float): Segundos durante los que se descarta un comando repetido
+            histeresis (float): Margen en °C alrededor de la banda muerta
+            banda_muerta (float): Diferencia mínima original (0.5°C)
+            tolerancia_intensidad (int): Cambio de intensidad que se considera repetido
+            reloj (callable): Fuente de tiempo monotónica
+        """
+        self.bus = bus or _bus_hvac_simulado
+        self.ventana = ventana
+        self.histeresis = histeresis
+        self.banda_muerta = banda_muerta
+        self.tolerancia_intensidad = tolerancia_intensidad
+        self.reloj = reloj
+        
+        self._pendientes = {}
+        self._ultimo_enviado = {}  # zona -> (accion, intensidad, instante)
+        self._activas = set()
+        
+        self.comandos_solicitados = 0
+        self.comandos_suprimidos = 0
+        self.comandos_enviados = 0
+        self.despachos = 0
+    
+    def solicitar(self, zona_id, temperatura_objetivo, temperatura_actual):
+        """
+        Registra una solicitud de ajuste para el próximo despacho
+        
+        Args:
+            zona_id (str): Zona a ajustar
+            temperatura_objetivo (float): Temperatura deseada
+            temperatura_actual (float): Temperatura actual
+            
+        Returns:
+            bool: True si la solicitud quedó pendiente de envío
+            
+        Rendimiento: O(1)
+        """
+        self.comandos_solicitados += 1
+        diferencia = temperatura_objetivo - temperatura_actual
+        magnitud = abs(diferencia)
+        
+        # Histéresis alrededor de la banda muerta
+        if zona_id in self._activas:
+            if magnitud < self.banda_muerta - self.histeresis:
+                # Vuelve a estable: se descarta el comando pendiente y se
+                # olvida el último enviado para que una nueva activación
+                # no se coalesca con un estado ya obsoleto
+                self._activas.discard(zona_id)
+                self._ultimo_enviado.pop(zona_id, None)
+                if self._pendientes.pop(zona_id, None) is not None:
+                    self.comandos_suprimidos += 1
+                self.comandos_suprimidos += 1
+                return False
+        elif magnitud < self.banda_muerta + self.histeresis:
+            self.comandos_suprimidos += 1
+            return False
+        
+        self._activas.add(zona_id)
+        accion = "CALENTAR" if diferencia > 0 else "ENFRIAR"
+        intensidad = max(1, min(10, int(magnitud * 2)))
+        
+        # Coalescencia con el último comando enviado a la zona
+        ultimo = self._ultimo_enviado.get(zona_id)
+        if ultimo is not None and ultimo[0] == accion \
+                and abs(ultimo[1] - intensidad) <= self.tolerancia_intensidad \
+                and self.reloj() - ultimo[2] < self.ventana:
+            if self._pendientes.pop(zona_id, None) is not None:
+                self.comandos_suprimidos += 1
+            self.comandos_suprimidos += 1
+            return False
+        
+        # Coalescencia dentro del ciclo: la última solicitud reemplaza a la anterior
+        if zona_id in self._pendientes:
+            self.comandos_suprimidos += 1
+        self._pendientes[zona_id] = {
+            "zona": zona_id,
+            "accion": accion,
+            "intensidad": intensidad,
+            "objetivo": temperatura_objetivo,
+            "actual": temperatura_actual
+        }
+        return True
+    
+    def despachar(self):
+        """
+        Envía todos los comandos pendientes al bus en un solo lote
+        
+        Returns:
+            list: Comandos enviados en este despacho
+            
+        Rendimiento: O(k) donde k = comandos pendientes
+        """
+        if not self._pendientes:
+            return []
+        
+        comandos = list(self._pendientes.values())
+        self._pendientes = {}
+        self.bus(comandos)
+        
+        ahora = self.reloj()
+        for comando in comandos:
+            self._ultimo_enviado[comando["zona"]] = (comando["accion"], comando["intensidad"], ahora)
+        
+        self.comandos_enviados += len(comandos)
+        self.despachos += 1
+        return comandos
+    
+    def estadisticas(self):
+        """
+        Contadores de comandos solicitados, suprimidos y enviados
+        
+        Se cumple solicitados == suprimidos + enviados + pendientes.
+        """
+        return {
+            "solicitados": self.comandos_solicitados,
+            "suprimidos": self.comandos_suprimidos,
+            "enviados": self.comandos_enviados,
+            "despachos": self.despachos
+        }
+
+
+def _procesar_fragmento(ids_zona, temperaturas, ocupaciones, temperatura_exterior, duracion_horas, semilla):
+    """
+    Función auxiliar que ejecuta el ciclo completo sobre un fragmento de zonas
+    
+    Se ejecuta dentro de un proceso del pool y aplica leer → optimizar →
+    ajustar → registrar sobre un estado propio del fragmento (zonas,
+    historial y generador aleatorio), sin tocar las variables globales
+    del módulo ni producir salida, por lo que también es seguro
+    ejecutarla en hilos.
+    
+    Returns:
+        tuple: (temperaturas actualizadas, HistorialEnergia del fragmento)
+    """
+    generador = random.Random(semilla)
+    estado_zonas = {
+        zona_id: Zona(temperatura, ocupacion, temperatura)
+        for zona_id, temperatura, ocupacion in zip(ids_zona, temperaturas, ocupaciones)
+    }
+    historial = HistorialEnergia()
+    instante = instante_ciclo()
+    
+    for zona_id in ids_zona:
+        datos = _simular_lectura_sensor(zona_id, instante, estado_zonas, generador)
+        temp_optima = temperatura_optima_tabla(datos, temperatura_exterior)
+        comando = _comando_ajuste(temp_optima, datos.temperatura)
+        if comando is not None:
+            estado_zonas[zona_id].temperatura = temp_optima
+            consumo_kwh, costo = _calcular_consumo(comando[0], comando[1], duracion_horas)
+            historial.registrar(zona_id, comando[0], comando[1], duracion_horas, consumo_kwh, costo, instante)
+    
+    nuevas_temperaturas = array("d", (estado_zonas[zona_id].temperatura for zona_id in ids_zona))
+    return nuevas_temperaturas, historial
+
+
+class ControladorCampus:
+    """
+    Controlador de temperatura para varios edificios repartido en fragmentos
+    
+    Cada instancia mantiene su propio conjunto de zonas (en lugar del
+    diccionario global `zonas`) en columnas, lo divide en fragmentos y
+    ejecuta el ciclo de control de cada fragmento en un
+    ProcessPoolExecutor. Los registros de energía de todos los
+    fragmentos se combinan en un único HistorialEnergia.
+    """
+    
+    def __init__(self, zonas_campus, num_fragmentos=None, max_procesos=None, semilla=0):
+        """
+        Args:
+            zonas_campus (dict): zona_id -> {"temperatura", "ocupacion", ...}
+            num_fragmentos (int): Fragmentos por ciclo (por defecto uno por proceso)
+            max_procesos (int): Procesos del pool (por defecto os.cpu_count())
+            semilla (int): Semilla base para simulaciones reproducibles
+        """
+        self.ids_zona = list(zonas_campus)
+        self.temperaturas = array("d", (zonas_campus[z]["temperatura"] for z in self.ids_zona))
+        self.ocupaciones = array("i", (zonas_campus[z]["ocupacion"] for z in self.ids_zona))
+        self.max_procesos = max_procesos or os.cpu_count() or 1
+        self.num_fragmentos = num_fragmentos or self.max_procesos
+        self.semilla = semilla
+        self.historial = HistorialEnergia()
+        self.ciclos = 0
+    
+    def _limites_fragmentos(self):
+        """Función auxiliar con los rangos contiguos de cada fragmento"""
+        total = len(self.ids_zona)
+        tamano = -(-total // self.num_fragmentos) if total else 0
+        return [(inicio, min(inicio + tamano, total)) for inicio in range(0, total, tamano or 1)]
+    
+    def ejecutar_ciclo(self, temperatura_exterior, duracion_horas=1 / 60, executor=None):
+        """
+        Ejecuta un ciclo de control sobre todas las zonas del campus
+        
+        Args:
+            temperatura_exterior (float): Temperatura exterior
+            duracion_horas (float): Duración del ciclo para el consumo
+            executor (Executor): Pool reutilizable; si es None se crea uno
+            
+        Returns:
+            int: Registros de energía agregados en este ciclo
+            
+        Rendimiento: O(n / p) por proceso, más la combinación de resultados
+        """
+        limites = self._limites_fragmentos()
+        propio = executor is None
+        if propio:
+            executor = concurrent.futures.ProcessPoolExecutor(self.max_procesos)
+        
+        try:
+            futuros = [
+                executor.submit(
+                    _procesar_fragmento,
+                    self.ids_zona[inicio:fin], self.temperaturas[inicio:fin], self.ocupaciones[inicio:fin],
+                    temperatura_exterior, duracion_horas, f"{self.semilla}-{self.ciclos}-{indice}",
+                )
+                for indice, (inicio, fin) in enumerate(limites)
+            ]
+            
+            registros_antes = len(self.historial)
+            # Combinar en el orden de los fragmentos para un historial determinista
+            for (inicio, fin), futuro in zip(limites, futuros):
+                temperaturas, historial = futuro.result()
+                self.temperaturas[inicio:fin] = temperaturas
+                self.historial.extender(historial)
+        finally:
+            if propio:
+                executor.shutdown()
+        
+        self.ciclos += 1
+        return len(self.historial) - registros_antes
+
+
+def generar_campus(num_edificios, zonas_por_edificio, semilla=0):
+    """
+    Función para generar un campus simulado
+    
+    Args:
+        num_edificios (int): Número de edificios
+        zonas_por_edificio (int): Zonas en cada edificio
+        semilla (int): Semilla del generador
+        
+    Returns:
+        dict: Zonas con identificadores "E0001/zona_1", ...
+    """
+    generador = random.Random(semilla)
+    return {
+        f"E{edificio:04d}/zona_{indice}": {
+            "temperatura": round(generador.uniform(17.0, 28.0), 1),
+            "ocupacion": generador.randint(0, 30),
+            "objetivo": 22.0
+        }
+        for edificio in range(num_edificios)
+        for indice in range(1, zonas_por_edificio + 1)
+    }
+
+
+def benchmark_campus(num_zonas=1000000, procesos=(1, 2, 4), temperatura_exterior=28.0):
+    """
+    Mide el rendimiento del ControladorCampus según el número de procesos
+    
+    Args:
+        num_zonas (int): Zonas simuladas en el campus
+        procesos (iterable): Cantidades de procesos a probar
+        temperatura_exterior (float): Temperatura exterior del ciclo
+        
+    Returns:
+        list: Por cada cantidad de procesos, tiempo, zonas/s y escalado
+    """
+    zonas_por_edificio = 100
+    campus = generar_campus(max(1, num_zonas // zonas_por_edificio), zonas_por_edificio)
+    resultados = []
+    
+    for cantidad in procesos:
+        controlador = ControladorCampus(campus, max_procesos=cantidad)
+        with concurrent.futures.ProcessPoolExecutor(cantidad) as executor:
+            inicio = time.perf_counter()
+            controlador.ejecutar_ciclo(temperatura_exterior, executor=executor)
+            tiempo = time.perf_counter() - inicio
+        
+        resultado = {
+            "procesos": cantidad,
+            "zonas": len(campus),
+            "tiempo_s": tiempo,
+            "zonas_por_s": len(campus) / tiempo,
+            "escalado": resultados[0]["tiempo_s"] / tiempo if resultados else 1.0
+        }
+        resultados.append(resultado)
+        if _modo_salida != MODO_SILENCIOSO:
+            _emitir("benchmark_campus", **resultado)
+    
+    return resultados
 
 
 def main():
@@ -200,8 +1586,8 @@ def main():
     
     # Mostrar resumen de consumo
     print("=== RESUMEN DE CONSUMO ENERGÉTICO ===")
-    consumo_total = sum(r["consumo_kwh"] for r in historial_energia)
-    costo_total = sum(r["costo"] for r in historial_energia)
+    consumo_total = historial_energia.consumo_total
+    costo_total = historial_energia.costo_total
     print(f"Consumo total: {consumo_total:.2f} kWh")
     print(f"Costo total: ${costo_total:.2f}")
 
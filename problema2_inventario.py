@@ -6,7 +6,373 @@ Sistema básico que implementa las 4 funciones requeridas para
 demostrar programación modular en gestión de inventario.
 """
 
+import os
+import csv
+import json
+import math
+import bisect
+import time
+import heapq
+import random
+import itertools
+import tempfile
+import threading
+import tracemalloc
 import datetime
+import contextlib
+
+try:
+    import numpy as np  # Opcional: solo requerido por el recálculo masivo
+except ImportError:
+    np = None
+
+
+class IndiceMovimientos:
+    """
+    Índice de movimientos por producto y tipo
+    
+    Mantiene para cada (producto, tipo) una secuencia de solo-agregar
+    con los movimientos y agregados acumulados (suma y cantidad de
+    unidades), de modo que la demanda promedio de un producto se obtiene
+    en O(1) sin recorrer la lista global `movimientos`.
+    
+    Cada secuencia, y una secuencia global con todos los movimientos, se
+    mantiene ordenada por fecha junto a una lista paralela de fechas,
+    para resolver consultas por rango con búsqueda binaria.
+    
+    Tras un reinicio desde una instantánea los agregados se restauran
+    directamente y las secuencias solo tienen la cola del log; el
+    historial anterior se incorpora la primera vez que se consultan las
+    secuencias (ver AlmacenPersistente.cargar_historial).
+    """
+    
+    TIPOS = ("ENTRADA", "SALIDA")
+    
+    def __init__(self):
+        self._movimientos = {}  # (codigo, tipo) -> lista de movimientos ordenada por fecha
+        self._fechas = {}       # (codigo, tipo) -> fechas paralelas a _movimientos
+        self._agregados = {}    # (codigo, tipo) -> [suma de cantidades, número de movimientos]
+        self._todos = []        # Todos los movimientos ordenados por fecha
+        self._fechas_todos = []
+        self._candado = threading.RLock()
+        self.historial_pendiente = None  # Función que incorpora el historial anterior, si falta
+    
+    @staticmethod
+    def _insertar(secuencia, fechas, movimiento):
+        """Función auxiliar: agrega al final o, si llega desordenado, inserta en su lugar"""
+        fecha = movimiento["fecha"]
+        if not fechas or fechas[-1] <= fecha:
+            secuencia.append(movimiento)
+            fechas.append(fecha)
+        else:
+            posicion = bisect.bisect_right(fechas, fecha)
+            secuencia.insert(posicion, movimiento)
+            fechas.insert(posicion, fecha)
+    
+    def agregar(self, movimiento):
+        """
+        Indexa un movimiento recién registrado
+        
+        Args:
+            movimiento (dict): Movimiento con "codigo", "tipo", "cantidad" y "fecha"
+            
+        Rendimiento: O(1) amortizado para movimientos en orden cronológico
+        """
+        clave = (movimiento["codigo"], movimiento["tipo"])
+        with self._candado:
+            self._insertar_en_secuencias(clave, movimiento)
+            agregado = self._agregados.get(clave)
+            if agregado is None:
+                agregado = self._agregados[clave] = [0, 0]
+            agregado[0] += movimiento["cantidad"]
+            agregado[1] += 1
+    
+    def _insertar_en_secuencias(self, clave, movimiento):
+        """Función auxiliar: agrega el movimiento a su secuencia y a la global"""
+        secuencia = self._movimientos.get(clave)
+        if secuencia is None:
+            secuencia = self._movimientos[clave] = []
+            self._fechas[clave] = []
+        self._insertar(secuencia, self._fechas[clave], movimiento)
+        self._insertar(self._todos, self._fechas_todos, movimiento)
+    
+    def _completar_historial(self):
+        """Función auxiliar: incorpora el historial pendiente antes de leer secuencias"""
+        if self.historial_pendiente is None:
+            return
+        with self._candado:
+            cargador, self.historial_pendiente = self.historial_pendiente, None
+            if cargador is not None:
+                cargador()
+    
+    def incorporar_historial(self, lista_movimientos):
+        """
+        Agrega a las secuencias movimientos anteriores ya contados en los agregados
+        
+        Args:
+            lista_movimientos (list): Movimientos del historial (no cambian sumas ni cantidades)
+            
+        Rendimiento: O(n log n) donde n = movimientos del historial más los actuales
+        """
+        with self._candado:
+            actuales = self._todos
+            self._movimientos = {}
+            self._fechas = {}
+            self._todos = []
+            self._fechas_todos = []
+            for movimiento in sorted(itertools.chain(lista_movimientos, actuales), key=lambda m: m["fecha"]):
+                self._insertar_en_secuencias((movimiento["codigo"], movimiento["tipo"]), movimiento)
+    
+    def exportar_agregados(self):
+        """Agregados como filas [codigo, tipo, suma, cantidad] (para la instantánea)"""
+        with self._candado:
+            return [[codigo, tipo, suma, cantidad] for (codigo, tipo), (suma, cantidad) in self._agregados.items()]
+    
+    def restaurar_agregados(self, filas):
+        """Reemplaza los agregados por los de una instantánea"""
+        with self._candado:
+            self._agregados = {(codigo, tipo): [suma, cantidad] for codigo, tipo, suma, cantidad in filas}
+    
+    def movimientos(self, codigo_producto, tipo):
+        """Secuencia de movimientos de un producto y tipo (no modificar)"""
+        self._completar_historial()
+        return self._movimientos.get((codigo_producto, tipo), [])
+    
+    def total(self, codigo_producto, tipo):
+        """Suma de cantidades de un producto y tipo. O(1)"""
+        return self._agregados.get((codigo_producto, tipo), (0, 0))[0]
+    
+    def cantidad(self, codigo_producto, tipo):
+        """Número de movimientos de un producto y tipo. O(1)"""
+        return self._agregados.get((codigo_producto, tipo), (0, 0))[1]
+    
+    def promedio(self, codigo_producto, tipo):
+        """Cantidad promedio por movimiento, o None si no hay movimientos. O(1)"""
+        total, cantidad = self._agregados.get((codigo_producto, tipo), (0, 0))
+        return total / cantidad if cantidad else None
+    
+    @staticmethod
+    def _rango(secuencia, fechas, desde, hasta):
+        """Función auxiliar: generador de los movimientos con desde <= fecha < hasta"""
+        inicio = 0 if desde is None else bisect.bisect_left(fechas, desde)
+        fin = len(fechas) if hasta is None else bisect.bisect_left(fechas, hasta)
+        for posicion in range(inicio, fin):
+            yield secuencia[posicion]
+    
+    def consultar(self, codigo_producto=None, tipo=None, desde=None, hasta=None):
+        """
+        Movimientos filtrados por producto, tipo y rango de fechas
+        
+        Args:
+            codigo_producto (str): Producto (por defecto todos)
+            tipo (str): "ENTRADA" o "SALIDA" (por defecto ambos)
+            desde (datetime.datetime): Fecha inicial incluida (por defecto sin límite)
+            hasta (datetime.datetime): Fecha final excluida (por defecto sin límite)
+            
+        Returns:
+            generator: Movimientos en orden cronológico, sin copiar listas
+            
+        Rendimiento: O(log n + k) donde k = movimientos devueltos; sin
+        producto y con tipo se recorre el rango global completo
+        """
+        self._completar_historial()
+        if codigo_producto is None:
+            for movimiento in self._rango(self._todos, self._fechas_todos, desde, hasta):
+                if tipo is None or movimiento["tipo"] == tipo:
+                    yield movimiento
+            return
+        
+        rangos = [
+            self._rango(self._movimientos[clave], self._fechas[clave], desde, hasta)
+            for clave in ((codigo_producto, t) for t in (self.TIPOS if tipo is None else (tipo,)))
+            if clave in self._movimientos
+        ]
+        if len(rangos) == 1:
+            yield from rangos[0]
+        else:
+            yield from heapq.merge(*rangos, key=lambda movimiento: movimiento["fecha"])
+    
+    def mas_movidos(self, cantidad=10, tipo="SALIDA", desde=None, hasta=None):
+        """
+        Productos con más unidades movidas en un rango de fechas
+        
+        Args:
+            cantidad (int): Número de productos a devolver
+            tipo (str): "SALIDA" (por defecto), "ENTRADA" o None para ambos
+            desde (datetime.datetime): Fecha inicial incluida
+            hasta (datetime.datetime): Fecha final excluida
+            
+        Returns:
+            list: Tuplas (codigo, unidades) de mayor a menor
+            
+        Rendimiento: O(log n + k + p log cantidad) donde k = movimientos
+        del rango y p = productos distintos en él
+        """
+        unidades = {}
+        for movimiento in self.consultar(tipo=tipo, desde=desde, hasta=hasta):
+            codigo = movimiento["codigo"]
+            unidades[codigo] = unidades.get(codigo, 0) + movimiento["cantidad"]
+        return heapq.nlargest(cantidad, unidades.items(), key=lambda par: par[1])
+    
+    def reconstruir(self, lista_movimientos):
+        """
+        Reconstruye el índice a partir de una lista de movimientos
+        
+        Rendimiento: O(n log n) donde n = movimientos
+        """
+        with self._candado:
+            self.historial_pendiente = None
+            self._movimientos = {}
+            self._fechas = {}
+            self._agregados = {}
+            self._todos = []
+            self._fechas_todos = []
+            for movimiento in sorted(lista_movimientos, key=lambda m: m["fecha"]):
+                self.agregar(movimiento)
+
+
+class Producto:
+    """
+    Registro validado de un producto del inventario
+    
+    Se construye una sola vez al cargar el catálogo (ver
+    normalizar_inventario y agregar_producto), de modo que `inventario`
+    solo contiene Producto. Usa __slots__ y tipos ya verificados; las
+    rutas de uso frecuente leen los atributos directamente
+    (producto.stock) y producto["stock"] se admite para el código escrito
+    para diccionarios.
+    """
+    
+    __slots__ = ("nombre", "stock", "min", "max", "precio")
+    
+    def __init__(self, nombre, stock, min, max, precio):
+        self.nombre = nombre
+        self.stock = stock
+        self.min = min
+        self.max = max
+        self.precio = precio
+    
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+    
+    def __setitem__(self, campo, valor):
+        setattr(self, campo, valor)
+    
+    def __contains__(self, campo):
+        return campo in self.__slots__
+    
+    def get(self, campo, defecto=None):
+        return getattr(self, campo, defecto)
+    
+    def como_dict(self):
+        """Diccionario con los campos del producto"""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+    
+    def __eq__(self, otro):
+        if isinstance(otro, Producto):
+            return self.como_dict() == otro.como_dict()
+        if isinstance(otro, dict):
+            return self.como_dict() == otro
+        return NotImplemented
+    
+    def __repr__(self):
+        return f"Producto({self.como_dict()!r})"
+
+
+def _entero_valido(valor):
+    """Función auxiliar: convierte a int si el valor es un entero (no bool)"""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return None
+
+
+def validar_producto(registro):
+    """
+    Función para validar y normalizar un registro de producto
+    
+    Args:
+        registro: Valor del diccionario `inventario`
+        
+    Returns:
+        tuple: (Producto, []) si es válido, o (None, lista de errores)
+        
+    Rendimiento: O(1)
+    """
+    if isinstance(registro, Producto):
+        return registro, []
+    if not isinstance(registro, dict):
+        return None, [f"se esperaba un diccionario y se recibió {type(registro).__name__}"]
+    
+    errores = []
+    faltantes = [campo for campo in Producto.__slots__ if campo not in registro]
+    if faltantes:
+        return None, [f"faltan campos: {', '.join(faltantes)}"]
+    
+    nombre = registro["nombre"]
+    if not isinstance(nombre, str) or not nombre.strip():
+        errores.append("nombre vacío o no es texto")
+    
+    enteros = {}
+    for campo in ("stock", "min", "max"):
+        enteros[campo] = _entero_valido(registro[campo])
+        if enteros[campo] is None:
+            errores.append(f"{campo} debe ser entero")
+        elif enteros[campo] < 0:
+            errores.append(f"{campo} no puede ser negativo")
+    
+    precio = registro["precio"]
+    if isinstance(precio, bool) or not isinstance(precio, (int, float)) or precio < 0:
+        errores.append("precio debe ser un número no negativo")
+    
+    if not errores and enteros["min"] > enteros["max"]:
+        errores.append("min mayor que max")
+    
+    if errores:
+        return None, errores
+    return Producto(nombre, enteros["stock"], enteros["min"], enteros["max"], precio), []
+
+
+def normalizar_inventario(mostrar=True):
+    """
+    Procedimiento para validar todo el catálogo una vez al cargarlo
+    
+    Reemplaza cada entrada de `inventario` por un Producto validado y
+    mueve las entradas malformadas a `productos_en_cuarentena`, de modo que
+    las funciones de uso frecuente solo vean datos confiables.
+    
+    Args:
+        mostrar (bool): Imprimir el reporte de cuarentena
+        
+    Returns:
+        dict: Reporte con productos válidos y errores por producto en cuarentena
+        
+    Rendimiento: O(n) donde n = número de productos
+    """
+    cuarentena = {}
+    for codigo in list(inventario):
+        producto, errores = validar_producto(inventario[codigo])
+        if producto is None:
+            productos_en_cuarentena[codigo] = {"registro": inventario.pop(codigo), "errores": errores}
+            cuarentena[codigo] = errores
+        else:
+            inventario[codigo] = producto
+    
+    reporte = {"validos": len(inventario), "cuarentena": cuarentena}
+    
+    if mostrar and cuarentena:
+        print(f"⚠️  Productos en cuarentena: {len(cuarentena)}")
+        for codigo, errores in cuarentena.items():
+            print(f"    {codigo}: {'; '.join(errores)}")
+    
+    return reporte
+
 
 # Variables globales para simular la base de datos del almacén
 inventario = {
@@ -17,6 +383,37 @@ inventario = {
 }
 
 movimientos = []  # Historial de movimientos
+indice_movimientos = IndiceMovimientos()  # Movimientos por producto y tipo
+
+# Validación única del catálogo: las entradas malformadas quedan aisladas
+productos_en_cuarentena = {}
+reporte_validacion = normalizar_inventario(mostrar=False)
+
+
+def agregar_producto(codigo, registro):
+    """
+    Función para agregar o reemplazar un producto del catálogo
+    
+    Valida el registro con las mismas reglas que normalizar_inventario,
+    así `inventario` solo contiene Producto y las rutas de uso frecuente
+    pueden leer sus atributos sin comprobar el tipo.
+    
+    Args:
+        codigo (str): Código del producto
+        registro (dict | Producto): Datos del producto
+        
+    Returns:
+        Producto: Registro guardado, o None si no es válido
+        
+    Rendimiento: O(1)
+    """
+    producto, errores = validar_producto(registro)
+    if producto is None:
+        print(f"❌ Error: Producto {codigo} inválido: {'; '.join(errores)}")
+        return None
+    inventario[codigo] = producto
+    motor_alertas.evaluar(codigo)
+    return producto
 
 
 def registrar_entrada_productos(codigo_producto, cantidad, precio_compra):
@@ -31,7 +428,8 @@ def registrar_entrada_productos(codigo_producto, cantidad, precio_compra):
     Returns:
         bool: True si se registró exitosamente
         
-    Rendimiento: O(1) - Acceso directo por clave
+    Rendimiento: O(1) - Acceso directo por clave, con el candado de la
+    franja del producto en nucleo_inventario
     """
     # Verificar que el producto existe
     if codigo_producto not in inventario:
@@ -43,24 +441,11 @@ def registrar_entrada_productos(codigo_producto, cantidad, precio_compra):
         print(f"❌ Error: Cantidad debe ser mayor a 0")
         return False
     
-    # Actualizar stock
-    inventario[codigo_producto]["stock"] += cantidad
-    inventario[codigo_producto]["precio"] = precio_compra
-    
-    # Registrar movimiento
-    movimiento = {
-        "tipo": "ENTRADA",
-        "codigo": codigo_producto,
-        "cantidad": cantidad,
-        "precio": precio_compra,
-        "fecha": datetime.datetime.now(),
-        "stock_resultante": inventario[codigo_producto]["stock"]
-    }
-    movimientos.append(movimiento)
+    # Actualizar stock y registrar el movimiento de forma atómica
+    movimiento = nucleo_inventario.registrar_entrada(codigo_producto, cantidad, precio_compra)
     
-    producto = inventario[codigo_producto]
-    print(f"✅ Entrada registrada: {cantidad} x {producto['nombre']}")
-    print(f"   Stock actual: {producto['stock']} unidades")
+    print(f"✅ Entrada registrada: {cantidad} x {inventario[codigo_producto].nombre}")
+    print(f"   Stock actual: {movimiento['stock_resultante']} unidades")
     
     return True
 
@@ -77,7 +462,8 @@ def registrar_salida_productos(codigo_producto, cantidad, motivo="Venta"):
     Returns:
         bool: True si se registró exitosamente
         
-    Rendimiento: O(1) - Acceso directo por clave
+    Rendimiento: O(1) - Acceso directo por clave, con el candado de la
+    franja del producto en nucleo_inventario
     """
     # Verificar que el producto existe
     if codigo_producto not in inventario:
@@ -89,61 +475,189 @@ def registrar_salida_productos(codigo_producto, cantidad, motivo="Venta"):
         print(f"❌ Error: Cantidad debe ser mayor a 0")
         return False
     
-    producto = inventario[codigo_producto]
-    
-    # Verificar stock suficiente
-    if producto["stock"] < cantidad:
-        print(f"❌ Error: Stock insuficiente. Disponible: {producto['stock']}, Solicitado: {cantidad}")
+    # Verificar stock disponible (sin las unidades reservadas) y descontarlo de forma atómica
+    movimiento = nucleo_inventario.registrar_salida(codigo_producto, cantidad, motivo)
+    if movimiento is None:
+        print(f"❌ Error: Stock insuficiente. Disponible: {nucleo_inventario.disponible(codigo_producto)}, "
+              f"Solicitado: {cantidad}")
         return False
     
-    # Actualizar stock
-    inventario[codigo_producto]["stock"] -= cantidad
-    
-    # Registrar movimiento
-    movimiento = {
-        "tipo": "SALIDA",
-        "codigo": codigo_producto,
-        "cantidad": cantidad,
-        "motivo": motivo,
-        "fecha": datetime.datetime.now(),
-        "stock_resultante": inventario[codigo_producto]["stock"]
-    }
-    movimientos.append(movimiento)
-    
-    print(f"✅ Salida registrada: {cantidad} x {producto['nombre']}")
-    print(f"   Stock actual: {producto['stock']} unidades")
+    print(f"✅ Salida registrada: {cantidad} x {inventario[codigo_producto].nombre}")
+    print(f"   Stock actual: {movimiento['stock_resultante']} unidades")
     print(f"   Motivo: {motivo}")
     
     return True
 
 
-def calcular_nivel_optimo_inventario(codigo_producto):
+def _leer_filas_movimientos(origen):
+    """Función auxiliar: acepta un iterable de diccionarios o un flujo CSV"""
+    if hasattr(origen, "read"):
+        return csv.DictReader(origen)
+    return origen
+
+
+def _cantidad_fila(valor):
+    """Función auxiliar: cantidad entera de una fila (texto de dígitos del CSV o entero, no bool)"""
+    if isinstance(valor, str):
+        try:
+            return int(valor.strip())
+        except ValueError:
+            return None
+    return _entero_valido(valor)
+
+
+def registrar_movimientos_lote(origen, atomico=True):
+    """
+    Función para registrar un lote de entradas y salidas en una sola pasada
+    
+    Cada fila tiene "tipo" (ENTRADA/SALIDA), "codigo", "cantidad" y,
+    según el tipo, "precio" o "motivo". Las filas se validan en orden
+    contra un stock simulado; los cambios se aplican al final de una
+    vez por producto, por lo que un lote rechazado no deja cambios.
+    Durante la validación y la aplicación se mantienen tomados los
+    candados de nucleo_inventario de todos los productos del lote, y las
+    salidas solo pueden usar el stock no reservado.
+    
+    Args:
+        origen (iterable | archivo): Diccionarios o flujo CSV con encabezado
+        atomico (bool): Si es True, cualquier fila rechazada descarta todo
+            el lote; si es False, se aplican solo las filas válidas
+        
+    Returns:
+        dict: Resumen con filas aceptadas, rechazadas (fila, motivo) y si
+        el lote se aplicó
+        
+    Rendimiento: O(n) donde n = filas del lote
+    """
+    filas = list(_leer_filas_movimientos(origen))
+    with nucleo_inventario.bloquear(str(fila.get("codigo", "")).strip() for fila in filas):
+        return _registrar_filas_lote(filas, atomico)
+
+
+def _registrar_filas_lote(filas, atomico):
+    """Función auxiliar de registrar_movimientos_lote (con los candados del lote tomados)"""
+    fecha = datetime.datetime.now()
+    stock_simulado = {}
+    nuevos_movimientos = []
+    rechazadas = []
+    total_filas = 0
+    
+    for numero, fila in enumerate(filas, start=1):
+        total_filas = numero
+        tipo = str(fila.get("tipo", "")).strip().upper()
+        codigo = str(fila.get("codigo", "")).strip()
+        
+        producto = inventario.get(codigo)
+        if producto is None:
+            rechazadas.append((numero, f"Producto {codigo} no encontrado"))
+            continue
+        if tipo not in ("ENTRADA", "SALIDA"):
+            rechazadas.append((numero, f"Tipo de movimiento inválido: {tipo}"))
+            continue
+        
+        cantidad = _cantidad_fila(fila.get("cantidad"))
+        if cantidad is None:
+            rechazadas.append((numero, "Cantidad inválida"))
+            continue
+        if cantidad <= 0:
+            rechazadas.append((numero, "Cantidad debe ser mayor a 0"))
+            continue
+        
+        stock = stock_simulado.get(codigo)
+        if stock is None:
+            stock = producto.stock
+        
+        if tipo == "ENTRADA":
+            try:
+                precio = float(fila.get("precio"))
+            except (TypeError, ValueError):
+                rechazadas.append((numero, "Precio de compra inválido"))
+                continue
+            if not (math.isfinite(precio) and precio >= 0):
+                rechazadas.append((numero, "Precio de compra inválido"))
+                continue  # Negativo, nan o inf corromperían la valoración
+            stock += cantidad
+            movimiento = {
+                "tipo": "ENTRADA",
+                "codigo": codigo,
+                "cantidad": cantidad,
+                "precio": precio,
+                "fecha": fecha,
+                "stock_resultante": stock
+            }
+        else:
+            disponible = stock - nucleo_inventario.reservado(codigo)
+            if disponible < cantidad:
+                rechazadas.append((numero, f"Stock insuficiente. Disponible: {disponible}, Solicitado: {cantidad}"))
+                continue
+            stock -= cantidad
+            movimiento = {
+                "tipo": "SALIDA",
+                "codigo": codigo,
+                "cantidad": cantidad,
+                "motivo": fila.get("motivo") or "Venta",
+                "fecha": fecha,
+                "stock_resultante": stock
+            }
+        
+        stock_simulado[codigo] = stock
+        nuevos_movimientos.append(movimiento)
+    
+    aplicado = not (atomico and rechazadas)
+    if aplicado and nuevos_movimientos:
+        # Un solo registro en el log y luego el stock final de cada producto
+        nucleo_inventario._aplicar_movimientos(nuevos_movimientos, stock_simulado)
+    
+    resumen = {
+        "filas": total_filas,
+        "aceptadas": len(nuevos_movimientos) if aplicado else 0,
+        "rechazadas": rechazadas,
+        "aplicado": aplicado,
+        "productos_afectados": len(stock_simulado) if aplicado else 0
+    }
+    
+    if aplicado:
+        print(f"📥 Lote registrado: {resumen['aceptadas']}/{total_filas} movimientos, "
+              f"{resumen['productos_afectados']} productos")
+    else:
+        print(f"❌ Lote rechazado: {len(rechazadas)} filas con errores, no se aplicaron cambios")
+    for numero, motivo in rechazadas[:5]:
+        print(f"   Fila {numero}: {motivo}")
+    if len(rechazadas) > 5:
+        print(f"   ... y {len(rechazadas) - 5} filas más")
+    
+    return resumen
+
+
+def calcular_nivel_optimo_inventario(codigo_producto, actualizar=None):
     """
     Procedimiento para calcular el nivel óptimo de inventario
     
     Args:
         codigo_producto (str): Código del producto a analizar
+        actualizar (bool): True/False para decidir sin preguntar; None
+            pregunta por consola como antes
         
-    Rendimiento: O(n) donde n = movimientos del producto
+    Rendimiento: O(1) - Agregados del índice de movimientos
     """
     if codigo_producto not in inventario:
         print(f"❌ Error: Producto {codigo_producto} no encontrado")
         return
     
     producto = inventario[codigo_producto]
+    nombre, stock, minimo, maximo = producto.nombre, producto.stock, producto.min, producto.max
     
-    # Analizar movimientos de salida para calcular demanda
-    salidas = [m for m in movimientos if m["codigo"] == codigo_producto and m["tipo"] == "SALIDA"]
+    # Analizar movimientos de salida para calcular demanda (agregados del índice)
+    dias_con_ventas = indice_movimientos.cantidad(codigo_producto, "SALIDA")
     
-    if len(salidas) < 2:
-        print(f"📊 {producto['nombre']}: Datos insuficientes para análisis")
-        print(f"   Stock actual: {producto['stock']}")
-        print(f"   Rango configurado: {producto['min']} - {producto['max']}")
+    if dias_con_ventas < 2:
+        print(f"📊 {nombre}: Datos insuficientes para análisis")
+        print(f"   Stock actual: {stock}")
+        print(f"   Rango configurado: {minimo} - {maximo}")
         return
     
     # Calcular demanda promedio
-    total_vendido = sum(s["cantidad"] for s in salidas)
-    dias_con_ventas = len(salidas)
+    total_vendido = indice_movimientos.total(codigo_producto, "SALIDA")
     demanda_promedio = total_vendido / dias_con_ventas
     
     # Calcular niveles recomendados
@@ -157,74 +671,437 @@ def calcular_nivel_optimo_inventario(codigo_producto):
     lote_economico = int(demanda_promedio * 15)  # 15 días de demanda
     stock_maximo = punto_reorden + lote_economico
     
-    print(f"📊 Análisis de {producto['nombre']}:")
-    print(f"   Stock actual: {producto['stock']} unidades")
+    print(f"📊 Análisis de {nombre}:")
+    print(f"   Stock actual: {stock} unidades")
     print(f"   Demanda promedio: {demanda_promedio:.1f} unidades/día")
     print(f"   Stock de seguridad recomendado: {stock_seguridad}")
     print(f"   Punto de reorden recomendado: {punto_reorden}")
     print(f"   Stock máximo recomendado: {stock_maximo}")
     
     # Actualizar niveles en el sistema (opcional)
-    respuesta = input(f"¿Actualizar niveles para {producto['nombre']}? (s/n): ")
-    if respuesta.lower() == 's':
-        inventario[codigo_producto]["min"] = punto_reorden
-        inventario[codigo_producto]["max"] = stock_maximo
+    if actualizar is None:
+        respuesta = input(f"¿Actualizar niveles para {nombre}? (s/n): ")
+        actualizar = respuesta.lower() == 's'
+    if actualizar:
+        nucleo_inventario.actualizar_niveles({codigo_producto: (punto_reorden, stock_maximo)})
         print("✅ Niveles actualizados en el sistema")
 
 
-def generar_alertas_reabastecimiento():
+# Políticas para aplicar los niveles recalculados
+POLITICA_SIMULAR = "simular"            # Solo reportar diferencias
+POLITICA_APLICAR = "aplicar"            # Aplicar todos los niveles nuevos
+POLITICA_SOLO_AUMENTOS = "solo_aumentos"  # Aplicar solo si el nivel sube
+
+
+def recalcular_niveles_inventario(politica=POLITICA_SIMULAR, codigos=None, usar_pronostico=False):
     """
-    Función para generar alertas de reabastecimiento
+    Función para recalcular punto de reorden y stock máximo de todo el catálogo
+    
+    Versión no interactiva y vectorizada de calcular_nivel_optimo_inventario:
+    usa los agregados de indice_movimientos y aplica las mismas fórmulas
+    (seguridad = 3 días, reorden = seguridad + 7 días, máximo = reorden +
+    15 días de demanda) sobre arreglos NumPy. Con `usar_pronostico` los
+    niveles salen de pronostico_demanda (demanda diaria y stock de
+    seguridad por varianza del error) y no se requiere NumPy.
     
+    Args:
+        politica (str): POLITICA_SIMULAR, POLITICA_APLICAR o POLITICA_SOLO_AUMENTOS
+        codigos (iterable): Productos a recalcular (por defecto todo el inventario)
+        usar_pronostico (bool): Usar PronosticoDemanda en lugar del promedio por movimiento
+        
     Returns:
-        list: Lista de alertas generadas
+        dict: Reporte con los cambios por producto y contadores
         
-    Rendimiento: O(n) donde n = número de productos
+    Rendimiento: O(n) con la aritmética vectorizada
     """
-    alertas = []
+    if np is None and not usar_pronostico:
+        raise ImportError("recalcular_niveles_inventario requiere NumPy (pip install numpy)")
+    if politica not in (POLITICA_SIMULAR, POLITICA_APLICAR, POLITICA_SOLO_AUMENTOS):
+        raise ValueError(f"Política desconocida: {politica}")
     
-    print("🚨 ANÁLISIS DE REABASTECIMIENTO:")
-    print("-" * 40)
+    # Reunir agregados de demanda de los productos con datos suficientes
+    analizados = []
+    niveles_pronostico = []
+    totales = []
+    cantidades = []
+    insuficientes = 0
+    invalidos = 0
+    for codigo in (inventario if codigos is None else codigos):
+        if codigo not in inventario:
+            invalidos += 1
+            continue
+        # Mismo mínimo de historia que calcular_nivel_optimo_inventario
+        cantidad = indice_movimientos.cantidad(codigo, "SALIDA")
+        if cantidad < 2:
+            insuficientes += 1
+            continue
+        if usar_pronostico:
+            niveles = pronostico_demanda.niveles(codigo)
+            if niveles is None:
+                insuficientes += 1
+                continue
+            analizados.append(codigo)
+            niveles_pronostico.append((niveles["punto_reorden"], niveles["stock_maximo"]))
+            continue
+        analizados.append(codigo)
+        totales.append(indice_movimientos.total(codigo, "SALIDA"))
+        cantidades.append(cantidad)
     
-    for codigo, producto in inventario.items():
-        stock_actual = producto["stock"]
-        stock_minimo = producto["min"]
-        stock_maximo = producto["max"]
-        
-        # Determinar estado del stock
-        if stock_actual <= 0:
-            nivel = "CRÍTICO"
-            urgencia = "INMEDIATA"
-            cantidad_sugerida = stock_maximo
-        elif stock_actual <= stock_minimo:
-            nivel = "BAJO"
-            urgencia = "ALTA"
-            cantidad_sugerida = stock_maximo - stock_actual
-        elif stock_actual <= stock_minimo * 1.5:
-            nivel = "ADVERTENCIA"
-            urgencia = "MEDIA"
-            cantidad_sugerida = stock_maximo - stock_actual
+    cambios = []
+    niveles_aplicados = {}
+    if analizados:
+        if usar_pronostico:
+            nuevos_niveles = niveles_pronostico
         else:
-            continue  # Stock suficiente, no generar alerta
-        
-        # Crear alerta
-        alerta = {
-            "codigo": codigo,
-            "producto": producto["nombre"],
-            "stock_actual": stock_actual,
-            "stock_minimo": stock_minimo,
-            "nivel": nivel,
-            "urgencia": urgencia,
-            "cantidad_sugerida": cantidad_sugerida,
-            "costo_estimado": cantidad_sugerida * producto["precio"]
+            demanda = np.asarray(totales, dtype=np.float64) / np.asarray(cantidades, dtype=np.float64)
+            stock_seguridad = np.floor(demanda * 3)
+            punto_reorden = np.floor(stock_seguridad + demanda * 7).astype(np.int64)
+            stock_maximo = punto_reorden + np.floor(demanda * 15).astype(np.int64)
+            nuevos_niveles = zip(punto_reorden.tolist(), stock_maximo.tolist())
+        
+        for codigo, (nuevo_min, nuevo_max) in zip(analizados, nuevos_niveles):
+            producto = inventario[codigo]
+            minimo, maximo = producto.min, producto.max
+            if minimo == nuevo_min and maximo == nuevo_max:
+                continue
+            
+            if politica == POLITICA_APLICAR:
+                aplicado = True
+            elif politica == POLITICA_SOLO_AUMENTOS:
+                aplicado = nuevo_min >= minimo and nuevo_max >= maximo
+            else:
+                aplicado = False
+            
+            cambios.append({
+                "codigo": codigo,
+                "min_anterior": minimo,
+                "min_nuevo": nuevo_min,
+                "max_anterior": maximo,
+                "max_nuevo": nuevo_max,
+                "aplicado": aplicado
+            })
+            if aplicado:
+                niveles_aplicados[codigo] = (nuevo_min, nuevo_max)
+    
+    if niveles_aplicados:
+        # Un solo registro en el log para todos los niveles aplicados
+        nucleo_inventario.actualizar_niveles(niveles_aplicados)
+    
+    reporte = {
+        "politica": politica,
+        "analizados": len(analizados),
+        "datos_insuficientes": insuficientes,
+        "invalidos": invalidos,
+        "cambios": cambios,
+        "aplicados": sum(1 for cambio in cambios if cambio["aplicado"])
+    }
+    
+    print(f"📊 Recálculo de niveles ({politica}): {reporte['analizados']} productos analizados")
+    print(f"   Cambios detectados: {len(cambios)} | Aplicados: {reporte['aplicados']}")
+    if insuficientes or invalidos:
+        print(f"   Sin datos suficientes: {insuficientes} | Registros inválidos: {invalidos}")
+    
+    return reporte
+
+
+# Parámetros del pronóstico de demanda
+ALFA_PRONOSTICO = 0.2        # Suavizamiento del nivel / tamaño de demanda
+BETA_ERROR = 0.1             # Suavizamiento de la varianza del error
+UMBRAL_INTERMITENTE = 1.32   # Intervalo medio entre demandas a partir del cual se usa Croston
+TIEMPO_ENTREGA_DIAS = 7      # Mismo tiempo de entrega que calcular_nivel_optimo_inventario
+DIAS_LOTE_ECONOMICO = 15     # Mismo lote económico que calcular_nivel_optimo_inventario
+FACTOR_SERVICIO = 1.65       # ~95% de nivel de servicio
+
+
+class _EstadoDemanda:
+    """Estado del pronóstico de un producto (registro compacto)"""
+    
+    __slots__ = ("dia", "demanda_dia", "dias_observados", "dias_con_demanda",
+                 "nivel", "varianza_ses", "tamano", "intervalo", "sin_demanda", "varianza_croston")
+    
+    def __init__(self, dia):
+        self.dia = dia                 # Día (ordinal) del cubo abierto
+        self.demanda_dia = 0           # Unidades acumuladas en el cubo abierto
+        self.dias_observados = 0       # Días cerrados desde la primera demanda
+        self.dias_con_demanda = 0
+        self.nivel = 0.0               # Suavizamiento exponencial simple
+        self.varianza_ses = 0.0
+        self.tamano = 0.0              # Croston: tamaño medio de demanda
+        self.intervalo = 1.0           # Croston: intervalo medio entre demandas (días)
+        self.sin_demanda = 0           # Días cerrados sin demanda desde la última
+        self.varianza_croston = 0.0
+    
+    def copiar(self):
+        copia = _EstadoDemanda(self.dia)
+        for campo in self.__slots__:
+            setattr(copia, campo, getattr(self, campo))
+        return copia
+
+
+class PronosticoDemanda:
+    """
+    Pronóstico incremental de demanda diaria por producto
+    
+    Las salidas se acumulan en un cubo por día y producto. Al cerrar un
+    día se actualizan dos modelos: suavizamiento exponencial simple y
+    Croston (tamaño e intervalo entre demandas, para demanda
+    intermitente), junto con la varianza suavizada del error de
+    pronóstico de cada uno. Los días sin demanda se aplican en bloque con
+    fórmulas cerradas, así que cada movimiento cuesta O(1) sin importar
+    cuántos días hayan pasado desde el anterior.
+    
+    Los movimientos con fecha anterior al cubo abierto se suman al cubo
+    abierto (no se reescribe el pasado).
+    """
+    
+    def __init__(self, alfa=ALFA_PRONOSTICO, beta=BETA_ERROR):
+        self.alfa = alfa
+        self.beta = beta
+        self._estados = {}  # codigo -> _EstadoDemanda
+    
+    def registrar(self, movimiento):
+        """
+        Incorpora un movimiento; solo las salidas cuentan como demanda
+        
+        Args:
+            movimiento (dict): Movimiento con "tipo", "codigo", "cantidad" y "fecha"
+            
+        Rendimiento: O(1)
+        """
+        if movimiento["tipo"] != "SALIDA":
+            return
+        dia = movimiento["fecha"].toordinal()
+        estado = self._estados.get(movimiento["codigo"])
+        if estado is None:
+            estado = self._estados[movimiento["codigo"]] = _EstadoDemanda(dia)
+        elif dia > estado.dia:
+            self._avanzar(estado, dia)
+        estado.demanda_dia += movimiento["cantidad"]
+    
+    def _cerrar_dia(self, estado):
+        """Función auxiliar: actualiza ambos modelos con la demanda del cubo abierto"""
+        demanda = estado.demanda_dia
+        alfa, beta = self.alfa, self.beta
+        
+        if estado.dias_con_demanda == 0:
+            # Primera demanda: inicializar los modelos con la observación
+            estado.nivel = float(demanda)
+            estado.tamano = float(demanda)
+            estado.intervalo = 1.0
+        else:
+            error = demanda - estado.nivel
+            estado.varianza_ses += beta * (error * error - estado.varianza_ses)
+            estado.nivel += alfa * error
+            
+            error = demanda - estado.tamano / estado.intervalo
+            estado.varianza_croston += beta * (error * error - estado.varianza_croston)
+            estado.tamano += alfa * (demanda - estado.tamano)
+            estado.intervalo += alfa * (estado.sin_demanda + 1 - estado.intervalo)
+        
+        estado.sin_demanda = 0
+        estado.dias_con_demanda += 1
+        estado.dias_observados += 1
+    
+    def _dias_sin_demanda(self, estado, dias):
+        """
+        Función auxiliar: aplica `dias` días consecutivos de demanda cero
+        
+        Rendimiento: O(1) - sumas geométricas en lugar de un ciclo por día
+        """
+        alfa, beta = self.alfa, self.beta
+        decaimiento_error = (1 - beta) ** dias
+        
+        # SES: el error de cada día es -nivel y el nivel decae por (1 - alfa)
+        nivel = estado.nivel
+        razon = (1 - alfa) ** 2 / (1 - beta)
+        if abs(razon - 1) < 1e-12:
+            serie = dias
+        else:
+            serie = (1 - razon ** dias) / (1 - razon)
+        estado.varianza_ses = (decaimiento_error * estado.varianza_ses
+                               + beta * (1 - beta) ** (dias - 1) * nivel * nivel * serie)
+        estado.nivel = nivel * (1 - alfa) ** dias
+        
+        # Croston: el pronóstico no cambia entre demandas, el error es constante
+        pronostico = estado.tamano / estado.intervalo
+        estado.varianza_croston = (decaimiento_error * estado.varianza_croston
+                                   + (1 - decaimiento_error) * pronostico * pronostico)
+        estado.sin_demanda += dias
+        estado.dias_observados += dias
+    
+    def _avanzar(self, estado, dia):
+        """Función auxiliar: cierra el cubo abierto y los días vacíos hasta `dia`"""
+        if estado.demanda_dia:
+            self._cerrar_dia(estado)
+        elif estado.dias_con_demanda:
+            self._dias_sin_demanda(estado, 1)
+        vacios = dia - estado.dia - 1
+        if vacios > 0 and estado.dias_con_demanda:
+            self._dias_sin_demanda(estado, vacios)
+        estado.dia = dia
+        estado.demanda_dia = 0
+    
+    def pronostico(self, codigo_producto, fecha=None):
+        """
+        Pronóstico de demanda diaria de un producto
+        
+        El cubo abierto se incluye como si el día hubiera terminado, sin
+        modificar el estado guardado.
+        
+        Args:
+            codigo_producto (str): Código del producto
+            fecha (datetime.date): Día de consulta (por defecto hoy)
+            
+        Returns:
+            dict: Demanda diaria, desviación del error, método usado
+            ("SES" o "CROSTON") y días observados, o None sin demanda registrada
+            
+        Rendimiento: O(1)
+        """
+        estado = self._estados.get(codigo_producto)
+        if estado is None:
+            return None
+        
+        estado = estado.copiar()
+        dia = (fecha or datetime.date.today()).toordinal()
+        self._avanzar(estado, max(dia, estado.dia + 1))
+        
+        if estado.intervalo >= UMBRAL_INTERMITENTE:
+            metodo = "CROSTON"
+            demanda = estado.tamano / estado.intervalo
+            varianza = estado.varianza_croston
+        else:
+            metodo = "SES"
+            demanda = estado.nivel
+            varianza = estado.varianza_ses
+        
+        return {
+            "codigo": codigo_producto,
+            "demanda_diaria": demanda,
+            "desviacion_error": math.sqrt(varianza),
+            "metodo": metodo,
+            "intervalo_medio": estado.intervalo,
+            "dias_observados": estado.dias_observados,
+            "dias_con_demanda": estado.dias_con_demanda
         }
+    
+    def niveles(self, codigo_producto, tiempo_entrega=TIEMPO_ENTREGA_DIAS,
+                factor_servicio=FACTOR_SERVICIO, fecha=None):
+        """
+        Niveles de inventario recomendados a partir del pronóstico
         
-        alertas.append(alerta)
+        Stock de seguridad = factor de servicio × desviación del error ×
+        √(tiempo de entrega); punto de reorden = demanda durante la
+        entrega + seguridad; máximo = reorden + lote económico.
         
+        Returns:
+            dict: Pronóstico más stock_seguridad, punto_reorden y
+            stock_maximo, o None sin demanda registrada
+            
+        Rendimiento: O(1)
+        """
+        resultado = self.pronostico(codigo_producto, fecha)
+        if resultado is None:
+            return None
+        demanda = resultado["demanda_diaria"]
+        stock_seguridad = int(math.ceil(factor_servicio * resultado["desviacion_error"]
+                                        * math.sqrt(tiempo_entrega)))
+        punto_reorden = int(math.ceil(demanda * tiempo_entrega)) + stock_seguridad
+        resultado["stock_seguridad"] = stock_seguridad
+        resultado["punto_reorden"] = punto_reorden
+        resultado["stock_maximo"] = punto_reorden + int(math.ceil(demanda * DIAS_LOTE_ECONOMICO))
+        return resultado
+    
+    def reconstruir(self, lista_movimientos):
+        """
+        Reconstruye los pronósticos a partir de una lista de movimientos
+        
+        Rendimiento: O(n) donde n = movimientos
+        """
+        self._estados.clear()
+        for movimiento in sorted(lista_movimientos, key=lambda m: m["fecha"]):
+            self.registrar(movimiento)
+    
+    def exportar(self):
+        """Estado de cada producto como lista de valores (para la instantánea)"""
+        return {codigo: [getattr(estado, campo) for campo in _EstadoDemanda.__slots__]
+                for codigo, estado in self._estados.items()}
+    
+    def restaurar(self, datos):
+        """Reemplaza los estados por los de una instantánea"""
+        self._estados.clear()
+        for codigo, valores in datos.items():
+            estado = self._estados[codigo] = _EstadoDemanda(0)
+            for campo, valor in zip(_EstadoDemanda.__slots__, valores):
+                setattr(estado, campo, valor)
+    
+    def __len__(self):
+        return len(self._estados)
+
+
+pronostico_demanda = PronosticoDemanda()  # Demanda diaria por producto, actualizada con cada salida
+
+
+def _evaluar_alerta(codigo, producto):
+    """
+    Función auxiliar que clasifica el stock de un producto
+    
+    Returns:
+        dict: Alerta CRÍTICO/BAJO/ADVERTENCIA, o None si el stock es suficiente
+    """
+    stock_actual, stock_minimo, stock_maximo = producto.stock, producto.min, producto.max
+    
+    # Determinar estado del stock
+    if stock_actual <= 0:
+        nivel = "CRÍTICO"
+        urgencia = "INMEDIATA"
+        cantidad_sugerida = stock_maximo
+    elif stock_actual <= stock_minimo:
+        nivel = "BAJO"
+        urgencia = "ALTA"
+        cantidad_sugerida = stock_maximo - stock_actual
+    elif stock_actual <= stock_minimo * 1.5:
+        nivel = "ADVERTENCIA"
+        urgencia = "MEDIA"
+        cantidad_sugerida = stock_maximo - stock_actual
+    else:
+        return None
+    
+    # Crear alerta
+    return {
+        "codigo": codigo,
+        "producto": producto.nombre,
+        "stock_actual": stock_actual,
+        "stock_minimo": stock_minimo,
+        "nivel": nivel,
+        "urgencia": urgencia,
+        "cantidad_sugerida": cantidad_sugerida,
+        "costo_estimado": cantidad_sugerida * producto.precio
+    }
+
+
+def generar_alertas_reabastecimiento():
+    """
+    Función para generar alertas de reabastecimiento
+    
+    Lee las alertas vigentes de motor_alertas, que se actualizan con cada
+    movimiento, en lugar de reevaluar todo el catálogo.
+    
+    Returns:
+        list: Lista de alertas generadas, de la más urgente a la menos urgente
+        
+    Rendimiento: O(k) donde k = alertas vigentes, sin recorrer los productos
+    """
+    alertas = motor_alertas.alertas_actuales()
+    
+    print("🚨 ANÁLISIS DE REABASTECIMIENTO:")
+    print("-" * 40)
+    
+    for alerta in alertas:
         # Mostrar alerta
-        print(f"⚠️  {nivel}: {producto['nombre']}")
-        print(f"    Stock: {stock_actual}/{stock_minimo} (mínimo)")
-        print(f"    Sugerencia: Pedir {cantidad_sugerida} unidades")
+        print(f"⚠️  {alerta['nivel']}: {alerta['producto']}")
+        print(f"    Stock: {alerta['stock_actual']}/{alerta['stock_minimo']} (mínimo)")
+        print(f"    Sugerencia: Pedir {alerta['cantidad_sugerida']} unidades")
         print(f"    Costo estimado: ${alerta['costo_estimado']:.2f}")
         print()
     
@@ -236,6 +1113,997 @@ def generar_alertas_reabastecimiento():
     return alertas
 
 
+# Prioridad de cada nivel de alerta (menor = más urgente)
+PRIORIDAD_NIVEL = {"CRÍTICO": 0, "BAJO": 1, "ADVERTENCIA": 2}
+
+
+class MotorAlertas:
+    """
+    Motor de alertas de reabastecimiento basado en eventos
+    
+    Cada cambio de stock reevalúa solo el producto afectado con las mismas
+    reglas que generar_alertas_reabastecimiento. Las alertas vigentes se
+    guardan en un diccionario y sus claves de orden (urgencia y costo
+    estimado, mayor costo primero) en una lista mantenida ordenada con
+    bisect, de modo que las lecturas ordenadas no necesitan ordenar.
+    """
+    
+    def __init__(self, catalogo=None):
+        """
+        Args:
+            catalogo (dict): Productos a vigilar (por defecto el `inventario` global)
+        """
+        self._catalogo = catalogo
+        self._alertas = {}   # codigo -> alerta vigente
+        self._claves = {}    # codigo -> clave vigente en _ordenadas
+        self._ordenadas = []  # (prioridad, -costo, codigo) en orden creciente
+        self._candado = threading.Lock()  # Solo para actualizar y leer la lista ordenada
+    
+    @staticmethod
+    def _orden(alerta):
+        return (PRIORIDAD_NIVEL[alerta["nivel"]], -alerta["costo_estimado"], alerta["codigo"])
+    
+    def evaluar(self, codigo):
+        """
+        Reevalúa un producto tras un cambio de stock o de niveles
+        
+        Args:
+            codigo (str): Código del producto
+            
+        Returns:
+            dict: Alerta vigente del producto, o None
+            
+        Rendimiento: O(log k) comparaciones más un desplazamiento O(k) de
+        la lista, donde k = alertas vigentes
+        """
+        producto = (inventario if self._catalogo is None else self._catalogo).get(codigo)
+        alerta = None if producto is None else _evaluar_alerta(codigo, producto)
+        
+        with self._candado:
+            # Quitar la clave anterior del producto (única por código)
+            clave = self._claves.pop(codigo, None)
+            if clave is not None:
+                del self._ordenadas[bisect.bisect_left(self._ordenadas, clave)]
+            
+            if alerta is None:
+                self._alertas.pop(codigo, None)
+            else:
+                self._alertas[codigo] = alerta
+                clave = self._claves[codigo] = self._orden(alerta)
+                bisect.insort(self._ordenadas, clave)
+        return alerta
+    
+    def reconstruir(self):
+        """
+        Evalúa todo el catálogo (solo al iniciar o tras cargas externas)
+        
+        Rendimiento: O(n log n) donde n = número de productos
+        """
+        with self._candado:
+            self._alertas.clear()
+            self._claves.clear()
+            self._ordenadas = []
+        for codigo in (inventario if self._catalogo is None else self._catalogo):
+            self.evaluar(codigo)
+    
+    def alertas_actuales(self):
+        """
+        Alertas vigentes ordenadas por urgencia y costo estimado
+        
+        Returns:
+            list: Alertas con el mismo formato que generar_alertas_reabastecimiento
+            
+        Rendimiento: O(k) donde k = alertas vigentes, sin ordenar ni recorrer el catálogo
+        """
+        with self._candado:
+            alertas = self._alertas
+            return [alertas[clave[2]] for clave in self._ordenadas]
+    
+    def mas_urgentes(self, cantidad):
+        """
+        Las `cantidad` alertas más urgentes
+        
+        Rendimiento: O(cantidad), sin recorrer el catálogo
+        """
+        with self._candado:
+            alertas = self._alertas
+            return [alertas[clave[2]] for clave in self._ordenadas[:cantidad]]
+    
+    def __len__(self):
+        return len(self._alertas)
+
+
+motor_alertas = MotorAlertas()  # Alertas vigentes, actualizadas con cada movimiento
+motor_alertas.reconstruir()
+
+
+class AlmacenPersistente:
+    """
+    Persistencia del inventario con registro de escritura anticipada (WAL)
+    
+    Cada movimiento (y cada cambio de niveles mínimo/máximo, como registro
+    "NIVELES") se agrega como una línea JSON al archivo movimientos.log
+    antes de aplicarse en memoria. Periódicamente se escribe una
+    instantánea compacta con el stock y los niveles de todos los
+    productos, los agregados de indice_movimientos, el estado de
+    pronostico_demanda y la secuencia del último registro incluido; en
+    ese momento el log se rota a la carpeta historial/, de modo que el
+    log activo solo contiene la cola posterior a la instantánea.
+    
+    Al reiniciar se carga la instantánea y se reproduce solo la cola del
+    log, así que el tiempo de arranque depende del catálogo y de la cola,
+    no del historial acumulado. Los movimientos anteriores a la
+    instantánea se leen del historial recién cuando se consultan las
+    secuencias del índice (o al llamar cargar_historial).
+    
+    registrar() puede llamarse desde varios hilos: solo la asignación de
+    secuencias y la escritura ocurren bajo el candado del almacén, y el
+    fsync agrupado se hace fuera de él. Las instantáneas se toman con
+    InventarioConcurrente.instantanea(), que detiene antes a los
+    escritores.
+    """
+    
+    ARCHIVO_LOG = "movimientos.log"
+    ARCHIVO_SNAPSHOT = "snapshot.json"
+    CARPETA_HISTORIAL = "historial"
+    
+    def __init__(self, directorio, fsync_cada=100, snapshot_cada=10000):
+        """
+        Args:
+            directorio (str): Carpeta donde se guardan log e instantánea
+            fsync_cada (int): Registros entre cada fsync. Cada registro se
+                escribe en el archivo antes de aplicarse; el fsync agrupado
+                solo expone los últimos `fsync_cada` registros a una caída
+                del sistema operativo (1 = fsync en cada escritura)
+            snapshot_cada (int): Movimientos entre instantáneas automáticas (0 = manual)
+        """
+        self.directorio = directorio
+        self.fsync_cada = fsync_cada
+        self.snapshot_cada = snapshot_cada
+        self.ruta_log = os.path.join(directorio, self.ARCHIVO_LOG)
+        self.ruta_snapshot = os.path.join(directorio, self.ARCHIVO_SNAPSHOT)
+        self.ruta_historial = os.path.join(directorio, self.CARPETA_HISTORIAL)
+        self.secuencia = 0
+        self.secuencia_snapshot = 0
+        self._limite_historial = 0  # Movimientos con secuencia <= límite aún no cargados en memoria
+        self._pendientes_fsync = 0
+        self._desde_snapshot = 0
+        self._log = None
+        self._candado = threading.Lock()  # Secuencia, escritura y rotación del log
+        os.makedirs(self.ruta_historial, exist_ok=True)
+    
+    @staticmethod
+    def _a_linea(secuencia, movimiento):
+        registro = dict(movimiento)
+        registro["seq"] = secuencia
+        registro["fecha"] = movimiento["fecha"].isoformat()
+        return json.dumps(registro, ensure_ascii=False) + "\n"
+    
+    @staticmethod
+    def _desde_linea(linea):
+        """Función auxiliar: registro de una línea del log, con la fecha convertida"""
+        registro = json.loads(linea)
+        registro["fecha"] = datetime.datetime.fromisoformat(registro["fecha"])
+        return registro
+    
+    def _segmentos_historial(self):
+        """Función auxiliar: rutas de los segmentos rotados, del más antiguo al más reciente"""
+        return [os.path.join(self.ruta_historial, nombre)
+                for nombre in sorted(os.listdir(self.ruta_historial)) if nombre.endswith(".log")]
+    
+    def cargar(self):
+        """
+        Restaura el inventario: instantánea + cola del log
+        
+        La instantánea restaura productos, agregados del índice y
+        pronósticos; luego se reproducen los registros del log con
+        secuencia posterior a ella. Los registros anteriores que sigan en
+        el log (caída entre la instantánea y la rotación) ya están
+        incluidos y se tratan como historial. Una última línea incompleta
+        (caída a mitad de escritura) se descarta.
+        
+        Returns:
+            int: Registros reproducidos desde el log posteriores a la instantánea
+            
+        Rendimiento: O(productos + registros de la cola); el historial
+        rotado no se lee al arrancar
+        """
+        if os.path.exists(self.ruta_snapshot):
+            with open(self.ruta_snapshot, encoding="utf-8") as archivo:
+                snapshot = json.load(archivo)
+            for codigo, producto in snapshot["inventario"].items():
+                inventario[codigo] = Producto(producto["nombre"], producto["stock"], producto["min"],
+                                              producto["max"], producto["precio"])
+            indice_movimientos.restaurar_agregados(snapshot["agregados"])
+            pronostico_demanda.restaurar(snapshot["pronostico"])
+            self.secuencia_snapshot = self.secuencia = snapshot["secuencia"]
+        
+        reproducidos = 0
+        historial_en_log = False
+        posicion = 0
+        if os.path.exists(self.ruta_log):
+            with open(self.ruta_log, "rb") as archivo:
+                for linea in archivo:
+                    if not linea.endswith(b"\n"):
+                        break  # Escritura incompleta
+                    posicion += len(linea)
+                    registro = self._desde_linea(linea)
+                    secuencia = registro.pop("seq")
+                    if secuencia <= self.secuencia_snapshot:
+                        historial_en_log = True
+                        continue
+                    self.secuencia = secuencia
+                    self._reproducir(registro)
+                    reproducidos += 1
+            # Eliminar una posible línea incompleta al final
+            with open(self.ruta_log, "r+b") as archivo:
+                archivo.truncate(posicion)
+        
+        if historial_en_log or self._segmentos_historial():
+            self._limite_historial = self.secuencia_snapshot
+            indice_movimientos.historial_pendiente = self.cargar_historial
+        self._log = open(self.ruta_log, "a", encoding="utf-8")
+        self._desde_snapshot = reproducidos
+        motor_alertas.reconstruir()
+        return reproducidos
+    
+    def _reproducir(self, registro):
+        """Función auxiliar que aplica un registro de la cola del log"""
+        producto = inventario.get(registro["codigo"])
+        
+        if registro["tipo"] == "NIVELES":
+            if producto is not None:
+                producto.min = registro["min"]
+                producto.max = registro["max"]
+            return
+        
+        if producto is not None:
+            producto.stock = registro["stock_resultante"]
+            if registro["tipo"] == "ENTRADA":
+                producto.precio = registro["precio"]
+        movimientos.append(registro)
+        indice_movimientos.agregar(registro)
+        pronostico_demanda.registrar(registro)
+    
+    def cargar_historial(self):
+        """
+        Incorpora los movimientos anteriores a la instantánea
+        
+        Lee los segmentos de historial/ (y los registros ya incluidos que
+        sigan al comienzo del log), los antepone a `movimientos` y los
+        agrega a las secuencias de indice_movimientos sin volver a contar
+        sus agregados ni el pronóstico, que vienen de la instantánea. Se
+        llama sola la primera vez que se consultan las secuencias del
+        índice.
+        
+        Returns:
+            int: Movimientos incorporados
+            
+        Rendimiento: O(movimientos históricos), una sola vez
+        """
+        indice_movimientos.historial_pendiente = None
+        limite, self._limite_historial = self._limite_historial, 0
+        historicos = []
+        for ruta in self._segmentos_historial() + [self.ruta_log]:
+            if not os.path.exists(ruta):
+                continue
+            with open(ruta, "rb") as archivo:
+                for linea in archivo:
+                    if not linea.endswith(b"\n"):
+                        break
+                    registro = self._desde_linea(linea)
+                    if registro.pop("seq") > limite:
+                        break  # Ya estaba en memoria (cola reproducida o posterior)
+                    if registro["tipo"] != "NIVELES":
+                        historicos.append(registro)
+        
+        movimientos[:0] = historicos
+        indice_movimientos.incorporar_historial(historicos)
+        return len(historicos)
+    
+    def registrar(self, lista_movimientos):
+        """
+        Escribe registros en el log antes de aplicarlos en memoria
+        
+        Args:
+            lista_movimientos (list): Movimientos o registros "NIVELES" aún no aplicados
+            
+        Rendimiento: O(m) escrituras secuenciales bajo el candado del
+        almacén; un fsync cada `fsync_cada` registros, fuera del candado
+        """
+        descriptor = None
+        with self._candado:
+            if self._log is None:
+                self._log = open(self.ruta_log, "a", encoding="utf-8")
+            lineas = []
+            for movimiento in lista_movimientos:
+                self.secuencia += 1
+                lineas.append(self._a_linea(self.secuencia, movimiento))
+            self._log.write("".join(lineas))
+            self._log.flush()
+            
+            self._desde_snapshot += len(lineas)
+            self._pendientes_fsync += len(lineas)
+            if self.fsync_cada and self._pendientes_fsync >= self.fsync_cada:
+                self._pendientes_fsync = 0
+                # Copia del descriptor: una rotación puede cerrar el log durante el fsync
+                descriptor = os.dup(self._log.fileno())
+        
+        if descriptor is not None:
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+    
+    def snapshot_pendiente(self):
+        """True si ya corresponde una instantánea automática"""
+        return bool(self.snapshot_cada) and self._desde_snapshot >= self.snapshot_cada
+    
+    def snapshot(self):
+        """
+        Escribe una instantánea compacta y rota el log
+        
+        La instantánea guarda el catálogo, los agregados del índice y los
+        pronósticos con la secuencia del último registro, y se escribe de
+        forma atómica; después el log activo pasa a historial/ con esa
+        secuencia en el nombre y se abre un log vacío. Una caída entre
+        ambos pasos es segura: al cargar, los registros con secuencia ya
+        incluida en la instantánea se tratan como historial.
+        
+        Con varios hilos escribiendo debe llamarse a través de
+        InventarioConcurrente.instantanea(), para que ningún registro
+        quede escrito pero sin aplicar.
+        
+        Rendimiento: O(productos)
+        """
+        with self._candado:
+            self._snapshot()
+    
+    def _snapshot(self):
+        """Función auxiliar de snapshot (con el candado del almacén tomado)"""
+        if self._log is not None:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._pendientes_fsync = 0
+        
+        contenido = {
+            "secuencia": self.secuencia,
+            "fecha": datetime.datetime.now().isoformat(),
+            "inventario": {codigo: producto.como_dict() for codigo, producto in inventario.items()},
+            "agregados": indice_movimientos.exportar_agregados(),
+            "pronostico": pronostico_demanda.exportar()
+        }
+        temporal = self.ruta_snapshot + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(contenido, archivo, ensure_ascii=False)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta_snapshot)
+        self.secuencia_snapshot = self.secuencia
+        
+        # Rotar el log: lo ya incluido en la instantánea pasa al historial
+        if os.path.exists(self.ruta_log) and os.path.getsize(self.ruta_log):
+            if self._log is not None:
+                self._log.close()
+            os.replace(self.ruta_log, os.path.join(self.ruta_historial, f"movimientos-{self.secuencia:012d}.log"))
+            self._log = open(self.ruta_log, "a", encoding="utf-8")
+        self._desde_snapshot = 0
+    
+    def cerrar(self):
+        """Sincroniza y cierra el log"""
+        with self._candado:
+            if self._log is not None:
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                self._log = None
+
+
+almacen_persistente = None  # AlmacenPersistente activo, si hay persistencia
+
+
+def activar_persistencia(directorio, fsync_cada=100, snapshot_cada=10000):
+    """
+    Función para activar la persistencia y restaurar el estado guardado
+    
+    Args:
+        directorio (str): Carpeta de log e instantáneas
+        fsync_cada (int): Registros entre cada fsync (1 = fsync en cada escritura)
+        snapshot_cada (int): Movimientos entre instantáneas automáticas
+        
+    Returns:
+        AlmacenPersistente: Almacén activo
+    """
+    global almacen_persistente
+    if almacen_persistente is not None:
+        almacen_persistente.cerrar()
+    
+    almacen = AlmacenPersistente(directorio, fsync_cada, snapshot_cada)
+    reproducidos = almacen.cargar()
+    almacen_persistente = almacen
+    print(f"💾 Persistencia activa en {directorio}: {reproducidos} movimientos reproducidos del log")
+    return almacen
+
+
+class EstadoInventario:
+    """
+    Estructuras sobre las que trabaja un InventarioConcurrente
+    
+    Permite crear núcleos aislados (benchmarks, pruebas) sin reemplazar
+    las variables globales del módulo.
+    """
+    
+    __slots__ = ("inventario", "movimientos", "indice_movimientos", "pronostico_demanda",
+                 "motor_alertas", "almacen")
+    
+    def __init__(self, catalogo, almacen=None):
+        """
+        Args:
+            catalogo (dict): Productos (codigo -> Producto)
+            almacen (AlmacenPersistente): Persistencia, o None
+        """
+        self.inventario = catalogo
+        self.movimientos = []
+        self.indice_movimientos = IndiceMovimientos()
+        self.pronostico_demanda = PronosticoDemanda()
+        self.motor_alertas = MotorAlertas(catalogo)
+        self.motor_alertas.reconstruir()
+        self.almacen = almacen
+
+
+class _EstadoGlobal:
+    """Estado formado por las variables globales del módulo, leídas en cada acceso"""
+    
+    @property
+    def inventario(self):
+        return inventario
+    
+    @property
+    def movimientos(self):
+        return movimientos
+    
+    @property
+    def indice_movimientos(self):
+        return indice_movimientos
+    
+    @property
+    def pronostico_demanda(self):
+        return pronostico_demanda
+    
+    @property
+    def motor_alertas(self):
+        return motor_alertas
+    
+    @property
+    def almacen(self):
+        return almacen_persistente
+
+
+class InventarioConcurrente:
+    """
+    Núcleo de inventario seguro para varios hilos
+    
+    Usa candados por franjas: cada producto se asigna a uno de
+    `num_franjas` candados, de modo que hilos que trabajan con productos
+    distintos no se bloquean entre sí, mientras que la verificación y el
+    descuento de stock de un mismo producto son atómicos (sin sobreventa).
+    
+    Las salidas pueden hacerse en dos fases: reservar() aparta unidades,
+    confirmar() las descuenta y registra el movimiento, y liberar() las
+    devuelve si el pedido se cancela.
+    
+    No hay un candado común a todas las operaciones: el stock, el
+    pronóstico y la secuencia del índice de cada producto quedan
+    protegidos por su franja, y las estructuras compartidas (escritura del
+    log, lista global del índice y orden de las alertas) solo se bloquean
+    durante su propia actualización. Las instantáneas toman todas las
+    franjas, así nunca ven un registro escrito pero sin aplicar.
+    
+    `nucleo_inventario` es el núcleo del inventario global: las funciones
+    registrar_entrada_productos, registrar_salida_productos y
+    registrar_movimientos_lote pasan por él, de modo que respetan sus
+    candados y sus reservas.
+    """
+    
+    def __init__(self, num_franjas=64, estado=None):
+        """
+        Args:
+            num_franjas (int): Número de candados (1 = un candado global)
+            estado (EstadoInventario): Estructuras propias; por defecto las
+                variables globales del módulo
+        """
+        self.estado = _EstadoGlobal() if estado is None else estado
+        self.num_franjas = num_franjas
+        self._candados = [threading.Lock() for _ in range(num_franjas)]
+        self._reservado = {}  # codigo -> unidades reservadas
+        self._reservas = {}   # id -> (codigo, cantidad)
+        self._ids = itertools.count(1)
+    
+    def _candado(self, codigo):
+        return self._candados[hash(codigo) % self.num_franjas]
+    
+    @contextlib.contextmanager
+    def bloquear(self, codigos):
+        """
+        Toma los candados de varios productos durante un bloque with
+        
+        Las franjas se adquieren en orden creciente para que dos lotes
+        concurrentes no se bloqueen mutuamente.
+        
+        Args:
+            codigos (iterable): Códigos de los productos a bloquear
+        """
+        with self._tomar_franjas(sorted({hash(codigo) % self.num_franjas for codigo in codigos})):
+            yield
+        self._instantanea_si_corresponde()
+    
+    @contextlib.contextmanager
+    def _tomar_franjas(self, franjas):
+        """Función auxiliar: adquiere las franjas indicadas (en orden creciente)"""
+        for franja in franjas:
+            self._candados[franja].acquire()
+        try:
+            yield
+        finally:
+            for franja in reversed(franjas):
+                self._candados[franja].release()
+    
+    def instantanea(self):
+        """
+        Toma una instantánea del almacén con todas las franjas bloqueadas
+        
+        Returns:
+            bool: True si había persistencia activa
+            
+        Rendimiento: O(productos); detiene a los escritores mientras dura
+        """
+        almacen = self.estado.almacen
+        if almacen is None:
+            return False
+        with self._tomar_franjas(range(self.num_franjas)):
+            almacen.snapshot()
+        return True
+    
+    def _instantanea_si_corresponde(self):
+        """Función auxiliar: instantánea automática (llamar sin franjas tomadas)"""
+        almacen = self.estado.almacen
+        if almacen is not None and almacen.snapshot_pendiente():
+            with self._tomar_franjas(range(self.num_franjas)):
+                if almacen.snapshot_pendiente():
+                    almacen.snapshot()
+    
+    def reservado(self, codigo):
+        """Unidades reservadas de un producto (llamar con su candado tomado)"""
+        return self._reservado.get(codigo, 0)
+    
+    def disponible(self, codigo):
+        """Stock menos las unidades reservadas"""
+        with self._candado(codigo):
+            return self.estado.inventario[codigo].stock - self._reservado.get(codigo, 0)
+    
+    def _aplicar_movimientos(self, lista_movimientos, codigos):
+        """
+        Función auxiliar: se llama con los candados de los productos tomados
+        
+        Los movimientos ya traen stock_resultante. Primero se escriben en
+        el log y solo después se aplican en memoria. Las franjas de los
+        productos protegen stock y pronóstico; el log, el índice y las
+        alertas bloquean solo su propia actualización.
+        """
+        estado = self.estado
+        if estado.almacen is not None:
+            estado.almacen.registrar(lista_movimientos)
+        catalogo = estado.inventario
+        for movimiento in lista_movimientos:
+            producto = catalogo[movimiento["codigo"]]
+            producto.stock = movimiento["stock_resultante"]
+            if movimiento["tipo"] == "ENTRADA":
+                producto.precio = movimiento["precio"]
+        estado.movimientos.extend(lista_movimientos)
+        indice, pronostico = estado.indice_movimientos, estado.pronostico_demanda
+        for movimiento in lista_movimientos:
+            indice.agregar(movimiento)
+            pronostico.registrar(movimiento)
+        for codigo in codigos:
+            estado.motor_alertas.evaluar(codigo)
+    
+    def actualizar_niveles(self, niveles):
+        """
+        Cambia el mínimo y el máximo de varios productos
+        
+        Los cambios se registran en el log como un registro "NIVELES"
+        antes de aplicarse, y las alertas de cada producto se reevalúan.
+        
+        Args:
+            niveles (dict): codigo -> (mínimo, máximo)
+            
+        Rendimiento: O(k) con un solo registro en el log para k productos
+        """
+        fecha = datetime.datetime.now()
+        registros = [
+            {"tipo": "NIVELES", "codigo": codigo, "min": minimo, "max": maximo, "fecha": fecha}
+            for codigo, (minimo, maximo) in niveles.items()
+        ]
+        estado = self.estado
+        with self.bloquear(niveles):
+            if estado.almacen is not None:
+                estado.almacen.registrar(registros)
+            for registro in registros:
+                producto = estado.inventario[registro["codigo"]]
+                producto.min, producto.max = registro["min"], registro["max"]
+                estado.motor_alertas.evaluar(registro["codigo"])
+    
+    def reservar(self, codigo, cantidad):
+        """
+        Aparta unidades de un producto si hay stock disponible
+        
+        Args:
+            codigo (str): Código del producto
+            cantidad (int): Unidades a reservar
+            
+        Returns:
+            int: Identificador de la reserva, o None si no hay stock suficiente
+            
+        Rendimiento: O(1) con el candado de la franja del producto
+        """
+        if cantidad <= 0:
+            raise ValueError("Cantidad debe ser mayor a 0")
+        with self._candado(codigo):
+            reservado = self._reservado.get(codigo, 0)
+            if self.estado.inventario[codigo].stock - reservado < cantidad:
+                return None
+            self._reservado[codigo] = reservado + cantidad
+        
+        id_reserva = next(self._ids)
+        self._reservas[id_reserva] = (codigo, cantidad)
+        return id_reserva
+    
+    def confirmar(self, id_reserva, motivo="Venta"):
+        """
+        Convierte una reserva en salida definitiva
+        
+        Args:
+            id_reserva (int): Identificador devuelto por reservar()
+            motivo (str): Motivo de la salida
+            
+        Returns:
+            dict: Movimiento registrado
+        """
+        codigo, cantidad = self._reservas.pop(id_reserva)
+        with self._candado(codigo):
+            self._reservado[codigo] -= cantidad
+            stock = self.estado.inventario[codigo].stock
+            movimiento = {
+                "tipo": "SALIDA",
+                "codigo": codigo,
+                "cantidad": cantidad,
+                "motivo": motivo,
+                "fecha": datetime.datetime.now(),
+                "stock_resultante": stock - cantidad
+            }
+            self._aplicar_movimientos([movimiento], (codigo,))
+        self._instantanea_si_corresponde()
+        return movimiento
+    
+    def liberar(self, id_reserva):
+        """Cancela una reserva y devuelve las unidades al disponible"""
+        codigo, cantidad = self._reservas.pop(id_reserva)
+        with self._candado(codigo):
+            self._reservado[codigo] -= cantidad
+    
+    def registrar_salida(self, codigo, cantidad, motivo="Venta"):
+        """
+        Verifica y descuenta stock de forma atómica (reserva + confirmación)
+        
+        Returns:
+            dict: Movimiento registrado, o None si no hay stock suficiente
+        """
+        if cantidad <= 0:
+            raise ValueError("Cantidad debe ser mayor a 0")
+        with self._candado(codigo):
+            stock = self.estado.inventario[codigo].stock
+            if stock - self._reservado.get(codigo, 0) < cantidad:
+                return None
+            movimiento = {
+                "tipo": "SALIDA",
+                "codigo": codigo,
+                "cantidad": cantidad,
+                "motivo": motivo,
+                "fecha": datetime.datetime.now(),
+                "stock_resultante": stock - cantidad
+            }
+            self._aplicar_movimientos([movimiento], (codigo,))
+        self._instantanea_si_corresponde()
+        return movimiento
+    
+    def registrar_entrada(self, codigo, cantidad, precio_compra):
+        """
+        Suma stock de forma atómica
+        
+        Returns:
+            dict: Movimiento registrado
+        """
+        if cantidad <= 0:
+            raise ValueError("Cantidad debe ser mayor a 0")
+        with self._candado(codigo):
+            stock = self.estado.inventario[codigo].stock
+            movimiento = {
+                "tipo": "ENTRADA",
+                "codigo": codigo,
+                "cantidad": cantidad,
+                "precio": precio_compra,
+                "fecha": datetime.datetime.now(),
+                "stock_resultante": stock + cantidad
+            }
+            self._aplicar_movimientos([movimiento], (codigo,))
+        self._instantanea_si_corresponde()
+        return movimiento
+
+
+class InventarioCandadoGlobal(InventarioConcurrente):
+    """
+    Línea base de benchmark_concurrencia: un único candado para todo
+    
+    Cada operación completa (verificación, log y fsync, stock, índice,
+    pronóstico y alertas) ocurre bajo el mismo candado, como en una
+    implementación sin franjas: dos pedidos nunca avanzan a la vez.
+    """
+    
+    def __init__(self, estado=None):
+        """
+        Args:
+            estado (EstadoInventario): Estructuras propias; por defecto las globales
+        """
+        super().__init__(1, estado)
+
+
+nucleo_inventario = InventarioConcurrente()  # Núcleo del inventario global (candados y reservas)
+
+
+def benchmark_concurrencia(num_hilos=8, pedidos_por_hilo=5000, num_productos=200, stock_inicial=500,
+                           con_log=False, fsync_cada=1):
+    """
+    Prueba de estrés multihilo: candados por franjas frente a candado global
+    
+    Varios hilos reservan y confirman (o liberan) salidas sobre productos
+    con stock limitado. Verifica que no haya sobreventa y mide pedidos/s
+    con InventarioCandadoGlobal (todo bajo un candado) y con
+    InventarioConcurrente (64 franjas). Cada configuración trabaja sobre
+    su propio EstadoInventario, sin tocar el inventario global.
+    
+    Sin log la carga es solo Python y el GIL serializa ambas
+    configuraciones, así que rinden parecido; con `con_log` cada pedido
+    escribe en un log con fsync y las franjas permiten que varios hilos
+    esperen al disco a la vez.
+    
+    Args:
+        num_hilos (int): Hilos de procesamiento de pedidos
+        pedidos_por_hilo (int): Pedidos que intenta cada hilo
+        num_productos (int): Productos simulados
+        stock_inicial (int): Stock inicial de cada producto
+        con_log (bool): Registrar cada pedido en un AlmacenPersistente temporal
+        fsync_cada (int): Registros entre fsync del log (solo con `con_log`)
+        
+    Returns:
+        list: Resultado por configuración (franjas, tiempo, pedidos/s, sobreventa)
+    """
+    codigos = [f"BENCH{i:05d}" for i in range(num_productos)]
+    resultados = []
+    
+    for nombre, crear_nucleo in (("global", InventarioCandadoGlobal),
+                                 ("franjas", lambda estado: InventarioConcurrente(64, estado))):
+        with (tempfile.TemporaryDirectory() if con_log else contextlib.nullcontext()) as directorio:
+            almacen = AlmacenPersistente(directorio, fsync_cada, snapshot_cada=0) if con_log else None
+            estado = EstadoInventario({codigo: Producto(codigo, stock_inicial, 10, 1000, 1.0) for codigo in codigos},
+                                      almacen)
+            nucleo = crear_nucleo(estado)
+            resultado = _medir_pedidos(nucleo, codigos, num_hilos, pedidos_por_hilo)
+            if almacen is not None:
+                almacen.cerrar()
+        
+        productos = estado.inventario.values()
+        vendido = sum(m["cantidad"] for m in estado.movimientos)
+        restante = sum(producto.stock for producto in productos)
+        resultado["candado"] = nombre
+        resultado["franjas"] = nucleo.num_franjas
+        resultado["sobreventa"] = (any(p.stock < 0 for p in productos)
+                                   or vendido + restante != stock_inicial * num_productos)
+        resultados.append(resultado)
+        
+        print(f"🧵 {nombre} ({nucleo.num_franjas} candados{', con log' if con_log else ''}): "
+              f"{resultado['pedidos_por_s']:,.0f} pedidos/s, "
+              f"sobreventa: {'SÍ' if resultado['sobreventa'] else 'no'}")
+    
+    return resultados
+
+
+def _medir_pedidos(nucleo, codigos, num_hilos, pedidos_por_hilo):
+    """Función auxiliar de benchmark_concurrencia: ejecuta los hilos y mide el tiempo"""
+    
+    def procesar_pedidos(semilla):
+        generador = random.Random(semilla)
+        for _ in range(pedidos_por_hilo):
+            codigo = generador.choice(codigos)
+            id_reserva = nucleo.reservar(codigo, generador.randint(1, 5))
+            if id_reserva is None:
+                continue
+            if generador.random() < 0.9:
+                nucleo.confirmar(id_reserva, "Pedido")
+            else:
+                nucleo.liberar(id_reserva)
+    
+    hilos = [threading.Thread(target=procesar_pedidos, args=(i,)) for i in range(num_hilos)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    tiempo = time.perf_counter() - inicio
+    return {"tiempo_s": tiempo, "pedidos_por_s": num_hilos * pedidos_por_hilo / tiempo}
+
+
+# Bandas de estado del stock (mismos criterios que mostrar_estado_inventario)
+BANDAS_ESTADO = {
+    "AGOTADO": "🔴",  # stock <= 0
+    "BAJO": "🟡",     # stock <= mínimo
+    "EXCESO": "🔵",   # stock > máximo
+    "NORMAL": "🟢"
+}
+CAMPOS_VALORACION = ["codigo", "nombre", "banda", "stock", "precio", "valor"]
+TAMANO_BUFFER_REPORTE = 1 << 20  # 1 MiB de buffer de escritura
+
+
+def _banda_estado(stock, minimo, maximo):
+    """Función auxiliar que clasifica el stock en una banda de BANDAS_ESTADO"""
+    if stock <= 0:
+        return "AGOTADO"
+    if stock <= minimo:
+        return "BAJO"
+    if stock > maximo:
+        return "EXCESO"
+    return "NORMAL"
+
+
+def generar_reporte_valoracion(ruta, formato="csv", productos=None):
+    """
+    Función para exportar la valoración del inventario (stock × precio)
+    
+    Recorre el catálogo una sola vez y escribe cada fila en cuanto se
+    calcula, con escritura en buffer; solo se conservan los totales por
+    banda, por lo que la memoria no crece con el número de productos.
+    En JSON el archivo tiene la forma {"filas": [...], "totales": {...}}.
+    
+    Args:
+        ruta (str): Archivo de salida
+        formato (str): "csv" o "json"
+        productos (iterable): Pares (codigo, Producto); por defecto el inventario
+        
+    Returns:
+        dict: Totales por banda (productos, unidades, valor), total
+        general y registros omitidos
+        
+    Rendimiento: O(n) tiempo, O(1) memoria adicional
+    """
+    if formato not in ("csv", "json"):
+        raise ValueError(f"Formato desconocido: {formato}")
+    
+    totales = {banda: {"productos": 0, "unidades": 0, "valor": 0.0} for banda in BANDAS_ESTADO}
+    omitidos = 0
+    
+    with open(ruta, "w", encoding="utf-8", newline="", buffering=TAMANO_BUFFER_REPORTE) as archivo:
+        if formato == "csv":
+            escritor = csv.writer(archivo)
+            escritor.writerow(CAMPOS_VALORACION)
+        else:
+            archivo.write('{"filas": [')
+            separador = "\n"
+        
+        for codigo, producto in (inventario.items() if productos is None else productos):
+            if not isinstance(producto, Producto):
+                omitidos += 1
+                continue
+            nombre, stock, minimo, maximo, precio = (producto.nombre, producto.stock, producto.min,
+                                                     producto.max, producto.precio)
+            banda = _banda_estado(stock, minimo, maximo)
+            valor = stock * precio
+            
+            total = totales[banda]
+            total["productos"] += 1
+            total["unidades"] += stock
+            total["valor"] += valor
+            
+            if formato == "csv":
+                escritor.writerow((codigo, nombre, banda, stock, precio, round(valor, 2)))
+            else:
+                archivo.write(separador)
+                archivo.write(json.dumps({
+                    "codigo": codigo, "nombre": nombre, "banda": banda,
+                    "stock": stock, "precio": precio, "valor": round(valor, 2)
+                }, ensure_ascii=False))
+                separador = ",\n"
+        
+        resumen = {
+            "bandas": totales,
+            "productos": sum(t["productos"] for t in totales.values()),
+            "valor_total": sum(t["valor"] for t in totales.values()),
+            "omitidos": omitidos
+        }
+        if formato == "json":
+            archivo.write('\n], "totales": ')
+            json.dump(resumen, archivo, ensure_ascii=False)
+            archivo.write("}\n")
+    
+    print(f"💰 Valoración exportada a {ruta}: {resumen['productos']} productos, "
+          f"valor total ${resumen['valor_total']:,.2f}")
+    for banda, total in totales.items():
+        if total["productos"]:
+            print(f"   {BANDAS_ESTADO[banda]} {banda}: {total['productos']} productos, "
+                  f"{total['unidades']} unidades, ${total['valor']:,.2f}")
+    
+    return resumen
+
+
+def _catalogo_sintetico(num_productos, semilla=0):
+    """Función auxiliar: genera (codigo, Producto) sin guardar el catálogo en memoria"""
+    generador = random.Random(semilla)
+    for i in range(num_productos):
+        minimo = generador.randint(5, 50)
+        yield (f"SKU{i:07d}",
+               Producto(f"Producto {i}", generador.randint(0, 200), minimo,
+                        minimo + generador.randint(20, 150), round(generador.uniform(1, 500), 2)))
+
+
+def benchmark_valoracion(num_productos=1000000, directorio=None, con_memoria=True):
+    """
+    Benchmark del reporte de valoración sobre un catálogo sintético
+    
+    Genera el catálogo al vuelo y mide tiempo, filas/s y tamaño del
+    archivo para cada formato. La memoria pico se mide en una pasada
+    aparte con tracemalloc para no alterar los tiempos.
+    
+    Args:
+        num_productos (int): Productos del catálogo sintético
+        directorio (str): Carpeta donde escribir los reportes (por defecto
+            una carpeta temporal que se elimina al terminar)
+        con_memoria (bool): Medir memoria pico
+        
+    Returns:
+        list: Resultado por formato (tiempo, filas/s, bytes, memoria pico)
+    """
+    resultados = []
+    temporal = tempfile.TemporaryDirectory() if directorio is None else contextlib.nullcontext(directorio)
+    with temporal as destino:
+        for formato in ("csv", "json"):
+            ruta = os.path.join(destino, f"valoracion_benchmark.{formato}")
+            inicio = time.perf_counter()
+            generar_reporte_valoracion(ruta, formato, _catalogo_sintetico(num_productos))
+            tiempo = time.perf_counter() - inicio
+            
+            memoria_pico = None
+            if con_memoria:
+                tracemalloc.start()
+                try:
+                    generar_reporte_valoracion(ruta, formato, _catalogo_sintetico(num_productos))
+                    memoria_pico = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+            
+            resultado = {
+                "formato": formato,
+                "productos": num_productos,
+                "tiempo_s": tiempo,
+                "filas_por_s": num_productos / tiempo,
+                "bytes": os.path.getsize(ruta),
+                "memoria_pico_bytes": memoria_pico
+            }
+            resultados.append(resultado)
+            texto_memoria = f", pico de memoria {memoria_pico / 1024:.0f} KiB" if con_memoria else ""
+            print(f"📄 {formato}: {resultado['filas_por_s']:,.0f} filas/s, "
+                  f"{resultado['bytes'] / 1e6:.1f} MB{texto_memoria}")
+    
+    return resultados
+
+
 def mostrar_estado_inventario():
     """Función auxiliar para mostrar el estado actual del inventario"""
     print("\n📦 ESTADO ACTUAL DEL INVENTARIO:")
@@ -247,14 +2115,7 @@ def mostrar_estado_inventario():
         maximo = producto["max"]
         
         # Indicador visual del nivel de stock
-        if stock <= 0:
-            indicador = "🔴"
-        elif stock <= minimo:
-            indicador = "🟡"
-        elif stock > maximo:
-            indicador = "🔵"
-        else:
-            indicador = "🟢"
+        indicador = BANDAS_ESTADO[_banda_estado(stock, minimo, maximo)]
         
         print(f"{indicador} {codigo}: {producto['nombre']}")
         print(f"    Stock: {stock} | Rango: {minimo}-{maximo} | Precio: ${producto['precio']}")
@@ -264,6 +2125,10 @@ def main():
     """Función principal para demostrar el sistema"""
     print("=== SISTEMA DE GESTIÓN DE INVENTARIO ===\n")
     
+    # Productos aislados durante la validación del catálogo
+    for codigo, errores in reporte_validacion["cuarentena"].items():
+        print(f"⚠️  {codigo} en cuarentena: {'; '.join(errores)}")
+    
     # Mostrar estado inicial
     mostrar_estado_inventario()
     
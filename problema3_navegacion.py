@@ -6,9 +6,22 @@ Sistema básico que implementa las 4 funciones requeridas para
 demostrar programación modular en navegación autónoma.
 """
 
+import io
+import os
+import json
+import bisect
 import random
 import math
+import time
+import heapq
 import datetime
+import contextlib
+from array import array
+
+try:
+    import numpy as np  # Opcional: solo requerido por el cuadro de sensores vectorizado
+except ImportError:
+    np = None
 
 # Variables globales del vehículo
 posicion_actual = {"x": 0, "y": 0}
@@ -87,42 +100,521 @@ def leer_sensores_proximidad():
     return sensores
 
 
+class MapaOcupacion:
+    """
+    Mapa de ocupación en cuadrícula para planificar rutas
+    
+    Cada celda cubre `resolucion` metros por lado y se guarda como un
+    byte (0 = libre, 1 = bloqueada) en un bytearray plano indexado por
+    fila * ancho + columna, lo que permite mapas de 1000x1000 celdas
+    con ~1 MB de memoria.
+    """
+    
+    def __init__(self, ancho, alto, resolucion=1.0, origen_x=0.0, origen_y=0.0):
+        """
+        Args:
+            ancho (int): Columnas de la cuadrícula
+            alto (int): Filas de la cuadrícula
+            resolucion (float): Metros por celda
+            origen_x, origen_y (float): Coordenadas de la esquina de la celda (0, 0)
+        """
+        self.ancho = ancho
+        self.alto = alto
+        self.resolucion = resolucion
+        self.origen_x = origen_x
+        self.origen_y = origen_y
+        self.celdas = bytearray(ancho * alto)
+    
+    def celda(self, punto):
+        """Celda (columna, fila) que contiene un punto {x, y}, o None si está fuera del mapa"""
+        columna = int((punto["x"] - self.origen_x) // self.resolucion)
+        fila = int((punto["y"] - self.origen_y) // self.resolucion)
+        if 0 <= columna < self.ancho and 0 <= fila < self.alto:
+            return columna, fila
+        return None
+    
+    def punto(self, columna, fila):
+        """Centro de una celda como punto {x, y}"""
+        return {
+            "x": round(self.origen_x + (columna + 0.5) * self.resolucion, 1),
+            "y": round(self.origen_y + (fila + 0.5) * self.resolucion, 1)
+        }
+    
+    def bloqueada(self, columna, fila):
+        """True si la celda está ocupada o fuera del mapa"""
+        if 0 <= columna < self.ancho and 0 <= fila < self.alto:
+            return self.celdas[fila * self.ancho + columna] != 0
+        return True
+    
+    def marcar(self, columna, fila, bloqueada=True):
+        """Bloquea o libera una celda"""
+        self.celdas[fila * self.ancho + columna] = 1 if bloqueada else 0
+    
+    def bloquear_rectangulo(self, x_min, y_min, x_max, y_max):
+        """Bloquea las celdas de un rectángulo en coordenadas del mundo (edificios, manzanas)"""
+        columna_min = max(0, int((x_min - self.origen_x) // self.resolucion))
+        columna_max = min(self.ancho - 1, int((x_max - self.origen_x) // self.resolucion))
+        fila_min = max(0, int((y_min - self.origen_y) // self.resolucion))
+        fila_max = min(self.alto - 1, int((y_max - self.origen_y) // self.resolucion))
+        for fila in range(fila_min, fila_max + 1):
+            inicio = fila * self.ancho
+            self.celdas[inicio + columna_min:inicio + columna_max + 1] = b"\x01" * (columna_max - columna_min + 1)
+
+
+# Costos enteros (milésimas de celda): sumas exactas, así los empates de f
+# son reales y el desempate por h sigue una sola de las rutas óptimas
+COSTO_RECTO = 1000
+COSTO_DIAGONAL = 1414
+
+# Movimientos en 8 direcciones: (columna, fila, costo)
+MOVIMIENTOS_GRILLA = [
+    (1, 0, COSTO_RECTO), (-1, 0, COSTO_RECTO), (0, 1, COSTO_RECTO), (0, -1, COSTO_RECTO),
+    (1, 1, COSTO_DIAGONAL), (1, -1, COSTO_DIAGONAL), (-1, 1, COSTO_DIAGONAL), (-1, -1, COSTO_DIAGONAL)
+]
+
+
+def _heuristica_octil(columna, fila, columna_fin, fila_fin):
+    """Distancia octil: exacta sin obstáculos en 8 direcciones, por lo tanto admisible"""
+    dx = abs(columna - columna_fin)
+    dy = abs(fila - fila_fin)
+    if dx < dy:
+        dx, dy = dy, dx
+    return COSTO_RECTO * (dx - dy) + COSTO_DIAGONAL * dy
+
+
+def buscar_ruta_grilla(mapa, inicio, fin, usar_heuristica=True):
+    """
+    Función para buscar la ruta más corta entre dos celdas
+    
+    A* con heap binario y heurística octil; con usar_heuristica=False
+    es Dijkstra (misma búsqueda con heurística cero), usado como
+    referencia en benchmark_planificador. Los movimientos diagonales no
+    pueden cortar esquinas de celdas bloqueadas.
+    
+    Args:
+        mapa (MapaOcupacion): Mapa de ocupación
+        inicio (tuple): Celda (columna, fila) de partida
+        fin (tuple): Celda (columna, fila) de llegada
+        usar_heuristica (bool): A* (True) o Dijkstra (False)
+        
+    Returns:
+        tuple: (lista de celdas desde inicio hasta fin o None si no hay
+        ruta, costo en celdas, nodos expandidos)
+        
+    Rendimiento: O(E log V) en el peor caso; A* expande solo los nodos
+    con f = g + h menor que el costo óptimo. El bucle interno no comprueba
+    límites (borde bloqueado), lee un solo bytearray para bloqueadas y
+    cerradas y usa enteros como entradas del heap: ~4 µs por nodo
+    expandido. En benchmark_planificador (1000x1000, 10 % bloqueado)
+    las rutas de esquina a esquina toman ~30-200 ms según los nodos
+    expandidos (7k-42k); no llegan a unos pocos milisegundos, que
+    requerirían expandir menos nodos, no un bucle más rápido
+    """
+    ancho = mapa.ancho
+    alto = mapa.alto
+    celdas = mapa.celdas
+    if celdas[inicio[1] * ancho + inicio[0]] or celdas[fin[1] * ancho + fin[0]]:
+        return None, math.inf, 0
+    
+    # Copia con un borde de celdas bloqueadas: los vecinos de cualquier celda
+    # del mapa existen, así que el bucle interno no comprueba límites.
+    # 0 = libre, 1 = bloqueada, 2 = cerrada (ya expandida)
+    ancho_borde = ancho + 2
+    estado = bytearray(b"\x01") * (ancho_borde * (alto + 2))
+    for fila in range(alto):
+        destino = (fila + 1) * ancho_borde + 1
+        estado[destino:destino + ancho] = celdas[fila * ancho:(fila + 1) * ancho]
+    
+    columna_fin = fin[0] + 1
+    fila_fin = fin[1] + 1
+    indice_inicio = (inicio[1] + 1) * ancho_borde + inicio[0] + 1
+    indice_fin = fila_fin * ancho_borde + columna_fin
+    
+    # Desplazamientos de índice por movimiento; las diagonales guardan además
+    # los dos vecinos rectos que no se pueden cortar
+    rectos = [(df * ancho_borde + dc, dc, df, paso) for dc, df, paso in MOVIMIENTOS_GRILLA if not (dc and df)]
+    diagonales = [(df * ancho_borde + dc, dc, df, paso, df * ancho_borde, dc)
+                  for dc, df, paso in MOVIMIENTOS_GRILLA if dc and df]
+    
+    # Cada entrada del heap es un solo entero (f, h, indice) en campos de bits:
+    # mismo orden y desempate que la tupla, sin crear una tupla por vecino
+    bits_indice = len(estado).bit_length()
+    bits_h = (COSTO_DIAGONAL * (ancho + alto)).bit_length()
+    mascara_indice = (1 << bits_indice) - 1
+    
+    sin_ruta = 1 << 62
+    costos = array("q", [sin_ruta]) * len(estado)
+    anteriores = {indice_inicio: -1}
+    costos[indice_inicio] = 0
+    h = _heuristica_octil(inicio[0], inicio[1], fin[0], fin[1]) if usar_heuristica else 0
+    # Con f igual se prefiere el menor h (el más cercano al fin)
+    abiertos = [(((h << bits_h) | h) << bits_indice) | indice_inicio]
+    expandidos = 0
+    pop = heapq.heappop
+    push = heapq.heappush
+    
+    while abiertos:
+        indice = pop(abiertos) & mascara_indice
+        if estado[indice]:
+            continue  # Entrada obsoleta (ya cerrada)
+        if indice == indice_fin:
+            break
+        estado[indice] = 2
+        expandidos += 1
+        
+        fila, columna = divmod(indice, ancho_borde)
+        costo_actual = costos[indice]
+        for desplazamiento, dc, df, paso in rectos:
+            vecino = indice + desplazamiento
+            if estado[vecino]:
+                continue  # Bloqueada, cerrada o borde
+            nuevo_costo = costo_actual + paso
+            if nuevo_costo < costos[vecino]:
+                costos[vecino] = nuevo_costo
+                anteriores[vecino] = indice
+                if usar_heuristica:
+                    dx = columna + dc - columna_fin
+                    dy = fila + df - fila_fin
+                    dx = -dx if dx < 0 else dx
+                    dy = -dy if dy < 0 else dy
+                    h = COSTO_RECTO * (dx - dy) + COSTO_DIAGONAL * dy if dx >= dy else \
+                        COSTO_RECTO * (dy - dx) + COSTO_DIAGONAL * dx
+                push(abiertos, ((((nuevo_costo + h) << bits_h) | h) << bits_indice) | vecino)
+        for desplazamiento, dc, df, paso, esquina_fila, esquina_columna in diagonales:
+            vecino = indice + desplazamiento
+            if estado[vecino]:
+                continue
+            if estado[indice + esquina_fila] == 1 or estado[indice + esquina_columna] == 1:
+                continue  # Sin cortar esquinas
+            nuevo_costo = costo_actual + paso
+            if nuevo_costo < costos[vecino]:
+                costos[vecino] = nuevo_costo
+                anteriores[vecino] = indice
+                if usar_heuristica:
+                    dx = columna + dc - columna_fin
+                    dy = fila + df - fila_fin
+                    dx = -dx if dx < 0 else dx
+                    dy = -dy if dy < 0 else dy
+                    h = COSTO_RECTO * (dx - dy) + COSTO_DIAGONAL * dy if dx >= dy else \
+                        COSTO_RECTO * (dy - dx) + COSTO_DIAGONAL * dx
+                push(abiertos, ((((nuevo_costo + h) << bits_h) | h) << bits_indice) | vecino)
+    else:
+        return None, math.inf, expandidos
+    
+    camino = []
+    indice = indice_fin
+    while indice != -1:
+        fila, columna = divmod(indice, ancho_borde)
+        camino.append((columna - 1, fila - 1))
+        indice = anteriores[indice]
+    camino.reverse()
+    return camino, costos[indice_fin] / COSTO_RECTO, expandidos
+
+
+def _simplificar_camino(camino):
+    """Función auxiliar: conserva solo las celdas donde cambia la dirección"""
+    if len(camino) <= 2:
+        return list(camino)
+    puntos = [camino[0]]
+    for anterior, actual, siguiente in zip(camino, camino[1:], camino[2:]):
+        if (actual[0] - anterior[0], actual[1] - anterior[1]) != (siguiente[0] - actual[0], siguiente[1] - actual[1]):
+            puntos.append(actual)
+    puntos.append(camino[-1])
+    return puntos
+
+
+def _puntos_de_paso(camino, origen, destino):
+    """Función auxiliar: cambios de dirección del camino, con origen y destino exactos"""
+    puntos = [mapa_navegacion.punto(columna, fila) for columna, fila in _simplificar_camino(camino)]
+    puntos[0] = {"x": origen["x"], "y": origen["y"]}
+    if len(puntos) > 1:
+        puntos[-1] = {"x": destino["x"], "y": destino["y"]}
+    else:
+        puntos.append({"x": destino["x"], "y": destino["y"]})
+    return puntos
+
+
+class ReplanificadorDStarLite:
+    """
+    Replanificador incremental D* Lite sobre un MapaOcupacion
+    
+    Busca desde el destino hacia el vehículo y conserva los costos (g,
+    rhs) entre ciclos. Cuando cambian celdas solo se reevalúan esas
+    celdas y sus vecinas, y la búsqueda repara la parte de la ruta
+    afectada en lugar de recalcularla completa. Usa los mismos
+    movimientos, costos enteros y heurística octil que
+    buscar_ruta_grilla.
+    
+    Las celdas bloqueadas por detecciones se guardan en una copia
+    propia del mapa (ocupacion): el mapa recibido (p. ej.
+    mapa_navegacion) no se modifica, y buscar_ruta_grilla sobre
+    ocupacion ve los mismos obstáculos que el replanificador.
+    """
+    
+    def __init__(self, mapa, inicio, fin, bloqueadas=()):
+        """
+        Args:
+            mapa (MapaOcupacion): Mapa estático (no se modifica)
+            inicio (tuple): Celda (columna, fila) del vehículo
+            fin (tuple): Celda (columna, fila) de destino
+            bloqueadas (iterable): Celdas (columna, fila) bloqueadas además del mapa
+        """
+        self.mapa = mapa
+        self.ocupacion = MapaOcupacion(mapa.ancho, mapa.alto, mapa.resolucion, mapa.origen_x, mapa.origen_y)
+        self.ocupacion.celdas[:] = mapa.celdas
+        for columna, fila in bloqueadas:
+            self.ocupacion.marcar(columna, fila)
+        self.inicio = inicio
+        self.fin = fin
+        self.km = 0
+        total = mapa.ancho * mapa.alto
+        self._g = [math.inf] * total
+        self._rhs = [math.inf] * total
+        self._cola = []        # (k1, k2, indice) con eliminación diferida
+        self._en_cola = {}     # indice -> clave vigente
+        self._cache_vecinos = {}
+        self.expandidos_ultimo = 0
+        self.expandidos_total = 0
+        self.pendiente = False  # True si la última reparación se cortó por límite
+        
+        ancho = mapa.ancho
+        self._vecindad = [
+            (df * ancho + dc, dc, df, paso, (df * ancho, dc) if dc and df else None)
+            for dc, df, paso in MOVIMIENTOS_GRILLA
+        ]
+        self._indice_fin = self._indice(fin)
+        self._rhs[self._indice_fin] = 0
+        self._encolar(self._indice_fin)
+        self.calcular()
+    
+    def _indice(self, celda):
+        return celda[1] * self.mapa.ancho + celda[0]
+    
+    def _heuristica(self, indice):
+        """Distancia octil desde el inicio actual (la búsqueda va del destino al vehículo)"""
+        fila, columna = divmod(indice, self.mapa.ancho)
+        return _heuristica_octil(columna, fila, self.inicio[0], self.inicio[1])
+    
+    def _clave(self, indice):
+        g = self._g[indice]
+        rhs = self._rhs[indice]
+        minimo = g if g < rhs else rhs
+        return (minimo + self._heuristica(indice) + self.km, minimo)
+    
+    def _encolar(self, indice):
+        clave = self._clave(indice)
+        self._en_cola[indice] = clave
+        heapq.heappush(self._cola, clave + (indice,))
+    
+    def _vecinos(self, indice):
+        """
+        Vecinos alcanzables con su costo (simétrico: sirven como sucesores y predecesores)
+        
+        Rendimiento: se calculan una vez por celda y se guardan hasta
+        que cambia una celda de su entorno 3x3
+        """
+        vecinos = self._cache_vecinos.get(indice)
+        if vecinos is not None:
+            return vecinos
+        celdas = self.ocupacion.celdas
+        vecinos = []
+        if not celdas[indice]:
+            ancho = self.mapa.ancho
+            alto = self.mapa.alto
+            fila, columna = divmod(indice, ancho)
+            en_borde = columna == 0 or fila == 0 or columna == ancho - 1 or fila == alto - 1
+            for desplazamiento, dc, df, paso, esquinas in self._vecindad:
+                if en_borde and not (0 <= columna + dc < ancho and 0 <= fila + df < alto):
+                    continue
+                vecino = indice + desplazamiento
+                if celdas[vecino]:
+                    continue
+                if esquinas and (celdas[indice + esquinas[0]] or celdas[indice + esquinas[1]]):
+                    continue
+                vecinos.append((vecino, paso))
+        self._cache_vecinos[indice] = vecinos
+        return vecinos
+    
+    def _actualizar_vertice(self, indice):
+        g = self._g
+        if indice != self._indice_fin:
+            rhs = math.inf
+            for vecino, paso in self._vecinos(indice):
+                costo = paso + g[vecino]
+                if costo < rhs:
+                    rhs = costo
+            self._rhs[indice] = rhs
+        if g[indice] != self._rhs[indice]:
+            self._encolar(indice)
+        else:
+            self._en_cola.pop(indice, None)
+    
+    def _tope(self):
+        """Función auxiliar: clave vigente más pequeña, descartando entradas obsoletas"""
+        while self._cola:
+            k1, k2, indice = self._cola[0]
+            if self._en_cola.get(indice) == (k1, k2):
+                return (k1, k2)
+            heapq.heappop(self._cola)
+        return (math.inf, math.inf)
+    
+    def calcular(self, limite=None):
+        """
+        Repara los costos hasta que la ruta desde el inicio es óptima
+        
+        Si se alcanza el límite de expansiones la reparación queda
+        pendiente (self.pendiente) y la próxima llamada la continúa;
+        mientras tanto camino() no es confiable.
+        
+        Args:
+            limite (int): Máximo de nodos a expandir (None = sin límite)
+            
+        Returns:
+            int: Nodos expandidos en esta llamada
+        """
+        indice_inicio = self._indice(self.inicio)
+        g = self._g
+        rhs = self._rhs
+        expandidos = 0
+        self.pendiente = False
+        while True:
+            minimo_inicio = min(g[indice_inicio], rhs[indice_inicio])
+            if not (self._tope() < (minimo_inicio + self.km, minimo_inicio)
+                    or rhs[indice_inicio] != g[indice_inicio]):
+                break
+            if not self._cola:
+                break
+            if limite is not None and expandidos >= limite:
+                self.pendiente = True
+                break
+            k1, k2, indice = heapq.heappop(self._cola)
+            clave_nueva = self._clave(indice)
+            if (k1, k2) < clave_nueva:
+                self._encolar(indice)
+                continue
+            del self._en_cola[indice]
+            expandidos += 1
+            
+            if g[indice] > rhs[indice]:
+                g[indice] = rhs[indice]
+                for vecino, _ in self._vecinos(indice):
+                    self._actualizar_vertice(vecino)
+            else:
+                g[indice] = math.inf
+                self._actualizar_vertice(indice)
+                for vecino, _ in self._vecinos(indice):
+                    self._actualizar_vertice(vecino)
+        
+        self.expandidos_ultimo = expandidos
+        self.expandidos_total += expandidos
+        return expandidos
+    
+    def actualizar_celdas(self, cambios, inicio=None, limite=None):
+        """
+        Aplica cambios de ocupación y repara la ruta
+        
+        Args:
+            cambios (iterable): Pares ((columna, fila), bloqueada)
+            inicio (tuple): Nueva celda del vehículo, si se movió
+            limite (int): Máximo de nodos a expandir (ver calcular)
+            
+        Returns:
+            int: Nodos expandidos en la reparación
+            
+        Rendimiento: proporcional a la zona afectada por los cambios, no al mapa
+        """
+        if inicio is not None and inicio != self.inicio:
+            self.km += _heuristica_octil(self.inicio[0], self.inicio[1], inicio[0], inicio[1])
+            self.inicio = inicio
+        
+        ancho = self.mapa.ancho
+        alto = self.mapa.alto
+        afectados = set()
+        for (columna, fila), bloqueada in cambios:
+            if self.ocupacion.bloqueada(columna, fila) == bloqueada:
+                continue
+            self.ocupacion.marcar(columna, fila, bloqueada)
+            # La celda y sus vecinas: también cambian las diagonales que cruzan su esquina
+            for df in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if 0 <= columna + dc < ancho and 0 <= fila + df < alto:
+                        afectados.add((fila + df) * ancho + columna + dc)
+        for indice in afectados:
+            self._cache_vecinos.pop(indice, None)
+        for indice in afectados:
+            self._actualizar_vertice(indice)
+        return self.calcular(limite)
+    
+    def camino(self, limite=None):
+        """
+        Celdas desde el inicio hasta el destino siguiendo los costos g
+        
+        Returns:
+            list: Celdas (columna, fila), o None si no hay ruta
+        """
+        indice = self._indice(self.inicio)
+        indice_fin = self._indice_fin
+        if self._rhs[indice] == math.inf:
+            return None
+        g = self._g
+        ancho = self.mapa.ancho
+        camino = [self.inicio]
+        limite = limite or self.mapa.ancho * self.mapa.alto
+        while indice != indice_fin and len(camino) <= limite:
+            indice = min(self._vecinos(indice), key=lambda par: par[1] + g[par[0]])[0]
+            fila, columna = divmod(indice, ancho)
+            camino.append((columna, fila))
+        return camino if indice == indice_fin else None
+    
+    @property
+    def costo(self):
+        """Costo de la ruta actual en celdas (math.inf si no hay ruta)"""
+        return self._rhs[self._indice(self.inicio)] / COSTO_RECTO
+
+
+def _mapa_demostracion():
+    """Función auxiliar: área de 150x150 m con algunas manzanas bloqueadas"""
+    mapa = MapaOcupacion(150, 150, resolucion=1.0)
+    for x_min, y_min, x_max, y_max in [(20, 10, 45, 40), (55, 45, 80, 75), (30, 60, 50, 95), (85, 85, 95, 98)]:
+        mapa.bloquear_rectangulo(x_min, y_min, x_max, y_max)
+    return mapa
+
+
+mapa_navegacion = _mapa_demostracion()  # Mapa usado por calcular_ruta_optima
+
+
 def calcular_ruta_optima(origen, destino):
     """
     Procedimiento para calcular la ruta óptima
     
+    Planifica sobre mapa_navegacion con A* (buscar_ruta_grilla) y deja
+    en ruta_actual los puntos donde la ruta cambia de dirección,
+    empezando en el origen y terminando en el destino.
+    
     Args:
         origen (dict): Posición de inicio {x, y}
         destino (dict): Posición de destino {x, y}
         
-    Rendimiento: O(n) donde n = número de puntos intermedios
+    Rendimiento: O(E log V) en el peor caso; A* expande solo la zona
+    entre origen y destino
     """
-    global ruta_actual
+    global ruta_actual, replanificador
     
-    # Calcular distancia total
-    dx = destino["x"] - origen["x"]
-    dy = destino["y"] - origen["y"]
-    distancia_total = math.sqrt(dx*dx + dy*dy)
+    replanificador = None  # La próxima replanificación parte de esta ruta
+    celda_origen = mapa_navegacion.celda(origen)
+    celda_destino = mapa_navegacion.celda(destino)
+    if celda_origen is None or celda_destino is None:
+        ruta_actual = []
+        print("❌ Error: Origen o destino fuera del mapa")
+        return
     
-    # Generar puntos intermedios (ruta simple en línea recta con desviaciones)
-    num_puntos = max(5, int(distancia_total / 20))  # Un punto cada 20 unidades
-    ruta_actual = []
+    camino, _, expandidos = buscar_ruta_grilla(mapa_navegacion, celda_origen, celda_destino)
+    if camino is None:
+        ruta_actual = []
+        print(f"❌ Error: No existe ruta libre hacia ({destino['x']}, {destino['y']})")
+        return
     
-    for i in range(num_puntos + 1):
-        factor = i / num_puntos
-        
-        # Posición base en línea recta
-        x = origen["x"] + dx * factor
-        y = origen["y"] + dy * factor
-        
-        # Agregar pequeñas desviaciones para simular calles reales
-        if 0 < i < num_puntos:  # No desviar origen y destino
-            desviacion = random.uniform(-5, 5)
-            x += desviacion
-            y += desviacion
-        
-        punto = {"x": round(x, 1), "y": round(y, 1)}
-        ruta_actual.append(punto)
+    ruta_actual = _puntos_de_paso(camino, origen, destino)
     
     # Calcular distancia final de la ruta
     distancia_ruta = 0
@@ -140,6 +632,562 @@ def calcular_ruta_optima(origen, destino):
     print(f"   Puntos intermedios: {len(ruta_actual) - 2}")
     print(f"   Distancia: {distancia_ruta:.1f} metros")
     print(f"   Tiempo estimado: {tiempo_estimado:.1f} segundos")
+    print(f"   Nodos expandidos (A*): {expandidos}")
+
+
+def benchmark_planificador(tamano=1000, densidad=0.1, consultas=3, semilla=0):
+    """
+    Benchmark de A* frente a Dijkstra en una cuadrícula aleatoria
+    
+    Genera un mapa de tamano x tamano celdas con edificios rectangulares
+    hasta cubrir aproximadamente una fracción `densidad` del área, y
+    resuelve las mismas consultas con ambos algoritmos, verificando que
+    el costo de la ruta coincida.
+    
+    Args:
+        tamano (int): Celdas por lado
+        densidad (float): Fracción aproximada de celdas bloqueadas
+        consultas (int): Pares origen/destino a resolver
+        semilla (int): Semilla del generador
+        
+    Returns:
+        list: Resultado por consulta (tiempos en ms, nodos expandidos, costos)
+    """
+    generador = random.Random(semilla)
+    mapa = MapaOcupacion(tamano, tamano)
+    lado_maximo = max(2, tamano // 25)
+    while sum(mapa.celdas) < densidad * tamano * tamano:
+        x = generador.randrange(tamano)
+        y = generador.randrange(tamano)
+        mapa.bloquear_rectangulo(x, y, x + generador.randint(1, lado_maximo), y + generador.randint(1, lado_maximo))
+    
+    def celda_libre(minimo, maximo):
+        while True:
+            columna, fila = generador.randint(minimo, maximo), generador.randint(minimo, maximo)
+            if not mapa.bloqueada(columna, fila):
+                return columna, fila
+    
+    resultados = []
+    for _ in range(consultas):
+        # Origen y destino en esquinas opuestas para rutas largas
+        inicio = celda_libre(0, tamano // 10)
+        fin = celda_libre(tamano - tamano // 10, tamano - 1)
+        resultado = {"inicio": inicio, "fin": fin}
+        for nombre, usar_heuristica in (("a_estrella", True), ("dijkstra", False)):
+            comienzo = time.perf_counter()
+            _, costo, expandidos = buscar_ruta_grilla(mapa, inicio, fin, usar_heuristica)
+            resultado[nombre] = {
+                "tiempo_ms": (time.perf_counter() - comienzo) * 1000,
+                "expandidos": expandidos,
+                "costo": costo
+            }
+        resultado["mismo_costo"] = abs(resultado["a_estrella"]["costo"] - resultado["dijkstra"]["costo"]) < 1e-6
+        resultados.append(resultado)
+        
+        print(f"🧭 {inicio} → {fin}: A* {resultado['a_estrella']['tiempo_ms']:.1f} ms "
+              f"({resultado['a_estrella']['expandidos']} nodos) | Dijkstra "
+              f"{resultado['dijkstra']['tiempo_ms']:.1f} ms ({resultado['dijkstra']['expandidos']} nodos) | "
+              f"costo {'igual' if resultado['mismo_costo'] else 'DISTINTO'}")
+    
+    return resultados
+
+
+# Ángulo (grados, Este = 0, Norte = 90) de cada dirección de sensor
+ANGULOS_DIRECCION = {
+    "Este": 0, "NorEste": 45, "Norte": 90, "NorOeste": 135,
+    "Oeste": 180, "SurOeste": 225, "Sur": 270, "SurEste": 315
+}
+# Direcciones relativas al rumbo del vehículo (RADAR y cámaras)
+ANGULOS_RELATIVOS = {"frontal": 0, "lateral_izq": 90, "trasero": 180, "trasera": 180, "lateral_der": -90}
+RADIO_INFLADO_CELDAS = 1  # Margen alrededor de cada obstáculo detectado
+LIMITE_REPARACION_DSTAR = 1000  # Expansiones por ciclo antes de recurrir a A* completo
+
+replanificador = None        # ReplanificadorDStarLite de la ruta vigente
+celdas_obstaculos = set()    # Celdas bloqueadas por detecciones (no por el mapa estático)
+
+
+def _rumbo_actual():
+    """Función auxiliar: rumbo en grados hacia el siguiente punto de la ruta"""
+    if len(ruta_actual) < 2:
+        return 0.0
+    dx = ruta_actual[1]["x"] - posicion_actual["x"]
+    dy = ruta_actual[1]["y"] - posicion_actual["y"]
+    return math.degrees(math.atan2(dy, dx)) if dx or dy else 0.0
+
+
+def ubicar_obstaculo(obstaculo, posicion, rumbo):
+    """
+    Función para estimar la posición de un obstáculo en el mapa
+    
+    Args:
+        obstaculo (dict): Obstáculo de detectar_evitar_obstaculos
+        posicion (dict): Posición del vehículo {x, y}
+        rumbo (float): Rumbo del vehículo en grados
+        
+    Returns:
+        dict: Posición estimada {x, y}, o None si la dirección es desconocida
+    """
+    direccion = obstaculo["direccion"]
+    if direccion in ANGULOS_DIRECCION:
+        angulo = ANGULOS_DIRECCION[direccion]
+    elif direccion in ANGULOS_RELATIVOS:
+        angulo = rumbo + ANGULOS_RELATIVOS[direccion]
+    else:
+        return None
+    radianes = math.radians(angulo)
+    return {
+        "x": posicion["x"] + obstaculo["distancia"] * math.cos(radianes),
+        "y": posicion["y"] + obstaculo["distancia"] * math.sin(radianes)
+    }
+
+
+def replanificar_ruta(obstaculos, destino_ruta):
+    """
+    Procedimiento para reparar la ruta con los obstáculos del ciclo
+    
+    Convierte los obstáculos en celdas bloqueadas, calcula el delta
+    respecto del ciclo anterior (celdas nuevas y celdas liberadas) y se
+    lo entrega al replanificador D* Lite, que repara solo la parte
+    afectada de la ruta. Las celdas de las detecciones quedan en la
+    copia del replanificador; mapa_navegacion no se modifica. Si la
+    reparación supera LIMITE_REPARACION_DSTAR expansiones, la ruta de
+    este ciclo se calcula con A* y la reparación sigue en el próximo.
+    Actualiza ruta_actual desde la posición actual.
+    
+    Args:
+        obstaculos (list): Obstáculos de detectar_evitar_obstaculos
+        destino_ruta (dict): Destino {x, y}
+        
+    Returns:
+        int: Nodos expandidos en la reparación, o None si no se pudo planificar
+    """
+    global replanificador, celdas_obstaculos, ruta_actual
+    
+    mapa = mapa_navegacion
+    celda_vehiculo = mapa.celda(posicion_actual)
+    celda_destino = mapa.celda(destino_ruta)
+    if celda_vehiculo is None or celda_destino is None:
+        print("❌ Error: Vehículo o destino fuera del mapa")
+        return None
+    
+    # Celdas ocupadas por las detecciones de este ciclo
+    rumbo = _rumbo_actual()
+    nuevas = set()
+    for obstaculo in obstaculos:
+        punto = ubicar_obstaculo(obstaculo, posicion_actual, rumbo)
+        centro = mapa.celda(punto) if punto is not None else None
+        if centro is None:
+            continue
+        for df in range(-RADIO_INFLADO_CELDAS, RADIO_INFLADO_CELDAS + 1):
+            for dc in range(-RADIO_INFLADO_CELDAS, RADIO_INFLADO_CELDAS + 1):
+                celda = (centro[0] + dc, centro[1] + df)
+                if celda in (celda_vehiculo, celda_destino):
+                    continue
+                if mapa.bloqueada(*celda):
+                    continue  # Fuera del mapa o parte del mapa estático
+                nuevas.add(celda)
+    
+    cambios = [(celda, True) for celda in nuevas - celdas_obstaculos]
+    cambios += [(celda, False) for celda in celdas_obstaculos - nuevas]
+    celdas_obstaculos = nuevas
+    
+    if replanificador is None or replanificador.fin != celda_destino:
+        replanificador = ReplanificadorDStarLite(mapa, celda_vehiculo, celda_destino, nuevas)
+        expandidos = replanificador.expandidos_ultimo
+    else:
+        expandidos = replanificador.actualizar_celdas(cambios, celda_vehiculo, LIMITE_REPARACION_DSTAR)
+    
+    if replanificador.pendiente:
+        camino, _, expandidos_astar = buscar_ruta_grilla(replanificador.ocupacion, celda_vehiculo, celda_destino)
+        expandidos += expandidos_astar
+        metodo = "A* (reparación D* Lite pendiente)"
+    else:
+        camino = replanificador.camino()
+        metodo = "D* Lite"
+    if camino is None:
+        ruta_actual = []
+        print(f"❌ Sin ruta libre: {len(cambios)} celdas cambiadas, {expandidos} nodos expandidos")
+        return expandidos
+    
+    ruta_actual = _puntos_de_paso(camino, posicion_actual, destino_ruta)
+    print(f"🔁 Ruta reparada con {metodo}: {len(cambios)} celdas cambiadas, {expandidos} nodos expandidos, "
+          f"{len(ruta_actual) - 2} puntos intermedios")
+    return expandidos
+
+
+def _mapa_muros(tamano, separacion=10):
+    """Función auxiliar: muros horizontales con un paso en extremos alternos (ruta en zigzag)"""
+    mapa = MapaOcupacion(tamano, tamano)
+    for numero, fila in enumerate(range(separacion, tamano - 1, separacion)):
+        mapa.celdas[fila * tamano:(fila + 1) * tamano] = b"\x01" * tamano
+        paso = tamano - 3 if numero % 2 == 0 else 0
+        mapa.celdas[fila * tamano + paso:fila * tamano + paso + 3] = bytes(3)
+    return mapa
+
+
+def benchmark_replanificacion(tamano=300, ciclos=20, bloqueos_por_ciclo=10, avance_por_ciclo=5, semilla=0,
+                              escenario="aleatorio"):
+    """
+    Benchmark de D* Lite frente a A* completo en cada ciclo
+    
+    En cada ciclo el vehículo avanza por la ruta, aparecen obstáculos
+    sobre el tramo siguiente y desaparecen los del ciclo anterior. Se
+    compara la reparación incremental con recalcular desde cero.
+    
+    Escenarios:
+    - "aleatorio": 10% de bloques sueltos. La heurística octil guía a
+      A* casi en línea recta y recalcular suele ser más barato que
+      reparar (cada expansión de D* Lite reevalúa 8 vecinas).
+    - "muros": muros con pasos en extremos alternos. La heurística
+      engaña a A*, que expande gran parte del mapa en cada ciclo,
+      mientras D* Lite solo repara el tramo cercano al vehículo.
+    
+    Args:
+        tamano (int): Celdas por lado
+        ciclos (int): Ciclos de percepción simulados
+        bloqueos_por_ciclo (int): Celdas bloqueadas sobre la ruta por ciclo
+        avance_por_ciclo (int): Celdas que avanza el vehículo por ciclo
+        semilla (int): Semilla del generador
+        escenario (str): "aleatorio" o "muros"
+        
+    Returns:
+        dict: Nodos expandidos y tiempo por ciclo de ambos métodos
+    """
+    generador = random.Random(semilla)
+    if escenario == "muros":
+        mapa = _mapa_muros(tamano)
+    else:
+        mapa = MapaOcupacion(tamano, tamano)
+        lado_maximo = max(2, tamano // 25)
+        while sum(mapa.celdas) < 0.1 * tamano * tamano:
+            x = generador.randrange(tamano)
+            y = generador.randrange(tamano)
+            mapa.bloquear_rectangulo(x, y, x + generador.randint(1, lado_maximo), y + generador.randint(1, lado_maximo))
+    inicio, fin = (0, 0), (tamano - 1, tamano - 1)
+    for columna, fila in (inicio, fin):
+        mapa.marcar(columna, fila, False)
+    
+    comienzo = time.perf_counter()
+    dstar = ReplanificadorDStarLite(mapa, inicio, fin)
+    resultado = {
+        "inicial": {"expandidos": dstar.expandidos_ultimo, "tiempo_ms": (time.perf_counter() - comienzo) * 1000},
+        "ciclos": []
+    }
+    
+    bloqueadas = []
+    for _ in range(ciclos):
+        camino = dstar.camino()
+        if camino is None or len(camino) <= avance_por_ciclo + 2:
+            break
+        posicion = camino[avance_por_ciclo]
+        tramo = camino[avance_por_ciclo + 2:avance_por_ciclo + 60]
+        nuevas = generador.sample(tramo, min(bloqueos_por_ciclo, len(tramo)))
+        cambios = [(celda, False) for celda in bloqueadas] + [(celda, True) for celda in nuevas if celda != fin]
+        bloqueadas = [celda for celda, bloqueada in cambios if bloqueada]
+        
+        comienzo = time.perf_counter()
+        expandidos_dstar = dstar.actualizar_celdas(cambios, posicion)
+        tiempo_dstar = (time.perf_counter() - comienzo) * 1000
+        
+        for (columna, fila), bloqueada in cambios:
+            mapa.marcar(columna, fila, bloqueada)  # A* ve los mismos obstáculos que D* Lite
+        comienzo = time.perf_counter()
+        _, costo_astar, expandidos_astar = buscar_ruta_grilla(mapa, posicion, fin)
+        tiempo_astar = (time.perf_counter() - comienzo) * 1000
+        
+        resultado["ciclos"].append({
+            "dstar_expandidos": expandidos_dstar,
+            "dstar_ms": tiempo_dstar,
+            "astar_expandidos": expandidos_astar,
+            "astar_ms": tiempo_astar,
+            "mismo_costo": abs(dstar.costo - costo_astar) < 1e-6
+        })
+    
+    ciclos_medidos = resultado["ciclos"]
+    if ciclos_medidos:
+        total_dstar = sum(c["dstar_expandidos"] for c in ciclos_medidos)
+        total_astar = sum(c["astar_expandidos"] for c in ciclos_medidos)
+        print(f"🔁 D* Lite ({escenario}): {resultado['inicial']['expandidos']} nodos iniciales, "
+              f"{total_dstar / len(ciclos_medidos):.0f} nodos/replanificación "
+              f"({sum(c['dstar_ms'] for c in ciclos_medidos) / len(ciclos_medidos):.1f} ms)")
+        print(f"🧭 A* completo: {total_astar / len(ciclos_medidos):.0f} nodos/replanificación "
+              f"({sum(c['astar_ms'] for c in ciclos_medidos) / len(ciclos_medidos):.1f} ms)")
+        print(f"   Costos iguales en {sum(c['mismo_costo'] for c in ciclos_medidos)}/{len(ciclos_medidos)} ciclos")
+    
+    return resultado
+
+
+class IndiceEspacial:
+    """
+    Índice espacial de cuadrícula hash para consultas sobre obstáculos
+    
+    Cada elemento se guarda en la celda (x // tamano_celda, y //
+    tamano_celda) de un diccionario, así que insertar es O(1) y
+    reconstruir el índice para un nuevo cuadro de sensores es O(m). Las
+    consultas solo revisan las celdas cercanas al punto consultado en
+    lugar de recorrer todos los obstáculos.
+    """
+    
+    def __init__(self, tamano_celda=5.0):
+        """
+        Args:
+            tamano_celda (float): Lado de cada celda en metros
+        """
+        self.tamano_celda = tamano_celda
+        self.origen = None  # Lista de obstáculos representada completa (None si faltan)
+        self._celdas = {}   # (cx, cy) -> [(x, y, elemento), ...]
+        self._cantidad = 0
+        self._limites = None  # [cx_min, cy_min, cx_max, cy_max] de las celdas ocupadas
+    
+    def limpiar(self):
+        """Vacía el índice"""
+        self._celdas.clear()
+        self._cantidad = 0
+        self._limites = None
+        self.origen = None
+    
+    def insertar(self, x, y, elemento):
+        """Agrega un elemento en la posición (x, y). O(1)"""
+        cx = int(x // self.tamano_celda)
+        cy = int(y // self.tamano_celda)
+        cubeta = self._celdas.get((cx, cy))
+        if cubeta is None:
+            self._celdas[(cx, cy)] = cubeta = []
+            if self._limites is None:
+                self._limites = [cx, cy, cx, cy]
+            else:
+                limites = self._limites
+                if cx < limites[0]:
+                    limites[0] = cx
+                elif cx > limites[2]:
+                    limites[2] = cx
+                if cy < limites[1]:
+                    limites[1] = cy
+                elif cy > limites[3]:
+                    limites[3] = cy
+        cubeta.append((x, y, elemento))
+        self._cantidad += 1
+    
+    def reconstruir(self, elementos, origen=None):
+        """
+        Reemplaza el contenido con un nuevo cuadro de sensores
+        
+        Args:
+            elementos (iterable): Tuplas (x, y, elemento)
+            origen (list): Lista de obstáculos representada (opcional)
+            
+        Rendimiento: O(m) donde m = elementos
+        """
+        self.limpiar()
+        for x, y, elemento in elementos:
+            self.insertar(x, y, elemento)
+        self.origen = origen
+    
+    def _celdas_en_caja(self, x_min, y_min, x_max, y_max):
+        """Función auxiliar: cubetas de las celdas que tocan un rectángulo"""
+        if self._limites is None:
+            return
+        cx_min, cy_min, cx_max, cy_max = self._limites
+        tamano = self.tamano_celda
+        for cx in range(max(cx_min, int(x_min // tamano)), min(cx_max, int(x_max // tamano)) + 1):
+            for cy in range(max(cy_min, int(y_min // tamano)), min(cy_max, int(y_max // tamano)) + 1):
+                cubeta = self._celdas.get((cx, cy))
+                if cubeta:
+                    yield cubeta
+    
+    def _en_radio(self, x, y, radio, caja=None):
+        """Función auxiliar: (distancia, x, y, elemento) dentro del radio (y de la caja, si se indica)"""
+        radio_cuadrado = radio * radio
+        for cubeta in self._celdas_en_caja(*(caja or (x - radio, y - radio, x + radio, y + radio))):
+            for ex, ey, elemento in cubeta:
+                distancia_cuadrada = (ex - x) ** 2 + (ey - y) ** 2
+                if distancia_cuadrada <= radio_cuadrado:
+                    yield math.sqrt(distancia_cuadrada), ex, ey, elemento
+    
+    def en_radio(self, x, y, radio):
+        """
+        Elementos a una distancia menor o igual a `radio` de (x, y)
+        
+        Returns:
+            generator: Pares (distancia, elemento), sin orden
+            
+        Rendimiento: O(celdas del radio + elementos en ellas)
+        """
+        for distancia, _, _, elemento in self._en_radio(x, y, radio):
+            yield distancia, elemento
+    
+    def mas_cercanos(self, x, y, k=1):
+        """
+        Los k elementos más cercanos a (x, y)
+        
+        Recorre anillos de celdas alrededor del punto y se detiene cuando
+        ningún anillo restante puede contener un elemento más cercano que
+        el k-ésimo encontrado.
+        
+        Returns:
+            list: Pares (distancia, elemento) de menor a mayor distancia
+            
+        Rendimiento: O(celdas revisadas + k log k) con obstáculos repartidos
+        """
+        if self._limites is None or k <= 0:
+            return []
+        tamano = self.tamano_celda
+        cx0 = int(x // tamano)
+        cy0 = int(y // tamano)
+        cx_min, cy_min, cx_max, cy_max = self._limites
+        anillo_maximo = max(abs(cx0 - cx_min), abs(cx0 - cx_max), abs(cy0 - cy_min), abs(cy0 - cy_max))
+        
+        candidatos = []  # heap de (-distancia, contador, elemento) con los k mejores
+        contador = 0
+        for anillo in range(anillo_maximo + 1):
+            # Todo elemento fuera de los anillos ya revisados está al menos a esta distancia
+            if len(candidatos) == k and -candidatos[0][0] <= anillo * tamano - tamano:
+                break
+            for cx in range(cx0 - anillo, cx0 + anillo + 1):
+                paso_y = 1 if abs(cx - cx0) == anillo else 2 * anillo
+                for cy in range(cy0 - anillo, cy0 + anillo + 1, paso_y or 1):
+                    cubeta = self._celdas.get((cx, cy))
+                    if not cubeta:
+                        continue
+                    for ex, ey, elemento in cubeta:
+                        distancia = math.sqrt((ex - x) ** 2 + (ey - y) ** 2)
+                        contador += 1
+                        if len(candidatos) < k:
+                            heapq.heappush(candidatos, (-distancia, contador, elemento))
+                        elif distancia < -candidatos[0][0]:
+                            heapq.heapreplace(candidatos, (-distancia, contador, elemento))
+        
+        return [(-distancia, elemento) for distancia, _, elemento in sorted(candidatos, reverse=True)]
+    
+    def en_cono(self, x, y, rumbo, apertura, alcance):
+        """
+        Elementos dentro de un cono con vértice en (x, y)
+        
+        Args:
+            rumbo (float): Dirección del eje del cono en grados
+            apertura (float): Ángulo total del cono en grados
+            alcance (float): Distancia máxima
+            
+        Returns:
+            generator: Pares (distancia, elemento)
+            
+        Rendimiento: O(celdas del alcance + elementos en ellas)
+        """
+        eje_x = math.cos(math.radians(rumbo))
+        eje_y = math.sin(math.radians(rumbo))
+        coseno_minimo = math.cos(math.radians(apertura / 2))
+        
+        # Caja que contiene el cono: vértice, extremos de los bordes y puntos
+        # cardinales del arco que caen dentro de la apertura
+        xs = [x]
+        ys = [y]
+        for angulo in (rumbo - apertura / 2, rumbo + apertura / 2):
+            xs.append(x + alcance * math.cos(math.radians(angulo)))
+            ys.append(y + alcance * math.sin(math.radians(angulo)))
+        for cardinal_x, cardinal_y in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            if cardinal_x * eje_x + cardinal_y * eje_y >= coseno_minimo:
+                xs.append(x + alcance * cardinal_x)
+                ys.append(y + alcance * cardinal_y)
+        caja = (min(xs), min(ys), max(xs), max(ys))
+        
+        for distancia, ex, ey, elemento in self._en_radio(x, y, alcance, caja):
+            if distancia == 0 or ((ex - x) * eje_x + (ey - y) * eje_y) / distancia >= coseno_minimo:
+                yield distancia, elemento
+    
+    def elementos(self):
+        """
+        Todos los elementos del índice, sin orden
+        
+        Rendimiento: O(m) donde m = elementos indexados
+        """
+        for cubeta in self._celdas.values():
+            for _, _, elemento in cubeta:
+                yield elemento
+    
+    def __len__(self):
+        return self._cantidad
+
+
+UMBRAL_PELIGRO_CRITICO = 0.7  # Peligrosidad a partir de la cual un obstáculo es crítico
+
+indice_obstaculos = IndiceEspacial()  # Obstáculos del último cuadro por posición estimada
+indice_criticos = IndiceEspacial()    # Solo los obstáculos críticos del último cuadro
+
+
+def benchmark_indice_obstaculos(num_obstaculos=5000, consultas=1000, semilla=0):
+    """
+    Benchmark del índice espacial frente a recorrer la lista de obstáculos
+    
+    Genera un cuadro denso de detecciones alrededor del vehículo y mide
+    la reconstrucción del índice y las consultas de k más cercanos,
+    radio y cono, verificando que coincidan con el recorrido lineal.
+    
+    Args:
+        num_obstaculos (int): Detecciones por cuadro
+        consultas (int): Consultas de cada tipo
+        semilla (int): Semilla del generador
+        
+    Returns:
+        dict: Tiempos en µs por operación para índice y recorrido lineal
+    """
+    generador = random.Random(semilla)
+    puntos = [(generador.uniform(-100, 100), generador.uniform(-100, 100), i) for i in range(num_obstaculos)]
+    indice = IndiceEspacial()
+    
+    comienzo = time.perf_counter()
+    indice.reconstruir(puntos)
+    reconstruccion_us = (time.perf_counter() - comienzo) * 1e6
+    
+    centros = [(generador.uniform(-100, 100), generador.uniform(-100, 100), generador.uniform(0, 360))
+               for _ in range(consultas)]
+    
+    def distancia(punto, x, y):
+        return math.sqrt((punto[0] - x) ** 2 + (punto[1] - y) ** 2)
+    
+    def en_cono_lineal(x, y, rumbo):
+        eje_x, eje_y = math.cos(math.radians(rumbo)), math.sin(math.radians(rumbo))
+        coseno_minimo = math.cos(math.radians(15))
+        resultado = set()
+        for punto in puntos:
+            d = distancia(punto, x, y)
+            if d <= 50 and (d == 0 or ((punto[0] - x) * eje_x + (punto[1] - y) * eje_y) / d >= coseno_minimo):
+                resultado.add(punto[2])
+        return resultado
+    
+    operaciones = {
+        "k_cercanos": (
+            lambda x, y, r: [e for _, e in indice.mas_cercanos(x, y, 5)],
+            lambda x, y, r: [p[2] for p in sorted(puntos, key=lambda p: distancia(p, x, y))[:5]]
+        ),
+        "radio": (
+            lambda x, y, r: {e for _, e in indice.en_radio(x, y, 10)},
+            lambda x, y, r: {p[2] for p in puntos if distancia(p, x, y) <= 10}
+        ),
+        "cono": (
+            lambda x, y, r: {e for _, e in indice.en_cono(x, y, r, 30, 50)},
+            en_cono_lineal
+        )
+    }
+    
+    resultado = {"obstaculos": num_obstaculos, "reconstruccion_us": reconstruccion_us}
+    print(f"🗂️  Índice de {num_obstaculos} obstáculos reconstruido en {reconstruccion_us / 1000:.2f} ms")
+    for nombre, (con_indice, lineal) in operaciones.items():
+        comienzo = time.perf_counter()
+        respuestas_indice = [con_indice(*centro) for centro in centros]
+        tiempo_indice = (time.perf_counter() - comienzo) / consultas * 1e6
+        comienzo = time.perf_counter()
+        respuestas_lineal = [lineal(*centro) for centro in centros]
+        tiempo_lineal = (time.perf_counter() - comienzo) / consultas * 1e6
+        
+        resultado[nombre] = {
+            "indice_us": tiempo_indice,
+            "lineal_us": tiempo_lineal,
+            "coinciden": respuestas_indice == respuestas_lineal
+        }
+        print(f"   {nombre:<11} índice {tiempo_indice:8.1f} µs | lineal {tiempo_lineal:9.1f} µs | "
+              f"{'coinciden' if resultado[nombre]['coinciden'] else 'DIFIEREN'}")
+    
+    return resultado
 
 
 def detectar_evitar_obstaculos(datos_sensores):
@@ -198,14 +1246,33 @@ def detectar_evitar_obstaculos(datos_sensores):
                 }
                 obstaculos_detectados.append(obstaculo)
     
-    # Filtrar obstáculos por peligrosidad
-    obstaculos_criticos = [o for o in obstaculos_detectados if o["peligrosidad"] > 0.7]
+    # Indexar el cuadro por posición estimada y separar los críticos en la misma pasada
+    rumbo = _rumbo_actual()
+    obstaculos_criticos = []
+    indice_obstaculos.limpiar()
+    indice_criticos.limpiar()
+    ubicados = 0
+    for obstaculo in obstaculos_detectados:
+        critico = obstaculo["peligrosidad"] > UMBRAL_PELIGRO_CRITICO
+        if critico:
+            obstaculos_criticos.append(obstaculo)
+        punto = ubicar_obstaculo(obstaculo, posicion_actual, rumbo)
+        if punto is None:
+            continue
+        ubicados += 1
+        indice_obstaculos.insertar(punto["x"], punto["y"], obstaculo)
+        if critico:
+            indice_criticos.insertar(punto["x"], punto["y"], obstaculo)
+    if ubicados == len(obstaculos_detectados):
+        # Solo se consulta el índice si representa a todos los obstáculos
+        indice_obstaculos.origen = indice_criticos.origen = obstaculos_detectados
     
     print(f"⚠️  Obstáculos detectados: {len(obstaculos_detectados)}")
     print(f"   Críticos: {len(obstaculos_criticos)}")
     
     for obs in obstaculos_criticos:
-        print(f"   🚨 {obs['tipo']} a {obs['distancia']:.1f}m ({obs['direccion']}) - {obs['accion_recomendada']}")
+        tipo = obs.get("tipo", obs["fuente"])  # RADAR no clasifica el tipo de objeto
+        print(f"   🚨 {tipo} a {obs['distancia']:.1f}m ({obs['direccion']}) - {obs['accion_recomendada']}")
     
     return obstaculos_detectados
 
@@ -243,15 +1310,296 @@ def calcular_accion_evasion(direccion, distancia):
         return "MANTENER_CURSO"
 
 
-def ajustar_velocidad_trafico(nivel_trafico, obstaculos_cercanos):
+# Formato de cuadro vectorizado: una fila por detección
+FUENTE_LIDAR = 0
+FUENTE_RADAR = 1
+FUENTE_CAMARA = 2
+FUENTES = ["LIDAR", "RADAR", "CAMARA"]
+DIRECCIONES_SENSOR = [
+    "Norte", "NorEste", "Este", "SurEste", "Sur", "SurOeste", "Oeste", "NorOeste",  # LIDAR
+    "frontal", "trasero",                                                          # RADAR
+    "trasera", "lateral_izq", "lateral_der"                                        # Cámaras (frontal compartida)
+]
+TIPOS_OBJETO = ["vehiculo", "peaton", "objeto_estatico", "auto", "camion", "moto", "señal", ""]
+ACCIONES_EVASION = [
+    "FRENAR_INMEDIATAMENTE", "REDUCIR_VELOCIDAD", "CAMBIAR_CARRIL", "MANTENER_CURSO",
+    "MANTENER_DISTANCIA", "PUEDE_ADELANTAR", "CONFIRMAR_VISUAL"
+]
+
+if np is not None:
+    DTYPE_DETECCION = np.dtype([
+        ("distancia", np.float64),   # metros
+        ("rumbo", np.float64),       # grados (absoluto para LIDAR, relativo al vehículo para RADAR/cámaras)
+        ("velocidad", np.float64),   # velocidad del objeto (LIDAR) o relativa (RADAR); 0 en cámaras
+        ("confianza", np.float64),   # confianza de la cámara, intensidad del RADAR, 1.0 en LIDAR
+        ("fuente", np.uint8),        # FUENTE_LIDAR, FUENTE_RADAR o FUENTE_CAMARA
+        ("direccion", np.uint8),     # índice en DIRECCIONES_SENSOR
+        ("tipo", np.uint8)           # índice en TIPOS_OBJETO
+    ])
+
+
+def _rumbo_direccion(direccion):
+    """Función auxiliar: rumbo en grados de una dirección de sensor"""
+    if direccion in ANGULOS_DIRECCION:
+        return ANGULOS_DIRECCION[direccion]
+    return ANGULOS_RELATIVOS.get(direccion, 0)
+
+
+def cuadro_desde_sensores(datos_sensores):
+    """
+    Función para convertir la lectura de leer_sensores_proximidad en un cuadro
+    
+    Args:
+        datos_sensores (dict): Datos de todos los sensores
+        
+    Returns:
+        numpy.ndarray: Arreglo estructurado con DTYPE_DETECCION
+    """
+    if np is None:
+        raise ImportError("cuadro_desde_sensores requiere NumPy (pip install numpy)")
+    
+    filas = []
+    for deteccion in datos_sensores["lidar"]:
+        filas.append((deteccion["distancia"], _rumbo_direccion(deteccion["direccion"]),
+                      deteccion.get("velocidad", 0), 1.0, FUENTE_LIDAR,
+                      DIRECCIONES_SENSOR.index(deteccion["direccion"]), TIPOS_OBJETO.index(deteccion["tipo"])))
+    for radar in datos_sensores["radar"]:
+        filas.append((radar["distancia"], _rumbo_direccion(radar["posicion"]), radar["velocidad_relativa"],
+                      radar["intensidad_señal"], FUENTE_RADAR,
+                      DIRECCIONES_SENSOR.index(radar["posicion"]), TIPOS_OBJETO.index("")))
+    for camara_data in datos_sensores["camaras"]:
+        for objeto in camara_data["objetos"]:
+            filas.append((objeto["distancia_estimada"], _rumbo_direccion(camara_data["camara"]), 0.0,
+                          objeto["confianza"], FUENTE_CAMARA,
+                          DIRECCIONES_SENSOR.index(camara_data["camara"]), TIPOS_OBJETO.index(objeto["tipo"])))
+    return np.array(filas, dtype=DTYPE_DETECCION)
+
+
+def generar_cuadro_sintetico(num_puntos, semilla=0):
+    """
+    Función para generar un cuadro denso de detecciones con la misma
+    distribución que leer_sensores_proximidad
+    
+    Args:
+        num_puntos (int): Detecciones del cuadro
+        semilla (int): Semilla del generador
+        
+    Returns:
+        numpy.ndarray: Arreglo estructurado con DTYPE_DETECCION
+    """
+    if np is None:
+        raise ImportError("generar_cuadro_sintetico requiere NumPy (pip install numpy)")
+    
+    generador = np.random.default_rng(semilla)
+    cuadro = np.empty(num_puntos, dtype=DTYPE_DETECCION)
+    fuente = generador.integers(0, 3, num_puntos)
+    cuadro["fuente"] = fuente
+    
+    es_lidar = fuente == FUENTE_LIDAR
+    es_radar = fuente == FUENTE_RADAR
+    es_camara = fuente == FUENTE_CAMARA
+    
+    direccion = np.where(es_lidar, generador.integers(0, 8, num_puntos),
+                         np.where(es_radar, generador.integers(8, 10, num_puntos),
+                                  np.array([8, 10, 11, 12])[generador.integers(0, 4, num_puntos)]))
+    cuadro["direccion"] = direccion
+    cuadro["rumbo"] = np.array([_rumbo_direccion(d) for d in DIRECCIONES_SENSOR], dtype=np.float64)[direccion]
+    cuadro["distancia"] = np.where(es_lidar, generador.uniform(5, 100, num_puntos),
+                                   np.where(es_radar, generador.uniform(10, 200, num_puntos),
+                                            generador.uniform(5, 50, num_puntos)))
+    # Igual que el simulador: LIDAR solo mide velocidad al Norte o al Sur
+    norte_sur = (direccion == DIRECCIONES_SENSOR.index("Norte")) | (direccion == DIRECCIONES_SENSOR.index("Sur"))
+    cuadro["velocidad"] = np.where(es_lidar & norte_sur, generador.uniform(-20, 20, num_puntos),
+                                   np.where(es_radar, generador.uniform(-30, 30, num_puntos), 0.0))
+    cuadro["confianza"] = np.where(es_lidar, 1.0, np.where(es_radar, generador.uniform(0.5, 1.0, num_puntos),
+                                                           generador.uniform(0.6, 1.0, num_puntos)))
+    cuadro["tipo"] = np.where(es_lidar, generador.integers(0, 3, num_puntos),
+                              np.where(es_camara, generador.integers(3, 7, num_puntos), TIPOS_OBJETO.index("")))
+    return cuadro
+
+
+def clasificar_cuadro(cuadro):
+    """
+    Función para filtrar y clasificar un cuadro completo de detecciones
+    
+    Aplica en forma vectorizada las mismas reglas que
+    detectar_evitar_obstaculos: umbrales de distancia por fuente
+    (LIDAR < 50 m, RADAR < 100 m, cámara < 30 m con confianza > 0.8),
+    calcular_peligrosidad y la acción recomendada de cada fuente.
+    
+    Args:
+        cuadro (numpy.ndarray): Arreglo estructurado con DTYPE_DETECCION
+        
+    Returns:
+        dict: "indices" de las detecciones que son obstáculo (en el orden
+        LIDAR, RADAR, cámaras), "peligrosidad", "accion" (índice en
+        ACCIONES_EVASION) y "criticos" (máscara de peligrosidad > 0.7)
+        
+    Rendimiento: O(n) con operaciones vectorizadas, sin objetos por detección
+    """
+    if np is None:
+        raise ImportError("clasificar_cuadro requiere NumPy (pip install numpy)")
+    
+    fuente = cuadro["fuente"]
+    distancia = cuadro["distancia"]
+    es_lidar = fuente == FUENTE_LIDAR
+    es_radar = fuente == FUENTE_RADAR
+    es_camara = fuente == FUENTE_CAMARA
+    
+    # Umbrales por fuente
+    es_obstaculo = ((es_lidar & (distancia < 50)) | (es_radar & (distancia < 100))
+                    | (es_camara & (distancia < 30) & (cuadro["confianza"] > 0.8)))
+    indices = np.flatnonzero(es_obstaculo)
+    indices = indices[np.argsort(fuente[indices], kind="stable")]
+    
+    distancia = distancia[indices]
+    fuente = fuente[indices]
+    direccion = cuadro["direccion"][indices]
+    velocidad = np.where(fuente == FUENTE_CAMARA, 0.0, cuadro["velocidad"][indices])
+    
+    # calcular_peligrosidad: factor distancia + factor velocidad, máximo 1.0
+    peligro = np.select([distancia < 10, distancia < 25, distancia < 50], [0.8, 0.5, 0.2], 0.0)
+    peligro = peligro + np.select([velocidad > 10, velocidad > 0], [0.6, 0.3], 0.0)
+    peligrosidad = np.minimum(1.0, peligro)
+    
+    # Acción recomendada por fuente (calcular_accion_evasion para LIDAR)
+    codigos_direccion = {nombre: codigo for codigo, nombre in enumerate(DIRECCIONES_SENSOR)}
+    al_frente = np.isin(direccion, [codigos_direccion[d] for d in ("Norte", "NorEste", "NorOeste")])
+    al_costado = np.isin(direccion, [codigos_direccion[d] for d in ("Este", "Oeste")])
+    accion_lidar = np.select(
+        [distancia < 15, al_frente, al_costado],
+        [ACCIONES_EVASION.index("FRENAR_INMEDIATAMENTE"), ACCIONES_EVASION.index("REDUCIR_VELOCIDAD"),
+         ACCIONES_EVASION.index("CAMBIAR_CARRIL")],
+        ACCIONES_EVASION.index("MANTENER_CURSO")
+    )
+    accion_radar = np.where(velocidad > -5, ACCIONES_EVASION.index("MANTENER_DISTANCIA"),
+                            ACCIONES_EVASION.index("PUEDE_ADELANTAR"))
+    accion = np.select([fuente == FUENTE_LIDAR, fuente == FUENTE_RADAR],
+                       [accion_lidar, accion_radar], ACCIONES_EVASION.index("CONFIRMAR_VISUAL")).astype(np.uint8)
+    
+    return {
+        "indices": indices,
+        "peligrosidad": peligrosidad,
+        "accion": accion,
+        "criticos": peligrosidad > UMBRAL_PELIGRO_CRITICO
+    }
+
+
+def sensores_desde_cuadro(cuadro):
+    """
+    Función para convertir un cuadro al formato de diccionarios por detección
+    
+    Se usa para comparar clasificar_cuadro con detectar_evitar_obstaculos.
+    Las detecciones consecutivas de una misma cámara comparten entrada, de
+    modo que el orden de los objetos es el mismo que en el cuadro.
+    
+    Returns:
+        dict: Datos con el formato de leer_sensores_proximidad
+    """
+    sensores = {"lidar": [], "radar": [], "camaras": [], "timestamp": datetime.datetime.now()}
+    for fila in cuadro.tolist():
+        distancia, _, velocidad, confianza, fuente, direccion, tipo = fila
+        direccion = DIRECCIONES_SENSOR[direccion]
+        if fuente == FUENTE_LIDAR:
+            sensores["lidar"].append({"direccion": direccion, "distancia": distancia,
+                                      "tipo": TIPOS_OBJETO[tipo], "velocidad": velocidad})
+        elif fuente == FUENTE_RADAR:
+            sensores["radar"].append({"posicion": direccion, "distancia": distancia,
+                                      "velocidad_relativa": velocidad, "intensidad_señal": confianza})
+        else:
+            camaras = sensores["camaras"]
+            if not camaras or camaras[-1]["camara"] != direccion:
+                camaras.append({"camara": direccion, "objetos": [], "calidad_imagen": 1.0})
+            camaras[-1]["objetos"].append({"tipo": TIPOS_OBJETO[tipo], "distancia_estimada": distancia,
+                                           "confianza": confianza})
+    return sensores
+
+
+def benchmark_fusion(num_puntos=100000, semilla=0):
+    """
+    Benchmark de clasificar_cuadro frente al procesamiento por objeto
+    
+    Clasifica el mismo cuadro sintético con ambas rutas, verifica que
+    coincidan obstáculos, peligrosidad y acción elemento a elemento y en
+    el mismo orden, y reporta detecciones/s. El estado global que modifica
+    detectar_evitar_obstaculos (obstáculos e índices espaciales) se
+    restaura al terminar.
+    
+    Args:
+        num_puntos (int): Detecciones del cuadro sintético
+        semilla (int): Semilla del generador
+        
+    Returns:
+        dict: Tiempos, detecciones/s de ambas rutas y si coinciden
+    """
+    global obstaculos_detectados, indice_obstaculos, indice_criticos
+    
+    cuadro = generar_cuadro_sintetico(num_puntos, semilla)
+    
+    comienzo = time.perf_counter()
+    resultado_vectorizado = clasificar_cuadro(cuadro)
+    tiempo_vectorizado = time.perf_counter() - comienzo
+    
+    sensores = sensores_desde_cuadro(cuadro)
+    estado_original = (obstaculos_detectados, indice_obstaculos, indice_criticos)
+    indice_obstaculos = IndiceEspacial(indice_obstaculos.tamano_celda)
+    indice_criticos = IndiceEspacial(indice_criticos.tamano_celda)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            comienzo = time.perf_counter()
+            obstaculos = detectar_evitar_obstaculos(sensores)
+            tiempo_por_objeto = time.perf_counter() - comienzo
+    finally:
+        obstaculos_detectados, indice_obstaculos, indice_criticos = estado_original
+    
+    # Ambas rutas entregan LIDAR, RADAR y cámaras en el orden del cuadro: se comparan posición a posición
+    indices = resultado_vectorizado["indices"]
+    vectorizado = list(zip(
+        [FUENTES[f] for f in cuadro["fuente"][indices].tolist()],
+        [DIRECCIONES_SENSOR[d] for d in cuadro["direccion"][indices].tolist()],
+        cuadro["distancia"][indices].tolist(),
+        resultado_vectorizado["peligrosidad"].tolist(),
+        [ACCIONES_EVASION[a] for a in resultado_vectorizado["accion"].tolist()]
+    ))
+    por_objeto = [
+        (o["fuente"], o["direccion"], o["distancia"], o["peligrosidad"], o["accion_recomendada"])
+        for o in obstaculos
+    ]
+    
+    resultado = {
+        "detecciones": num_puntos,
+        "obstaculos": len(vectorizado),
+        "vectorizado_s": tiempo_vectorizado,
+        "por_objeto_s": tiempo_por_objeto,
+        "vectorizado_por_s": num_puntos / tiempo_vectorizado,
+        "por_objeto_por_s": num_puntos / tiempo_por_objeto,
+        "coinciden": vectorizado == por_objeto
+    }
+    print(f"🛰️  Cuadro de {num_puntos:,} detecciones ({resultado['obstaculos']:,} obstáculos)")
+    print(f"   Vectorizado: {tiempo_vectorizado * 1000:8.1f} ms ({resultado['vectorizado_por_s']:,.0f} detecciones/s)")
+    print(f"   Por objeto:  {tiempo_por_objeto * 1000:8.1f} ms ({resultado['por_objeto_por_s']:,.0f} detecciones/s)")
+    print(f"   Resultados {'coinciden' if resultado['coinciden'] else 'DIFIEREN'}")
+    return resultado
+
+
+def ajustar_velocidad_trafico(nivel_trafico, obstaculos_cercanos, indice=None):
     """
     Procedimiento para ajustar la velocidad del vehículo según las condiciones del tráfico
     
     Args:
         nivel_trafico (str): Nivel de tráfico ("LIBRE", "MODERADO", "PESADO", "CONGESTION")
         obstaculos_cercanos (list): Lista de obstáculos cercanos
+        indice (IndiceEspacial): Índice de los obstáculos críticos de esa
+            misma lista (p. ej. indice_criticos justo después de
+            detectar_evitar_obstaculos); si es None, o no ubicó todos los
+            obstáculos, se recorre la lista
+        
+    Con o sin índice, el obstáculo que manda es el crítico de menor
+    "distancia" medida por el sensor; el índice solo aporta los candidatos
+    ya filtrados (su posición estimada no se usa para elegirlo).
         
-    Rendimiento: O(n) donde n = obstáculos cercanos
+    Rendimiento: O(n) donde n = obstáculos cercanos; con el índice O(c)
+    donde c = obstáculos críticos, sin filtrar la lista
     """
     global velocidad_actual
     
@@ -268,11 +1616,17 @@ def ajustar_velocidad_trafico(nivel_trafico, obstaculos_cercanos):
     velocidad_objetivo = velocidades_trafico.get(nivel_trafico, 50)
     
     # Ajustar por obstáculos cercanos
-    obstaculos_criticos = [o for o in obstaculos_cercanos if o["peligrosidad"] > 0.7]
+    if indice is not None and indice.origen is not None:
+        # Índice de críticos del cuadro: candidatos sin filtrar la lista, misma regla de distancia
+        num_criticos = len(indice)
+        obstaculo_mas_critico = min(indice.elementos(), key=lambda x: x["distancia"]) if num_criticos else None
+    else:
+        obstaculos_criticos = [o for o in obstaculos_cercanos if o["peligrosidad"] > UMBRAL_PELIGRO_CRITICO]
+        num_criticos = len(obstaculos_criticos)
+        obstaculo_mas_critico = min(obstaculos_criticos, key=lambda x: x["distancia"]) if obstaculos_criticos else None
     
-    if obstaculos_criticos:
-        # Encontrar el obstáculo más cercano y peligroso
-        obstaculo_mas_critico = min(obstaculos_criticos, key=lambda x: x["distancia"])
+    if obstaculo_mas_critico is not None:
+        # Obstáculo crítico más cercano
         distancia_critica = obstaculo_mas_critico["distancia"]
         
         if distancia_critica < 10:
@@ -305,21 +1659,21 @@ def ajustar_velocidad_trafico(nivel_trafico, obstaculos_cercanos):
             accion = "🟡 MANTENIENDO"
         
         print(f"{accion}: {velocidad_anterior:.0f} → {velocidad_actual:.0f} km/h")
-        print(f"   Motivo: Tráfico {nivel_trafico}, {len(obstaculos_criticos)} obstáculos críticos")
+        print(f"   Motivo: Tráfico {nivel_trafico}, {num_criticos} obstáculos críticos")
         
-        if obstaculos_criticos:
+        if obstaculo_mas_critico is not None:
             print(f"   Obstáculo más cercano: {obstaculo_mas_critico['distancia']:.1f}m")
 
 
-def simular_avance():
-    """Función auxiliar para simular el avance del vehículo"""
+def simular_avance(dt=1.0):
+    """Función auxiliar para simular el avance del vehículo durante `dt` segundos"""
     global posicion_actual
     
     if not ruta_actual or velocidad_actual == 0:
         return
     
-    # Calcular distancia recorrida en esta iteración (simulando 1 segundo)
-    distancia_recorrida = velocidad_actual * 1000 / 3600  # km/h a m/s
+    # Calcular distancia recorrida en esta iteración (1 segundo por defecto)
+    distancia_recorrida = velocidad_actual * 1000 / 3600 * dt  # km/h a m/s
     
     # Encontrar el siguiente punto en la ruta
     if len(ruta_actual) > 1:
@@ -344,6 +1698,269 @@ def simular_avance():
                 ruta_actual.pop(0)  # Remover punto alcanzado
 
 
+# Límites superiores (µs) de las cubetas de los histogramas de latencia
+LIMITES_HISTOGRAMA_US = [50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000]
+
+
+class HistogramaLatencia:
+    """Histograma de latencias con cubetas fijas: memoria constante por etapa"""
+    
+    def __init__(self, limites_us=LIMITES_HISTOGRAMA_US):
+        self.limites_us = list(limites_us)
+        self.conteos = [0] * (len(self.limites_us) + 1)  # La última cubeta es "mayor que el último límite"
+        self.cantidad = 0
+        self.suma_us = 0.0
+        self.maximo_us = 0.0
+    
+    def registrar(self, latencia_us):
+        """Agrega una muestra. O(log cubetas)"""
+        self.conteos[bisect.bisect_left(self.limites_us, latencia_us)] += 1
+        self.cantidad += 1
+        self.suma_us += latencia_us
+        if latencia_us > self.maximo_us:
+            self.maximo_us = latencia_us
+    
+    def percentil(self, fraccion):
+        """Límite superior de la cubeta que contiene el percentil (aproximado)"""
+        objetivo = fraccion * self.cantidad
+        acumulado = 0
+        for limite, conteo in zip(self.limites_us + [self.maximo_us], self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo and acumulado:
+                return limite
+        return 0.0
+    
+    def como_dict(self):
+        return {
+            "limites_us": self.limites_us,
+            "conteos": self.conteos,
+            "cantidad": self.cantidad,
+            "promedio_us": self.suma_us / self.cantidad if self.cantidad else 0.0,
+            "maximo_us": self.maximo_us,
+            "p50_us": self.percentil(0.5),
+            "p99_us": self.percentil(0.99)
+        }
+
+
+class EtapaTiempoReal:
+    """Etapa periódica del planificador: función, frecuencia e instrumentación"""
+    
+    def __init__(self, nombre, frecuencia_hz, funcion, degradable=False):
+        """
+        Args:
+            nombre (str): Nombre de la etapa
+            frecuencia_hz (float): Ejecuciones por segundo
+            funcion (callable): Recibe el período en segundos
+            degradable (bool): Se puede omitir cuando no hay presupuesto de tiempo
+        """
+        self.nombre = nombre
+        self.periodo = 1.0 / frecuencia_hz
+        self.funcion = funcion
+        self.degradable = degradable
+        self.proxima = 0.0  # Próxima activación (reloj monotónico)
+        self.activacion = 0  # Número de la próxima activación: proxima = inicio + activacion * periodo
+        self.histograma = HistogramaLatencia()
+        self.latencia_estimada = 0.0  # Promedio móvil exponencial en segundos
+        self.ejecuciones = 0
+        self.plazos_incumplidos = 0
+        self.activaciones_perdidas = 0  # Activaciones saltadas por retraso acumulado
+        self.omitidas = 0               # Activaciones omitidas por degradación
+        self.omitidas_seguidas = 0
+
+
+class PlanificadorTiempoReal:
+    """
+    Planificador de frecuencia fija para el ciclo de control del vehículo
+    
+    Cada etapa se activa en múltiplos exactos de su período según un
+    reloj monotónico (sin deriva acumulada) y su plazo es la siguiente
+    activación. Se mide la latencia de cada ejecución en un histograma y
+    se cuentan los plazos incumplidos. Si una etapa se atrasa más de un
+    período, las activaciones perdidas se saltan en lugar de ejecutarse en
+    ráfaga. Ante activaciones simultáneas las etapas no degradables van
+    primero; las degradables (replanificación) se omiten cuando su latencia
+    estimada no cabe antes de la próxima activación de una etapa no
+    degradable, salvo que ya acumulen `max_omisiones` omisiones seguidas.
+    """
+    
+    def __init__(self, reloj=time.monotonic, dormir=time.sleep, alfa_latencia=0.2, max_omisiones=5):
+        """
+        Args:
+            reloj (callable): Fuente de tiempo monotónica en segundos
+            dormir (callable): Función para esperar (segundos)
+            alfa_latencia (float): Suavizamiento de la latencia estimada por etapa
+            max_omisiones (int): Omisiones seguidas tras las cuales una etapa
+                degradable se ejecuta de todos modos
+        """
+        self.reloj = reloj
+        self.dormir = dormir
+        self.alfa_latencia = alfa_latencia
+        self.max_omisiones = max_omisiones
+        self.etapas = []
+        self.duracion_real = 0.0
+    
+    def agregar_etapa(self, nombre, frecuencia_hz, funcion, degradable=False):
+        """Registra una etapa periódica. Las etapas se ejecutan en orden de registro ante empates"""
+        etapa = EtapaTiempoReal(nombre, frecuencia_hz, funcion, degradable)
+        self.etapas.append(etapa)
+        return etapa
+    
+    def _hay_presupuesto(self, etapa, ahora):
+        """Función auxiliar: la etapa cabe antes de la próxima activación no degradable"""
+        if etapa.omitidas_seguidas >= self.max_omisiones:
+            return True
+        limite = min((otra.proxima for otra in self.etapas if not otra.degradable), default=math.inf)
+        return ahora + etapa.latencia_estimada <= limite
+    
+    def ejecutar(self, duracion_s):
+        """
+        Ejecuta las etapas durante `duracion_s` segundos
+        
+        Args:
+            duracion_s (float): Duración del ciclo de control
+            
+        Returns:
+            dict: Instrumentación (igual que instrumentacion())
+        """
+        inicio = self.reloj()
+        fin = inicio + duracion_s
+        for etapa in self.etapas:
+            etapa.activacion = 0
+            etapa.proxima = inicio
+        
+        while True:
+            # Empates (al microsegundo): primero las no degradables, luego en orden de registro
+            etapa = min(self.etapas, key=lambda e: (round(e.proxima, 6), e.degradable))
+            if etapa.proxima >= fin:
+                break
+            espera = etapa.proxima - self.reloj()
+            if espera > 0:
+                self.dormir(espera)
+            
+            etapa.activacion += 1
+            etapa.proxima = plazo = inicio + etapa.activacion * etapa.periodo
+            comienzo = self.reloj()
+            
+            if etapa.degradable and not self._hay_presupuesto(etapa, comienzo):
+                etapa.omitidas += 1
+                etapa.omitidas_seguidas += 1
+            else:
+                etapa.omitidas_seguidas = 0
+                etapa.funcion(etapa.periodo)
+                termino = self.reloj()
+                latencia = termino - comienzo
+                etapa.ejecuciones += 1
+                etapa.histograma.registrar(latencia * 1e6)
+                etapa.latencia_estimada += self.alfa_latencia * (latencia - etapa.latencia_estimada)
+                if termino > plazo:
+                    etapa.plazos_incumplidos += 1
+            
+            # Saltar las activaciones que ya pasaron en lugar de ejecutarlas en ráfaga
+            ahora = self.reloj()
+            if ahora > etapa.proxima:
+                perdidas = int((ahora - etapa.proxima) // etapa.periodo) + 1
+                etapa.activaciones_perdidas += perdidas
+                etapa.activacion += perdidas
+                etapa.proxima = inicio + etapa.activacion * etapa.periodo
+        
+        self.duracion_real = self.reloj() - inicio
+        return self.instrumentacion()
+    
+    def instrumentacion(self):
+        """
+        Métricas por etapa para análisis posterior
+        
+        Returns:
+            dict: Duración y, por etapa, frecuencia, ejecuciones, plazos
+            incumplidos, activaciones perdidas/omitidas e histograma
+        """
+        return {
+            "duracion_s": self.duracion_real,
+            "etapas": {
+                etapa.nombre: {
+                    "frecuencia_hz": 1.0 / etapa.periodo,
+                    "degradable": etapa.degradable,
+                    "ejecuciones": etapa.ejecuciones,
+                    "plazos_incumplidos": etapa.plazos_incumplidos,
+                    "activaciones_perdidas": etapa.activaciones_perdidas,
+                    "omitidas": etapa.omitidas,
+                    "latencia": etapa.histograma.como_dict()
+                }
+                for etapa in self.etapas
+            }
+        }
+    
+    def exportar(self, ruta):
+        """Guarda la instrumentación en un archivo JSON"""
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(self.instrumentacion(), archivo, indent=2, ensure_ascii=False)
+    
+    def mostrar_resumen(self):
+        """Función auxiliar para imprimir la instrumentación por etapa"""
+        print(f"⏱️  Ciclo de control: {self.duracion_real:.2f} s")
+        for etapa in self.etapas:
+            histograma = etapa.histograma
+            promedio = histograma.suma_us / histograma.cantidad if histograma.cantidad else 0.0
+            print(f"   {etapa.nombre:<13} {1.0 / etapa.periodo:5.0f} Hz | {etapa.ejecuciones:5} ejecuciones | "
+                  f"prom {promedio:8.0f} µs | p99 ≤ {histograma.percentil(0.99):8.0f} µs | "
+                  f"plazos incumplidos {etapa.plazos_incumplidos} | perdidas {etapa.activaciones_perdidas} | "
+                  f"omitidas {etapa.omitidas}")
+
+
+def ejecutar_tiempo_real(duracion_s=2.0, destino_ruta=None, nivel_trafico="MODERADO",
+                         frecuencias=None, ruta_exportacion=None):
+    """
+    Función para conducir el vehículo con el planificador de frecuencia fija
+    
+    - Percepción (50 Hz): leer_sensores_proximidad + detectar_evitar_obstaculos
+    - Planificación (10 Hz, degradable): replanificar_ruta
+    - Actuación (100 Hz): ajustar_velocidad_trafico + simular_avance
+    
+    Args:
+        duracion_s (float): Segundos de simulación
+        destino_ruta (dict): Destino {x, y} (por defecto `destino`)
+        nivel_trafico (str): Nivel de tráfico para ajustar la velocidad
+        frecuencias (dict): Frecuencias por etapa, p. ej. {"percepcion": 50}
+        ruta_exportacion (str): Archivo JSON para la instrumentación (opcional)
+        
+    Returns:
+        PlanificadorTiempoReal: Planificador con su instrumentación
+    """
+    destino_ruta = destino_ruta or destino
+    frecuencias = {"percepcion": 50, "planificacion": 10, "actuacion": 100, **(frecuencias or {})}
+    
+    def percepcion(periodo):
+        detectar_evitar_obstaculos(leer_sensores_proximidad())
+    
+    def planificacion(periodo):
+        replanificar_ruta(obstaculos_detectados, destino_ruta)
+    
+    def actuacion(periodo):
+        ajustar_velocidad_trafico(nivel_trafico, obstaculos_detectados, indice_criticos)
+        simular_avance(periodo)
+    
+    planificador = PlanificadorTiempoReal()
+    planificador.agregar_etapa("percepcion", frecuencias["percepcion"], percepcion)
+    planificador.agregar_etapa("planificacion", frecuencias["planificacion"], planificacion, degradable=True)
+    planificador.agregar_etapa("actuacion", frecuencias["actuacion"], actuacion)
+    
+    # Ruta y replanificador iniciales fuera del ciclo medido
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not ruta_actual:
+            calcular_ruta_optima(posicion_actual, destino_ruta)
+        replanificar_ruta(obstaculos_detectados, destino_ruta)
+    
+    # Las etapas imprimen en cada ciclo: se descarta esa salida a alta frecuencia
+    with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+        planificador.ejecutar(duracion_s)
+    
+    planificador.mostrar_resumen()
+    if ruta_exportacion:
+        planificador.exportar(ruta_exportacion)
+        print(f"💾 Instrumentación guardada en {ruta_exportacion}")
+    return planificador
+
+
 def main():
     """Función principal para demostrar el sistema"""
     print("=== SISTEMA DE NAVEGACIÓN AUTÓNOMA ===\n")
@@ -369,11 +1986,14 @@ def main():
         # Detectar obstáculos
         obstaculos = detectar_evitar_obstaculos(datos)
         
+        # Reparar la ruta con los obstáculos nuevos o desaparecidos
+        replanificar_ruta(obstaculos, destino_final)
+        
         # Determinar nivel de tráfico (simulado)
         nivel_trafico = random.choice(["LIBRE", "MODERADO", "PESADO", "CONGESTION"])
         
         # Ajustar velocidad
-        ajustar_velocidad_trafico(nivel_trafico, obstaculos)
+        ajustar_velocidad_trafico(nivel_trafico, obstaculos, indice_criticos)
         
         # Simular avance
         simular_avance()
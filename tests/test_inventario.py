@@ -0,0 +1,366 @@
+import io
+import datetime
+import random
+import threading
+
+import pytest
+
+import problema2_inventario as inv
+
+
+@pytest.fixture
+def inventario_aislado(monkeypatch):
+    """Estado global nuevo para cada prueba (sin persistencia)"""
+    catalogo = {
+        "PROD001": inv.Producto("Laptop", 25, 10, 50, 800),
+        "PROD004": inv.Producto("Monitor", 8, 5, 30, 300),
+    }
+    monkeypatch.setattr(inv, "inventario", catalogo)
+    monkeypatch.setattr(inv, "movimientos", [])
+    monkeypatch.setattr(inv, "indice_movimientos", inv.IndiceMovimientos())
+    monkeypatch.setattr(inv, "pronostico_demanda", inv.PronosticoDemanda())
+    monkeypatch.setattr(inv, "motor_alertas", inv.MotorAlertas())
+    monkeypatch.setattr(inv, "almacen_persistente", None)
+    monkeypatch.setattr(inv, "nucleo_inventario", inv.InventarioConcurrente())
+    return catalogo
+
+
+def test_salida_respeta_reservas_del_nucleo(inventario_aislado):
+    id_reserva = inv.nucleo_inventario.reservar("PROD004", 8)
+
+    assert not inv.registrar_salida_productos("PROD004", 8, "Venta online")
+    inv.nucleo_inventario.confirmar(id_reserva)
+
+    assert inventario_aislado["PROD004"].stock == 0
+
+
+def test_lote_respeta_reservas_del_nucleo(inventario_aislado):
+    inv.nucleo_inventario.reservar("PROD004", 6)
+
+    resumen = inv.registrar_movimientos_lote([
+        {"tipo": "SALIDA", "codigo": "PROD004", "cantidad": 3},
+    ])
+
+    assert not resumen["aplicado"]
+    assert inventario_aislado["PROD004"].stock == 8
+
+
+def test_rutas_legadas_y_nucleo_concurrentes_sin_sobreventa(inventario_aislado):
+    stock_inicial = 400
+    inventario_aislado["PROD004"].stock = stock_inicial
+    nucleo = inv.nucleo_inventario
+
+    def ventas_legadas():
+        for _ in range(150):
+            inv.registrar_salida_productos("PROD004", 1)
+
+    def ventas_en_lote():
+        for _ in range(50):
+            inv.registrar_movimientos_lote([{"tipo": "SALIDA", "codigo": "PROD004", "cantidad": "2"}])
+
+    def pedidos_nucleo():
+        for _ in range(150):
+            id_reserva = nucleo.reservar("PROD004", 1)
+            if id_reserva is not None:
+                nucleo.confirmar(id_reserva, "Pedido")
+
+    hilos = [threading.Thread(target=objetivo)
+             for objetivo in (ventas_legadas, ventas_en_lote, pedidos_nucleo) * 2]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    vendido = sum(m["cantidad"] for m in inv.movimientos if m["tipo"] == "SALIDA")
+    assert inventario_aislado["PROD004"].stock >= 0
+    assert vendido + inventario_aislado["PROD004"].stock == stock_inicial
+    assert vendido == stock_inicial
+    assert nucleo.reservado("PROD004") == 0
+
+
+def _reiniciar(monkeypatch, directorio):
+    """Simula un reinicio: estado en memoria vacío y carga desde disco"""
+    monkeypatch.setattr(inv, "inventario", {
+        "PROD001": inv.Producto("Laptop", 25, 10, 50, 800),
+        "PROD004": inv.Producto("Monitor", 8, 5, 30, 300),
+    })
+    monkeypatch.setattr(inv, "movimientos", [])
+    monkeypatch.setattr(inv, "indice_movimientos", inv.IndiceMovimientos())
+    monkeypatch.setattr(inv, "pronostico_demanda", inv.PronosticoDemanda())
+    monkeypatch.setattr(inv, "motor_alertas", inv.MotorAlertas())
+    almacen = inv.AlmacenPersistente(str(directorio), snapshot_cada=0)
+    almacen.cargar()
+    monkeypatch.setattr(inv, "almacen_persistente", almacen)
+    return almacen
+
+
+def test_persistencia_restaura_historial_y_niveles(inventario_aislado, monkeypatch, tmp_path):
+    almacen = _reiniciar(monkeypatch, tmp_path)
+    inv.registrar_entrada_productos("PROD001", 10, 750)
+    inv.registrar_salida_productos("PROD001", 5)
+    inv.registrar_salida_productos("PROD001", 7)
+    inv.calcular_nivel_optimo_inventario("PROD001", actualizar=True)
+    niveles = (inv.inventario["PROD001"].min, inv.inventario["PROD001"].max)
+    almacen.snapshot()
+    inv.registrar_salida_productos("PROD004", 2)
+    almacen.cerrar()
+
+    # El log activo solo conserva la cola posterior a la instantánea
+    with open(almacen.ruta_log, encoding="utf-8") as archivo:
+        assert len(archivo.readlines()) == 1
+    assert len(almacen._segmentos_historial()) == 1
+
+    almacen = _reiniciar(monkeypatch, tmp_path)
+    producto = inv.inventario["PROD001"]
+    assert (producto.stock, producto.precio) == (23, 750)
+    assert (producto.min, producto.max) == niveles
+    assert inv.inventario["PROD004"].stock == 6
+    # Arranque: instantánea + cola; los agregados y el pronóstico vienen de la instantánea
+    assert len(inv.movimientos) == 1
+    assert inv.indice_movimientos.cantidad("PROD001", "SALIDA") == 2
+    assert inv.pronostico_demanda.pronostico("PROD001") is not None
+
+    # El historial rotado se incorpora al consultar las secuencias, una sola vez
+    inv.registrar_salida_productos("PROD001", 1)
+    almacen.snapshot()
+    assert [m["cantidad"] for m in inv.indice_movimientos.consultar("PROD001")] == [10, 5, 7, 1]
+    assert len(inv.movimientos) == 5
+    assert inv.indice_movimientos.cantidad("PROD001", "SALIDA") == 3
+    almacen.cerrar()
+
+
+def test_arranque_no_lee_el_historial(inventario_aislado, monkeypatch, tmp_path):
+    almacen = _reiniciar(monkeypatch, tmp_path)
+    for _ in range(20):
+        inv.registrar_salida_productos("PROD001", 1)
+    almacen.snapshot()
+    inv.registrar_entrada_productos("PROD001", 4, 700)
+    almacen.cerrar()
+
+    leidos = []
+    abrir = open
+    monkeypatch.setattr("builtins.open", lambda ruta, *args, **kwargs: leidos.append(str(ruta)) or abrir(ruta, *args, **kwargs))
+    almacen = _reiniciar(monkeypatch, tmp_path)
+    monkeypatch.setattr("builtins.open", abrir)
+
+    assert not any(inv.AlmacenPersistente.CARPETA_HISTORIAL in ruta for ruta in leidos)
+    assert inv.inventario["PROD001"].stock == 25 - 20 + 4
+    assert inv.indice_movimientos.total("PROD001", "SALIDA") == 20
+    assert len(inv.movimientos) == 1
+    almacen.cerrar()
+
+
+def test_persistencia_escribe_log_antes_de_aplicar(inventario_aislado, monkeypatch, tmp_path):
+    almacen = _reiniciar(monkeypatch, tmp_path)
+
+    def registrar_con_falla(lista_movimientos):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(almacen, "registrar", registrar_con_falla)
+    with pytest.raises(OSError):
+        inv.registrar_salida_productos("PROD004", 3)
+
+    assert inv.inventario["PROD004"].stock == 8
+    assert inv.movimientos == []
+    almacen.cerrar()
+
+
+def test_agregar_producto_valida_y_guarda_producto(inventario_aislado, tmp_path):
+    producto = inv.agregar_producto("DICT01", {"nombre": "Cable", "stock": 4, "min": 5, "max": 20, "precio": 2.5})
+
+    assert type(inventario_aislado["DICT01"]) is inv.Producto
+    assert inventario_aislado["DICT01"] is producto
+    assert inv.motor_alertas.alertas_actuales()[0]["codigo"] == "DICT01"
+    assert inv.registrar_salida_productos("DICT01", 1)
+    assert inv.registrar_entrada_productos("DICT01", 3, 3.0)
+    assert inventario_aislado["DICT01"].stock == 6
+    assert inv.motor_alertas.evaluar("DICT01")["nivel"] == "ADVERTENCIA"
+
+    assert inv.agregar_producto("MALO01", {"nombre": "Cable", "stock": -1, "min": 5, "max": 20, "precio": 2.5}) is None
+    assert "MALO01" not in inventario_aislado
+
+    resumen = inv.generar_reporte_valoracion(str(tmp_path / "valoracion.csv"))
+    assert resumen["productos"] == 3
+    assert resumen["valor_total"] == 25 * 800 + 8 * 300 + 6 * 3.0
+
+
+@pytest.mark.parametrize("cantidad", [2.5, True, "2.5", "dos", None])
+def test_lote_rechaza_cantidades_no_enteras(inventario_aislado, cantidad):
+    resumen = inv.registrar_movimientos_lote(
+        [{"tipo": "SALIDA", "codigo": "PROD001", "cantidad": cantidad}], atomico=False
+    )
+
+    assert resumen["aceptadas"] == 0
+    assert resumen["rechazadas"] == [(1, "Cantidad inválida")]
+    assert inventario_aislado["PROD001"].stock == 25
+
+
+def test_lote_csv_acepta_cantidades_de_texto(inventario_aislado):
+    csv_lote = io.StringIO("tipo,codigo,cantidad,precio\nENTRADA,PROD001, 5 ,700\nSALIDA,PROD001,3,\n")
+    resumen = inv.registrar_movimientos_lote(csv_lote)
+
+    assert resumen["aplicado"] and resumen["aceptadas"] == 2
+    assert inventario_aislado["PROD001"].stock == 27
+
+
+def test_recalculo_con_pronostico_exige_dos_salidas(inventario_aislado):
+    inv.registrar_salida_productos("PROD001", 5)
+    inv.registrar_salida_productos("PROD004", 1)
+    inv.registrar_salida_productos("PROD004", 2)
+
+    reporte = inv.recalcular_niveles_inventario(inv.POLITICA_APLICAR, usar_pronostico=True)
+
+    assert reporte["analizados"] == 1
+    assert reporte["datos_insuficientes"] == 1
+    assert (inventario_aislado["PROD001"].min, inventario_aislado["PROD001"].max) == (10, 50)
+
+
+def test_motor_alertas_mantiene_orden_sin_ordenar(inventario_aislado):
+    generador = random.Random(7)
+    for i in range(60):
+        inventario_aislado[f"SKU{i:03d}"] = inv.Producto(f"Producto {i}", 50, 10, 40, generador.randint(1, 20))
+    motor = inv.MotorAlertas()
+    motor.reconstruir()
+
+    for _ in range(500):
+        codigo = f"SKU{generador.randrange(60):03d}"
+        inventario_aislado[codigo].stock = generador.randint(0, 20)
+        motor.evaluar(codigo)
+        esperadas = sorted((a for a in map(inv._evaluar_alerta, inventario_aislado, inventario_aislado.values())
+                            if a is not None), key=inv.MotorAlertas._orden)
+        assert motor.alertas_actuales() == esperadas
+        assert motor.mas_urgentes(5) == esperadas[:5]
+
+
+def test_benchmark_concurrencia_no_toca_el_estado_global(inventario_aislado):
+    estado_global = (inv.inventario, inv.movimientos, inv.indice_movimientos, inv.motor_alertas,
+                     inv.pronostico_demanda, inv.almacen_persistente)
+    capturado = []
+
+    def observar():
+        capturado.append((inv.inventario, inv.movimientos, inv.motor_alertas))
+
+    hilo = threading.Thread(target=lambda: [observar() for _ in range(200)])
+    hilo.start()
+    resultados = inv.benchmark_concurrencia(num_hilos=2, pedidos_por_hilo=300, num_productos=20, stock_inicial=50)
+    hilo.join()
+
+    assert not any(r["sobreventa"] for r in resultados)
+    assert (inv.inventario, inv.movimientos, inv.indice_movimientos, inv.motor_alertas,
+            inv.pronostico_demanda, inv.almacen_persistente) == estado_global
+    assert all(c == (inventario_aislado, estado_global[1], estado_global[3]) for c in capturado)
+    assert inv.movimientos == [] and len(inventario_aislado) == 2
+
+
+def test_benchmark_concurrencia_con_log_no_sobrevende(inventario_aislado):
+    resultados = inv.benchmark_concurrencia(num_hilos=4, pedidos_por_hilo=100, num_productos=10,
+                                            stock_inicial=30, con_log=True, fsync_cada=10)
+
+    assert [(r["candado"], r["franjas"]) for r in resultados] == [("global", 1), ("franjas", 64)]
+    assert not any(r["sobreventa"] for r in resultados)
+
+
+def test_instantanea_automatica_con_hilos_es_consistente(inventario_aislado, tmp_path):
+    inventario_aislado.clear()
+    for i in range(8):
+        inv.agregar_producto(f"C{i}", {"nombre": f"C{i}", "stock": 100, "min": 0, "max": 500, "precio": 1.0})
+    inv.almacen_persistente = inv.AlmacenPersistente(str(tmp_path), fsync_cada=5, snapshot_cada=7)
+    nucleo = inv.InventarioConcurrente(4)
+
+    def vender(semilla):
+        for j in range(40):
+            nucleo.registrar_salida(f"C{(semilla + j) % 8}", 1, "Venta")
+
+    hilos = [threading.Thread(target=vender, args=(i,)) for i in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    inv.almacen_persistente.cerrar()
+    esperado = {codigo: producto.stock for codigo, producto in inventario_aislado.items()}
+    assert any((tmp_path / "historial").iterdir())
+
+    inventario_aislado.clear()
+    inv.movimientos.clear()
+    inv.indice_movimientos = inv.IndiceMovimientos()
+    inv.pronostico_demanda = inv.PronosticoDemanda()
+    inv.AlmacenPersistente(str(tmp_path)).cargar()
+    assert {codigo: producto.stock for codigo, producto in inventario_aislado.items()} == esperado
+    assert sum(esperado.values()) == 800 - 160
+
+
+def test_alertas_de_reabastecimiento_leen_el_motor(inventario_aislado, monkeypatch, capsys):
+    inv.registrar_salida_productos("PROD001", 25, "Venta")
+    inv.registrar_salida_productos("PROD004", 2, "Venta")
+    esperadas = sorted((a for a in map(inv._evaluar_alerta, inventario_aislado, inventario_aislado.values())
+                        if a is not None), key=inv.MotorAlertas._orden)
+    monkeypatch.setattr(inv, "_evaluar_alerta", lambda *_: pytest.fail("recorrió el catálogo"))
+
+    alertas = inv.generar_alertas_reabastecimiento()
+
+    assert alertas == esperadas and [a["nivel"] for a in alertas] == ["CRÍTICO", "ADVERTENCIA"]
+    assert "📋 Total de alertas: 2" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("precio", ["-5", "nan", "inf", "-inf", "abc", None])
+def test_lote_rechaza_precios_de_entrada_invalidos(inventario_aislado, precio):
+    resumen = inv.registrar_movimientos_lote([
+        {"tipo": "ENTRADA", "codigo": "PROD004", "cantidad": "3", "precio": precio},
+        {"tipo": "ENTRADA", "codigo": "PROD004", "cantidad": "2", "precio": "0"},
+    ], atomico=False)
+
+    assert resumen["rechazadas"] == [(1, "Precio de compra inválido")]
+    assert inventario_aislado["PROD004"].stock == 10
+    assert inventario_aislado["PROD004"].precio == 0.0
+
+
+def test_recalculo_vectorizado_coincide_con_el_calculo_por_producto(inventario_aislado, capsys):
+    pytest.importorskip("numpy")
+    generador = random.Random(3)
+    inventario_aislado.clear()
+    for i in range(30):
+        inv.agregar_producto(f"R{i:02d}", {"nombre": f"R{i:02d}", "stock": 10000, "min": 0, "max": 1, "precio": 2.0})
+        for _ in range(1 if i % 10 == 0 else generador.randint(2, 12)):  # Una sola salida: datos insuficientes
+            inv.registrar_salida_productos(f"R{i:02d}", generador.randint(1, 37), "Venta")
+
+    reporte = inv.recalcular_niveles_inventario(inv.POLITICA_SIMULAR)
+    for codigo in inventario_aislado:
+        inv.calcular_nivel_optimo_inventario(codigo, actualizar=True)
+    capsys.readouterr()
+
+    vectorizado = {c["codigo"]: (c["min_nuevo"], c["max_nuevo"]) for c in reporte["cambios"]}
+    por_producto = {codigo: (p.min, p.max) for codigo, p in inventario_aislado.items() if (p.min, p.max) != (0, 1)}
+    assert vectorizado == por_producto
+    assert reporte["analizados"] == len(por_producto) and reporte["datos_insuficientes"] == 30 - len(por_producto) == 3
+
+
+def test_consultas_por_rango_del_indice_coinciden_con_filtrar_la_lista():
+    generador = random.Random(11)
+    base = datetime.datetime(2024, 1, 1)
+    indice = inv.IndiceMovimientos()
+    lista = []
+    for minuto in generador.sample(range(10000), 400):  # Fechas únicas, agregadas desordenadas
+        movimiento = {"tipo": generador.choice(("ENTRADA", "SALIDA")), "codigo": f"P{generador.randrange(8)}",
+                      "cantidad": generador.randint(1, 50), "fecha": base + datetime.timedelta(minutes=minuto)}
+        indice.agregar(movimiento)
+        lista.append(movimiento)
+    fechas = sorted(m["fecha"] for m in lista)
+
+    for _ in range(50):
+        desde, hasta = sorted(generador.sample(fechas, 2))  # Límites exactos: desde incluido, hasta excluido
+        codigo = generador.choice((None, "P0", "P3", "P9"))
+        tipo = generador.choice((None, "ENTRADA", "SALIDA"))
+        esperados = sorted((m for m in lista if (codigo is None or m["codigo"] == codigo)
+                            and (tipo is None or m["tipo"] == tipo) and desde <= m["fecha"] < hasta),
+                           key=lambda m: m["fecha"])
+        assert list(indice.consultar(codigo, tipo, desde, hasta)) == esperados
+
+        unidades = {}
+        for m in lista:
+            if m["tipo"] == "SALIDA" and desde <= m["fecha"] < hasta:
+                unidades[m["codigo"]] = unidades.get(m["codigo"], 0) + m["cantidad"]
+        mas_movidos = indice.mas_movidos(3, "SALIDA", desde, hasta)
+        assert [u for _, u in mas_movidos] == sorted(unidades.values(), reverse=True)[:3]
+        assert all(unidades[c] == u for c, u in mas_movidos)
+
+    assert list(indice.consultar()) == sorted(lista, key=lambda m: m["fecha"])
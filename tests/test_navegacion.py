@@ -0,0 +1,176 @@
+import pytest
+
+import problema3_navegacion as nav
+
+
+def test_benchmark_fusion_restaura_estado_y_compara_en_orden():
+    pytest.importorskip("numpy")
+    estado = (nav.obstaculos_detectados, nav.indice_obstaculos, nav.indice_criticos)
+    cantidad_criticos = len(nav.indice_criticos)
+
+    resultado = nav.benchmark_fusion(5000, semilla=3)
+
+    assert resultado["coinciden"]
+    assert all(actual is original for actual, original in
+               zip((nav.obstaculos_detectados, nav.indice_obstaculos, nav.indice_criticos), estado))
+    assert len(nav.indice_criticos) == cantidad_criticos
+
+
+def _obstaculo(distancia, peligrosidad=0.9):
+    return {"fuente": "LIDAR", "direccion": "Norte", "distancia": distancia, "tipo": "peaton",
+            "peligrosidad": peligrosidad, "accion_recomendada": "REDUCIR_VELOCIDAD"}
+
+
+def test_ajustar_velocidad_usa_la_lista_si_no_recibe_indice(monkeypatch):
+    obstaculos = [_obstaculo(40.0)]
+    indice = nav.IndiceEspacial()
+    indice.reconstruir([(0.0, 40.0, obstaculos[0])], origen=obstaculos)
+    monkeypatch.setattr(nav, "indice_criticos", indice)
+    monkeypatch.setattr(nav, "posicion_actual", {"x": 0.0, "y": 0.0})
+
+    # La lista se modifica en el lugar después de construir el índice
+    obstaculos.append(_obstaculo(5.0))
+    monkeypatch.setattr(nav, "velocidad_actual", 10)
+    nav.ajustar_velocidad_trafico("LIBRE", obstaculos)
+    assert nav.velocidad_actual == 0
+
+    monkeypatch.setattr(nav, "velocidad_actual", 10)
+    nav.ajustar_velocidad_trafico("LIBRE", obstaculos[:1], indice)
+    assert nav.velocidad_actual == 30
+
+
+def test_ajustar_velocidad_con_indice_elige_por_distancia_medida(monkeypatch):
+    # La posición estimada del más cercano en el índice no coincide con la menor distancia medida
+    lejos_en_mapa = _obstaculo(8.0)
+    cerca_en_mapa = _obstaculo(45.0)
+    obstaculos = [cerca_en_mapa, lejos_en_mapa, _obstaculo(3.0, peligrosidad=0.2)]
+    indice = nav.IndiceEspacial()
+    indice.reconstruir([(0.0, 2.0, cerca_en_mapa), (60.0, 60.0, lejos_en_mapa)], origen=obstaculos)
+    monkeypatch.setattr(nav, "posicion_actual", {"x": 0.0, "y": 0.0})
+
+    velocidades = []
+    for argumentos in ((obstaculos,), (obstaculos, indice)):
+        monkeypatch.setattr(nav, "velocidad_actual", 10)
+        nav.ajustar_velocidad_trafico("LIBRE", *argumentos)
+        velocidades.append(nav.velocidad_actual)
+
+    assert velocidades == [0, 0]
+
+
+def test_replanificar_ruta_no_modifica_el_mapa_estatico(monkeypatch):
+    mapa = nav._mapa_demostracion()
+    estatico = bytes(mapa.celdas)
+    monkeypatch.setattr(nav, "mapa_navegacion", mapa)
+    monkeypatch.setattr(nav, "replanificador", None)
+    monkeypatch.setattr(nav, "celdas_obstaculos", set())
+    monkeypatch.setattr(nav, "posicion_actual", {"x": 5.0, "y": 5.0})
+    monkeypatch.setattr(nav, "ruta_actual", [])
+    obstaculo = {"direccion": "Este", "distancia": 4.0}
+
+    nav.replanificar_ruta([obstaculo], {"x": 140.0, "y": 140.0})
+    assert nav.celdas_obstaculos
+    assert nav.replanificador.ocupacion.bloqueada(9, 5)
+    nav.replanificar_ruta([], {"x": 140.0, "y": 140.0})
+
+    assert bytes(mapa.celdas) == estatico
+    assert not nav.replanificador.ocupacion.bloqueada(9, 5)
+
+
+def test_reparacion_con_limite_continua_en_la_siguiente_llamada():
+    mapa = nav._mapa_muros(60)
+    fin = (59, 59)
+    limitado = nav.ReplanificadorDStarLite(mapa, (0, 0), fin)
+    completo = nav.ReplanificadorDStarLite(mapa, (0, 0), fin)
+    camino = completo.camino()
+    cambios = [(celda, True) for celda in camino[3:8]]
+
+    limitado.actualizar_celdas(cambios, camino[1], limite=1)
+    completo.actualizar_celdas(cambios, camino[1])
+    assert limitado.pendiente and not completo.pendiente
+    _, costo_astar, _ = nav.buscar_ruta_grilla(limitado.ocupacion, camino[1], fin)
+
+    limitado.actualizar_celdas([], camino[1])
+    assert not limitado.pendiente
+    assert limitado.costo == completo.costo == costo_astar
+
+
+def test_benchmark_replanificacion_muros_favorece_dstar():
+    resultado = nav.benchmark_replanificacion(tamano=60, ciclos=5, escenario="muros")
+    ciclos = resultado["ciclos"]
+    assert ciclos and all(c["mismo_costo"] for c in ciclos)
+    assert sum(c["dstar_expandidos"] for c in ciclos) < sum(c["astar_expandidos"] for c in ciclos)
+
+
+def test_buscar_ruta_grilla_en_bordes_coincide_con_dijkstra():
+    generador = nav.random.Random(7)
+    for _ in range(20):
+        mapa = nav.MapaOcupacion(12, 9)
+        for _ in range(25):
+            mapa.marcar(generador.randrange(12), generador.randrange(9))
+        inicio, fin = (0, generador.randrange(9)), (11, generador.randrange(9))
+        mapa.marcar(*inicio, bloqueada=False)
+        mapa.marcar(*fin, bloqueada=False)
+
+        camino, costo, _ = nav.buscar_ruta_grilla(mapa, inicio, fin)
+        _, costo_dijkstra, _ = nav.buscar_ruta_grilla(mapa, inicio, fin, usar_heuristica=False)
+
+        assert costo == costo_dijkstra
+        if camino is None:
+            continue
+        assert camino[0] == inicio and camino[-1] == fin
+        for (c0, f0), (c1, f1) in zip(camino, camino[1:]):
+            assert max(abs(c1 - c0), abs(f1 - f0)) == 1 and not mapa.bloqueada(c1, f1)
+            assert not (mapa.bloqueada(c1, f0) or mapa.bloqueada(c0, f1))
+
+
+class _RelojSimulado:
+    """Reloj manual: dormir y las etapas lo avanzan, sin esperas reales"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+    def dormir(self, segundos):
+        self.ahora += segundos
+
+
+def test_planificador_cuenta_plazo_incumplido_y_salta_activaciones_perdidas():
+    reloj = _RelojSimulado()
+    llamadas = []
+
+    def control(_periodo):
+        llamadas.append(reloj.ahora)
+        if len(llamadas) == 3:
+            reloj.ahora += 0.3125  # Excede su plazo (0.375) por 1.5 períodos
+
+    planificador = nav.PlanificadorTiempoReal(reloj=reloj, dormir=reloj.dormir)
+    planificador.agregar_etapa("control", 8, control)
+    etapa = planificador.ejecutar(1.0)["etapas"]["control"]
+
+    # Las activaciones de 0.375 y 0.5 ya pasaron: se saltan en lugar de ejecutarse en ráfaga
+    assert llamadas == [0.0, 0.125, 0.25, 0.625, 0.75, 0.875]
+    assert etapa["plazos_incumplidos"] == 1
+    assert etapa["activaciones_perdidas"] == 2
+    assert etapa["ejecuciones"] == etapa["latencia"]["cantidad"] == 6
+
+
+def test_planificador_omite_etapa_degradable_sin_presupuesto_hasta_max_omisiones():
+    reloj = _RelojSimulado()
+    replanificaciones = []
+
+    def replanificar(_periodo):
+        replanificaciones.append(reloj.ahora)
+        reloj.ahora += 0.1875  # No cabe entre dos activaciones del control (0.125 s)
+
+    planificador = nav.PlanificadorTiempoReal(reloj=reloj, dormir=reloj.dormir, alfa_latencia=1.0, max_omisiones=2)
+    planificador.agregar_etapa("control", 8, lambda _periodo: None)
+    planificador.agregar_etapa("replanificacion", 2, replanificar, degradable=True)
+    etapas = planificador.ejecutar(3.0)["etapas"]
+
+    # Primera ejecución sin estimación; luego dos omisiones por presupuesto y una forzada, y así sucesivamente
+    assert replanificaciones == [0.0, 1.5]
+    assert etapas["replanificacion"]["omitidas"] == 4
+    assert etapas["replanificacion"]["ejecuciones"] == 2
+    assert etapas["control"]["plazos_incumplidos"] == 0
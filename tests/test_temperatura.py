@@ -0,0 +1,211 @@
+import random
+
+import pytest
+
+import problema1_temperatura as temperatura
+
+
+def test_historial_acepta_intensidad_fraccionaria():
+    historial = temperatura.HistorialEnergia()
+    historial.registrar("zona_1", "CALENTAR", 2.5, 1.0, 5.0, 0.75, 100.0)
+    historial.registrar("zona_1", "CALENTAR", 3, 1.0, 6.0, 0.9, 200.0)
+
+    assert historial[0]["intensidad"] == 2.5
+    assert historial[1]["intensidad"] == 3
+    assert type(historial[1]["intensidad"]) is int
+
+
+def test_registrar_consumo_energia_intensidad_fraccionaria(monkeypatch):
+    monkeypatch.setattr(temperatura, "historial_energia", temperatura.HistorialEnergia())
+    agregador = temperatura.AgregadorEnergia()
+    monkeypatch.setattr(temperatura, "receptores_consumo", [agregador.registrar])
+
+    with temperatura.salida_temporal(temperatura.MODO_SILENCIOSO):
+        registro = temperatura.registrar_consumo_energia("zona_1", "CALENTAR", 2.5, 1.0, instante=1000.0)
+
+    assert registro["consumo_kwh"] == 5.0
+    assert temperatura.historial_energia[0]["intensidad"] == 2.5
+    assert temperatura.historial_energia.totales_zona("zona_1")["consumo_kwh"] == 5.0
+    assert agregador.consultar("zona_1", "1h", instante=1000.0)["consumo_kwh"] == 5.0
+
+
+def _programador():
+    instante = [0.0]
+    enviados = []
+    programador = temperatura.ProgramadorComandosHVAC(bus=enviados.append, reloj=lambda: instante[0])
+    return programador, instante, enviados
+
+
+def test_programador_contabiliza_pendiente_descartado_por_histeresis():
+    programador, _, _ = _programador()
+
+    assert programador.solicitar("zona_1", 24.0, 22.0)
+    assert not programador.solicitar("zona_1", 22.1, 22.0)
+
+    estadisticas = programador.estadisticas()
+    assert estadisticas["solicitados"] == 2
+    assert estadisticas["suprimidos"] == 2
+    assert estadisticas["enviados"] == 0
+    assert programador.despachar() == []
+
+
+def test_programador_olvida_ultimo_enviado_al_volver_a_estable():
+    programador, instante, enviados = _programador()
+
+    programador.solicitar("zona_1", 24.0, 22.0)
+    programador.despachar()
+    instante[0] = 1.0
+    programador.solicitar("zona_1", 22.1, 22.0)
+    instante[0] = 2.0
+    assert programador.solicitar("zona_1", 24.0, 22.0)
+    programador.despachar()
+
+    assert len(enviados) == 2
+    estadisticas = programador.estadisticas()
+    assert estadisticas["solicitados"] == estadisticas["suprimidos"] + estadisticas["enviados"]
+
+
+def test_extender_fusiona_registros_solapados_en_orden():
+    historial = temperatura.HistorialEnergia()
+    for instante in (1.0, 3.0, 5.0, 7.0):
+        historial.registrar("zona_1", "CALENTAR", 1, 1.0, 1.0, 0.15, instante)
+    otro = temperatura.HistorialEnergia()
+    for instante in (4.0, 6.0, 8.0):
+        otro.registrar("zona_2", "ENFRIAR", 2, 1.0, 2.0, 0.3, instante)
+
+    historial.extender(otro)
+
+    assert historial._ordenado
+    assert list(historial._timestamp) == [1.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+    assert [registro["zona"] for registro in historial][2:5] == ["zona_2", "zona_1", "zona_2"]
+    assert historial.totales_rango(4.0, 7.0)["consumo_kwh"] == 5.0
+
+
+def test_procesar_fragmento_no_modifica_estado_global():
+    zonas_globales = temperatura.zonas
+    historial_global = temperatura.historial_energia
+    registros_previos = len(historial_global)
+    ids_zona = [f"zona_{i}" for i in range(20)]
+
+    temperaturas, historial = temperatura._procesar_fragmento(
+        ids_zona, [15.0] * 20, [3] * 20, 28.0, 1 / 60, "prueba"
+    )
+
+    assert temperatura.zonas is zonas_globales
+    assert temperatura.historial_energia is historial_global
+    assert len(historial_global) == registros_previos
+    assert len(temperaturas) == 20 and len(historial) == 20
+
+
+class _ZonasSoloLectura(dict):
+    def __setitem__(self, clave, valor):
+        raise AssertionError(f"se modificó zonas[{clave!r}]")
+
+    def __delitem__(self, clave):
+        raise AssertionError(f"se eliminó zonas[{clave!r}]")
+
+
+def test_benchmark_sondeo_no_toca_las_zonas_globales(monkeypatch):
+    zonas_globales = _ZonasSoloLectura(temperatura.zonas)
+    monkeypatch.setattr(temperatura, "zonas", zonas_globales)
+
+    with temperatura.salida_temporal(temperatura.MODO_SILENCIOSO):
+        resultado = temperatura.benchmark_sondeo(num_zonas=20, latencia=0.001, concurrencia=8)
+
+    assert resultado["zonas"] == 20
+    assert temperatura.zonas is zonas_globales and not any(z.startswith("bench_") for z in zonas_globales)
+
+
+def test_sensor_simulado_lee_zonas_propias():
+    sensor = temperatura.SensorSimulado(0.0, estado_zonas={"z": {"temperatura": 20.0, "ocupacion": 4}})
+
+    lectura = sensor.leer_bloqueante("z")
+
+    assert 19.0 <= lectura["temperatura"] <= 21.0
+    assert sensor.leer_bloqueante("zona_1") is None
+
+
+def test_agregador_redondea_intensidades_fraccionarias():
+    agregador = temperatura.AgregadorEnergia()
+    for intensidad in (2.6, 2.5, 2.7, 3.4, 9.6):
+        agregador.registrar({"zona": "zona_1", "intensidad": intensidad, "consumo_kwh": 1.0,
+                             "costo": 0.15, "timestamp": 1000.0})
+
+    resumen = agregador.consultar("zona_1", "1h", instante=1000.0)
+
+    assert resumen["intensidad_p50"] == 3
+    assert resumen["intensidad_p95"] == 10
+
+
+@pytest.mark.parametrize("temperatura_exterior", [5.0, 22.0, 28.0, 38.0])
+def test_evaluar_zonas_lote_coincide_con_la_ruta_escalar(temperatura_exterior):
+    pytest.importorskip("numpy")
+    generador = random.Random(1)
+    temperaturas = [round(generador.uniform(14.0, 30.0), 1) for _ in range(500)]
+    ocupaciones = [generador.randint(0, 40) for _ in range(500)]
+    horas = [i % 24 for i in range(500)]
+
+    lote = temperatura.evaluar_zonas_lote(temperaturas, ocupaciones, horas, temperatura_exterior)
+
+    with temperatura.salida_temporal(temperatura.MODO_SILENCIOSO):
+        for i, (actual, ocupacion, hora) in enumerate(zip(temperaturas, ocupaciones, horas)):
+            optima = temperatura.calcular_temperatura_optima(
+                {"zona": f"zona_{i}", "ocupacion": ocupacion, "hora": hora}, temperatura_exterior)
+            accion, intensidad = temperatura._comando_ajuste(optima, actual) or ("ESTABLE", 0)
+            assert lote["temperatura_optima"][i] == optima
+            assert temperatura.ACCIONES_HVAC[lote["accion"][i]] == accion
+            assert lote["intensidad"][i] == intensidad
+
+
+def test_tabla_de_consignas_coincide_con_el_calculo_directo():
+    lecturas = [{"zona": f"z{ocupacion}_{hora}", "ocupacion": ocupacion, "hora": hora}
+                for ocupacion in range(41) for hora in range(24)]
+
+    with temperatura.salida_temporal(temperatura.MODO_SILENCIOSO):
+        for temperatura_exterior in (0.0, 17.0, 22.0, 27.5, 35.0):
+            directo = {datos["zona"]: temperatura.calcular_temperatura_optima(datos, temperatura_exterior)
+                       for datos in lecturas}
+            assert temperatura.temperaturas_optimas_tabla(lecturas, temperatura_exterior) == directo
+            assert all(temperatura.temperatura_optima_tabla(datos, temperatura_exterior) == directo[datos["zona"]]
+                       for datos in lecturas[::37])
+
+
+def test_tabla_de_consignas_se_invalida_al_cambiar_parametros(monkeypatch):
+    datos = {"zona": "zona_1", "ocupacion": 10, "hora": 12}
+    antes = temperatura.temperatura_optima_tabla(datos, 22.0)
+
+    monkeypatch.setattr(temperatura, "FACTOR_OCUPACION", temperatura.FACTOR_OCUPACION * 2)
+    with temperatura.salida_temporal(temperatura.MODO_SILENCIOSO):
+        esperado = temperatura.calcular_temperatura_optima(datos, 22.0)
+
+    assert temperatura.temperatura_optima_tabla(datos, 22.0) == esperado != antes
+
+
+def test_registros_compactos_admiten_acceso_como_diccionario():
+    lectura = temperatura.LecturaSensor("zona_1", 23.5, 7, 14, 1000.0)
+
+    assert lectura["temperatura"] == lectura.temperatura == 23.5
+    assert lectura.get("inexistente", "x") == "x"
+    assert {campo: lectura[campo] for campo in lectura.keys()} == {
+        "zona": "zona_1", "temperatura": 23.5, "ocupacion": 7, "hora": 14, "timestamp": 1000.0}
+    lectura["ocupacion"] = 9
+    assert lectura.ocupacion == 9
+    with pytest.raises(KeyError):
+        lectura["inexistente"]
+    with pytest.raises(AttributeError):
+        lectura.extra = 1  # __slots__: sin __dict__ por registro
+    assert not hasattr(lectura, "__dict__")
+
+
+def test_zona_compacta_produce_las_mismas_lecturas_y_consignas_que_el_diccionario():
+    como_dict = {"zona_1": {"temperatura": 21.0, "ocupacion": 12, "objetivo": 22.0}}
+    compacta = {"zona_1": temperatura.Zona(21.0, 12, 22.0)}
+
+    lecturas = [temperatura._simular_lectura_sensor("zona_1", 3600.0 * 15, estado, random.Random(5))
+                for estado in (como_dict, compacta)]
+
+    assert lecturas[0] == lecturas[1]
+    lectura_dict = {campo: lecturas[0][campo] for campo in lecturas[0].keys()}
+    with temperatura.salida_temporal(temperatura.MODO_SILENCIOSO):
+        assert temperatura.calcular_temperatura_optima(lecturas[0], 30.0) == \
+            temperatura.calcular_temperatura_optima(lectura_dict, 30.0)